@@ -1,11 +1,50 @@
 import os
-import math
+import functools
+import hashlib
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 
-from excel_generator import get_catalog, generate_workbook_bytes
+from excel_generator import WorkbookCache, cached_workbook_bytes
+from sizing_engine import (
+    BATTERIES,
+    DEFAULT_COSTS,
+    DEFAULT_TARIFF,
+    MONTH_LABELS,
+    MeterDataError,
+    TIME_STEPS_MINUTES,
+    PANEL_IDS,
+    apply_pv_losses,
+    array_pv_profile,
+    battery_module_combinations,
+    battery_sizing_curve,
+    candidate_inverters,
+    combined_wiring,
+    energy_flows,
+    energy_summary,
+    explore_design_space,
+    financial_summary,
+    get_inverter_elec,
+    get_panel_elec,
+    hourly_profiles,
+    installation_cost,
+    knee_point,
+    load_meter_file,
+    log_recording,
+    meter_consumption,
+    monthly_totals,
+    optimize_strings_table,
+    profile_hash,
+    select_best_inverter,
+    select_inverter_combination,
+    simulate_lifetime,
+    time_grid,
+    typical_days,
+    span,
+    start_recording,
+    wiring_from_table,
+)
 
 # ----------------------------------------------------
 # CONFIG STREAMLIT
@@ -15,275 +54,106 @@ st.set_page_config(
     layout="wide",
 )
 
-# ----------------------------------------------------
-# CATALOGUE
-# ----------------------------------------------------
-PANELS, INVERTERS, BATTERIES = get_catalog()
-PANEL_IDS = [p[0] for p in PANELS]
-
-
-# ----------------------------------------------------
-# FONCTIONS CATALOGUE
-# ----------------------------------------------------
-def get_panel_elec(panel_id: str):
-    for p in PANELS:
-        if p[0] == panel_id:
-            return {
-                "id": p[0],
-                "Pstc": float(p[1]),
-                "Voc": float(p[2]),
-                "Vmp": float(p[3]),
-                "Isc": float(p[4]),
-                "alpha_V": float(p[6]),  # %/°C
-            }
-    return None
-
-
-def get_inverter_elec(inv_id: str):
-    for inv in INVERTERS:
-        # (ID, P_AC_nom, P_DC_max, V_MPP_min, V_MPP_max,
-        #  V_DC_max, I_MPPT, Nb_MPPT, Type_reseau, Famille, V_nom_dc)
-        if inv[0] == inv_id:
-            return {
-                "id": inv[0],
-                "P_ac": float(inv[1]),
-                "P_dc_max": float(inv[2]),
-                "Vmpp_min": float(inv[3]),
-                "Vmpp_max": float(inv[4]),
-                "Vdc_max": float(inv[5]),
-                "Impp_max": float(inv[6]),
-                "nb_mppt": int(inv[7]),
-                "type_reseau": inv[8],
-                "famille": inv[9],
-                "V_nom_dc": float(inv[10]),
-            }
-    return None
-
+# Mesures de performance du rerun courant (panneau "Performance" en bas de page)
+perf = start_recording()
 
 # ----------------------------------------------------
-# PROFILS CONSOMMATION / PRODUCTION (MENSUELS / HORAIRES)
+# CACHE DES ÉTAPES DE CALCUL
 # ----------------------------------------------------
-def monthly_pv_profile_kwh_kwp():
-    """Profil mensuel PV Belgique (kWh/an/kWc)."""
-    annual_kwh_kwp = 1034.0
-    distribution = np.array([3.8, 5.1, 8.7, 11.5, 12.1, 11.8,
-                             11.9, 10.8, 9.7, 7.0, 4.3, 3.3])
-    return annual_kwh_kwp * distribution / 100.0
+@st.cache_resource
+def get_cache_stats():
+    """Compteurs appels / calculs par étape, partagés entre les reruns (debug)."""
+    return {}
 
 
-def monthly_consumption_profile(annual_kwh: float, profile: str):
-    profiles = {
-        "Standard":   [7, 7, 8, 9, 9, 9, 9, 9, 8, 8, 8, 9],
-        "Hiver fort": [10,10,10, 9, 8, 7, 6, 6, 7, 8, 9,10],
-        "Été fort":   [6, 6, 7, 8, 9,10,11,11,10, 8, 7, 7],
-    }
-    arr = np.array(profiles[profile], dtype=float)
-    arr = arr / arr.sum()
-    return annual_kwh * arr
-
-
-def hourly_profile(profile_name: str):
-    """Profil de consommation horaire (24 valeurs qui somment à 1)."""
-    if profile_name == "Uniforme":
-        return np.ones(24) / 24
-
-    if profile_name == "Classique (matin + soir)":
-        prof = np.array([
-            0.02,0.02,0.02,0.02,0.02,
-            0.04,0.06,0.08,0.06,0.03,
-            0.02,0.02,0.02,0.02,0.03,
-            0.04,0.06,0.08,0.07,0.04,
-            0.02,0.01,0.01,0.01
-        ])
-        return prof / prof.sum()
-
-    if profile_name == "Travail journée (soir fort)":
-        prof = np.array([
-            0.01,0.01,0.01,0.01,0.01,
-            0.02,0.03,0.03,0.03,0.02,
-            0.01,0.01,0.01,0.01,0.02,
-            0.04,0.07,0.09,0.10,0.10,
-            0.05,0.02,0.01,0.01
-        ])
-        return prof / prof.sum()
-
-    if profile_name == "Télétravail":
-        prof = np.array([
-            0.02,0.02,0.03,0.03,0.03,
-            0.04,0.05,0.06,0.06,0.06,
-            0.05,0.05,0.05,0.05,0.05,
-            0.05,0.05,0.06,0.06,0.06,
-            0.05,0.03,0.02,0.02
-        ])
-        return prof / prof.sum()
-
-    return np.ones(24) / 24
-
-
-# ----------------------------------------------------
-# OPTIMISATION DES STRINGS
-# ----------------------------------------------------
-def get_nominal_dc_voltage(inverter: dict) -> float:
-    """Tension DC nominale typique, issue des fiches techniques ou du type réseau."""
-    if "V_nom_dc" in inverter and inverter["V_nom_dc"] > 0:
-        return inverter["V_nom_dc"]
-
-    grid = inverter["type_reseau"]
-    if grid == "Mono":
-        return 350.0
-    if grid == "Tri 3x230":
-        return 360.0
-    if grid == "Tri 3x400":
-        return 600.0
-
-    return 0.5 * (inverter["Vmpp_min"] + inverter["Vmpp_max"])
-
-
-def optimize_strings(
-    N_tot: int,
-    panel: dict,
-    inverter: dict,
-    T_min: float,
-    T_max: float,
-    ratio_dc_ac_target: float = 1.35,
-    ratio_dc_ac_min: float = 0.80,
-    ratio_dc_ac_max: float = 2.00,
-):
+def cached_stage(stage: str, **cache_kwargs):
     """
-    Optimisation automatique des strings, valable pour tous les onduleurs :
-
-    - 0 ou 1 string par MPPT (conforme à la plupart des fiches Sigen).
-    - Longueurs de strings éventuellement différentes sur chaque MPPT.
-    - Chaque string doit vérifier :
-        * Voc_froid <= Vdc_max
-        * Vmp_chaud dans [Vmpp_min, Vmpp_max]
-    - Le total de modules utilisés <= N_tot.
-    - Le ratio DC/AC dans [ratio_dc_ac_min, ratio_dc_ac_max].
+    st.cache_data avec compteurs hit / miss pour l'étape `stage`.
+    Le corps de la fonction n'est exécuté qu'en cas de miss.
     """
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            get_cache_stats()[stage]["misses"] += 1
+            return func(*args, **kwargs)
 
-    Voc = panel["Voc"]
-    Vmp = panel["Vmp"]
-    Isc = panel["Isc"]
-    alpha_V = panel["alpha_V"] / 100.0
-    Pstc = panel["Pstc"]
-
-    Vdc_max = inverter["Vdc_max"]
-    Vmpp_min = inverter["Vmpp_min"]
-    Vmpp_max = inverter["Vmpp_max"]
-    Impp_max = inverter["Impp_max"]
-    nb_mppt = inverter["nb_mppt"]
-    P_ac = inverter["P_ac"]
-    P_dc_max = inverter.get("P_dc_max", 1e9)
+        cached = st.cache_data(show_spinner=False, **cache_kwargs)(compute)
 
-    voc_factor_cold = (1 + alpha_V * (T_min - 25.0))
-    vmp_factor_hot = (1 + alpha_V * (T_max - 25.0))
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            get_cache_stats().setdefault(stage, {"calls": 0, "misses": 0})["calls"] += 1
+            with span(stage):
+                return cached(*args, **kwargs)
 
-    if voc_factor_cold <= 0 or vmp_factor_hot <= 0:
-        return None
-
-    # Courant : 1 string par MPPT => courant = Isc
-    if Isc > Impp_max:
-        return None
+        wrapper.clear = cached.clear
+        return wrapper
 
-    Vnom = get_nominal_dc_voltage(inverter)
+    return decorator
 
-    # Bornes sur le nombre de modules en série
-    N_series_max_voc = math.floor(Vdc_max / (Voc * voc_factor_cold))
 
-    if Vmp * vmp_factor_hot > 0:
-        N_series_min_vmp = math.ceil(Vmpp_min / (Vmp * vmp_factor_hot))
-        N_series_max_vmp = math.floor(Vmpp_max / (Vmp * vmp_factor_hot))
-    else:
-        N_series_min_vmp = 1
-        N_series_max_vmp = N_series_max_voc
+@st.cache_resource
+def get_workbook_cache():
+    """
+    Classeurs Excel déjà générés, partagés entre sessions. Niveau disque
+    activé si SIGEN_XLSX_CACHE_DIR est défini.
+    """
+    return WorkbookCache(
+        max_entries=16,
+        disk_dir=os.environ.get("SIGEN_XLSX_CACHE_DIR"),
+        max_disk_bytes=200 * 1024**2,
+    )
 
-    N_series_min = max(3, N_series_min_vmp)
-    N_series_max = min(N_series_max_voc, N_series_max_vmp)
 
-    if N_series_min > N_series_max:
+# ----------------------------------------------------
+# TABLES DE CÂBLAGE (MÉMORISÉES ENTRE LES RERUNS)
+# ----------------------------------------------------
+@cached_stage("Câblage", max_entries=256)
+def get_wiring_table(
+    panel_id: str,
+    inverter_id: str,
+    T_min: float,
+    T_max: float,
+    ratio_dc_ac_min: float = 0.80,
+    ratio_dc_ac_max: float = 2.00,
+    ratio_dc_ac_target: float = 1.35,
+):
+    """Table de câblage mémorisée par (panneau, onduleur, températures, bornes de ratio)."""
+    panel = get_panel_elec(panel_id)
+    inverter = get_inverter_elec(inverter_id)
+    if panel is None or inverter is None:
         return None
+    return optimize_strings_table(
+        panel,
+        inverter,
+        T_min,
+        T_max,
+        ratio_dc_ac_target=ratio_dc_ac_target,
+        ratio_dc_ac_min=ratio_dc_ac_min,
+        ratio_dc_ac_max=ratio_dc_ac_max,
+    )
 
-    best = None
-    best_score = -1e9
-
-    def vmp_hot_for(L):
-        return L * Vmp * vmp_factor_hot
-
-    def voc_cold_for(L):
-        return L * Voc * voc_factor_cold
-
-    def search(mppt_index, remaining_modules, lengths):
-        nonlocal best, best_score
-
-        if mppt_index == nb_mppt:
-            N_used = sum(lengths)
-            if N_used == 0:
-                return
-
-            P_dc = N_used * Pstc
-            if P_dc > P_dc_max:
-                return
-
-            ratio_dc_ac = P_dc / P_ac
-            if not (ratio_dc_ac_min <= ratio_dc_ac <= ratio_dc_ac_max):
-                return
-
-            used_lengths = [L for L in lengths if L > 0]
-            n_used_mppt = len(used_lengths)
-            if n_used_mppt == 0:
-                return
-
-            vmp_mean = sum(vmp_hot_for(L) for L in used_lengths) / n_used_mppt
-
-            score = (
-                1000 * N_used
-                + 100 * n_used_mppt
-                - 2.0 * abs(vmp_mean - Vnom)
-                - 50.0 * abs(ratio_dc_ac - ratio_dc_ac_target)
-            )
-
-            if score > best_score:
-                idx_best = min(
-                    range(len(used_lengths)),
-                    key=lambda i: abs(vmp_hot_for(used_lengths[i]) - Vnom)
-                )
-                N_series_main = used_lengths[idx_best]
-                best = {
-                    "strings": lengths[:],
-                    "N_used": N_used,
-                    "N_series_main": N_series_main,
-                    "P_dc": P_dc,
-                    "ratio_dc_ac": ratio_dc_ac,
-                }
-                best_score = score
-
-            return
-
-        # MPPT non utilisé
-        search(mppt_index + 1, remaining_modules, lengths + [0])
-
-        # MPPT avec un string actif
-        for L in range(N_series_min, N_series_max + 1):
-            if L > remaining_modules:
-                break
-            if voc_cold_for(L) > Vdc_max:
-                continue
-            vmp_hot_L = vmp_hot_for(L)
-            if not (Vmpp_min <= vmp_hot_L <= Vmpp_max):
-                continue
-
-            search(mppt_index + 1, remaining_modules - L, lengths + [L])
-
-    search(0, N_tot, [])
 
-    return best
+# ----------------------------------------------------
+# DIMENSIONNEMENT BATTERIE (COURBE SUR UNE GRILLE DE CAPACITÉS)
+# ----------------------------------------------------
+@cached_stage("Courbe batterie", max_entries=32)
+def get_battery_sizing_curve(
+    profile_key: str,
+    _pv_hourly,
+    _cons_hourly,
+    capacities_kwh: tuple,
+    step_minutes: int = 60,
+):
+    """Courbe de dimensionnement mémorisée par empreinte des profils PV / conso."""
+    return battery_sizing_curve(_pv_hourly, _cons_hourly, capacities_kwh, step_hours=step_minutes / 60.0)
 
 
 # ----------------------------------------------------
-# CHOIX AUTOMATIQUE DU MEILLEUR ONDULEUR
+# ÉTAPES MÉMORISÉES (CLÉS = ENTRÉES UTILES UNIQUEMENT)
 # ----------------------------------------------------
-def select_best_inverter(
-    panel: dict,
+@cached_stage("Sélection onduleur", max_entries=256)
+def get_best_inverter(
+    panel_id: str,
     n_panels: int,
     grid_type: str,
     max_dc_ac: float,
@@ -291,153 +161,204 @@ def select_best_inverter(
     T_min: float,
     T_max: float,
 ):
-    """
-    Sélection auto de l'onduleur :
-    - respecte type réseau + famille
-    - P_dc <= P_DC_max
-    - ratio DC/AC <= max_dc_ac (slider utilisateur, ex. 1.35)
-    - maximise P_dc
-    """
-    best = None
-    best_score = -1e9
-
-    for inv in INVERTERS:
-        inv_id, p_ac, p_dc_max, vmin, vmax, vdcmax, imppt, nb_mppt, inv_type, inv_family, v_nom_dc = inv
-
-        if inv_type != grid_type:
-            continue
-        if fam_pref is not None and inv_family != fam_pref:
-            continue
-
-        inv_elec = get_inverter_elec(inv_id)
-        if inv_elec is None:
-            continue
-
-        opt = optimize_strings(
-            N_tot=n_panels,
-            panel=panel,
-            inverter=inv_elec,
-            T_min=T_min,
-            T_max=T_max,
-            ratio_dc_ac_min=0.8,
-            ratio_dc_ac_max=max_dc_ac,  # borne du slider pour l'AUTO
-        )
-        if opt is None:
-            continue
-
-        P_dc = opt["P_dc"]
-        ratio = P_dc / p_ac
-
-        if P_dc > p_dc_max:
-            continue
-
-        score = P_dc
-
-        if score > best_score:
-            best_score = score
-            best = {
-                "inv_id": inv_id,
-                "opt": opt,
-                "P_dc": P_dc,
-                "ratio": ratio,
-                "P_ac": p_ac,
-            }
+    panel = get_panel_elec(panel_id)
+    if panel is None:
+        return None
+    return select_best_inverter(
+        panel=panel,
+        n_panels=n_panels,
+        grid_type=grid_type,
+        max_dc_ac=max_dc_ac,
+        fam_pref=fam_pref,
+        T_min=T_min,
+        T_max=T_max,
+    )
 
-    return best
 
+@cached_stage("Sélection onduleur", max_entries=64)
+def get_inverter_combination(
+    panel_id: str,
+    n_panels: int,
+    grid_type: str,
+    max_dc_ac: float,
+    fam_pref: str | None,
+    T_min: float,
+    T_max: float,
+    max_inverters: int,
+):
+    """Répartition auto sur plusieurs onduleurs (chacun avec son câblage)."""
+    panel = get_panel_elec(panel_id)
+    if panel is None:
+        return None
+    return select_inverter_combination(
+        panel, n_panels, grid_type, max_dc_ac, fam_pref, T_min, T_max, max_inverters=max_inverters
+    )
 
-# ----------------------------------------------------
-# SIMULATION HORAIRE (8760 H)
-# ----------------------------------------------------
-def generate_pv_profile_hourly(pv_monthly):
-    """Production PV horaire sur 8760 h à partir du profil mensuel."""
-    pv_day_profile = np.array([
-        0,0,0,0,0,
-        0.01,0.04,0.09,0.14,0.18,0.20,0.18,
-        0.14,0.10,0.06,0.03,0.01,
-        0,0,0,0,0,0,0
-    ])
-    pv_day_profile /= pv_day_profile.sum()
 
-    hours_month = [31*24, 28*24, 31*24, 30*24, 31*24, 30*24,
-                   31*24, 31*24, 30*24, 31*24, 30*24, 31*24]
+@cached_stage("Profils horaires", max_entries=64)
+def get_hourly_profiles(
+    p_dc_kwp: float,
+    annual_consumption: float,
+    consumption_profile: str,
+    hourly_profile_choice: str,
+    step_minutes: int = 60,
+):
+    """Profils PV et conso sur l'année, au pas step_minutes."""
+    return hourly_profiles(
+        p_dc_kwp, annual_consumption, consumption_profile, hourly_profile_choice, step_minutes
+    )
 
-    pv_hourly = []
-    for m in range(12):
-        days = hours_month[m] // 24
-        prod_day = pv_monthly[m] / days if days > 0 else 0.0
-        day_profile = pv_day_profile * prod_day
-        pv_hourly.extend(list(day_profile) * days)
 
-    return np.array(pv_hourly)
+@cached_stage("Profils horaires", max_entries=64)
+def get_array_pv_profile(
+    strings: tuple,
+    parallel: tuple,
+    p_stc_w: float,
+    mppt_orientations: tuple,
+    step_minutes: int = 60,
+):
+    """Production PV d'un champ multi-pans (orientation de chaque MPPT)."""
+    wiring = {"strings": list(strings), "parallel": list(parallel)}
+    return array_pv_profile(wiring, p_stc_w, mppt_orientations, step_minutes)
 
 
-def generate_consumption_hourly(cons_monthly, cons_frac):
-    """Consommation horaire sur 8760 h à partir du profil mensuel + horaire."""
-    hours_month = [31*24, 28*24, 31*24, 30*24, 31*24, 30*24,
-                   31*24, 31*24, 30*24, 31*24, 30*24, 31*24]
+@cached_stage("Pertes PV", max_entries=64)
+def get_pv_losses(pv_key: str, _pv_hourly, p_dc_w: float, p_ac_w: float, step_minutes: int = 60):
+    """Production après échauffement des cellules et écrêtage à P_ac, pertes par pas."""
+    return apply_pv_losses(_pv_hourly, p_dc_w, p_ac_w, step_minutes=step_minutes)
 
-    cons_hourly = []
-    for m in range(12):
-        days = hours_month[m] // 24
-        cons_day = cons_monthly[m] / days if days > 0 else 0.0
-        day_profile = cons_frac * cons_day
-        cons_hourly.extend(list(day_profile) * days)
 
-    return np.array(cons_hourly)
+@cached_stage("Relevés compteur", max_entries=8)
+def get_meter_profile(file_digest: str, _data: bytes, step_minutes: int = 60):
+    """Export Fluvius analysé, mémorisé par empreinte du fichier et pas de temps."""
+    return load_meter_file(_data, step_minutes=step_minutes)
 
 
-def simulate_battery_hourly(
-    pv_hourly,
-    cons_hourly,
-    battery_capacity_kwh,
-    charge_eff=0.95,
-    discharge_eff=0.95,
-    max_charge_power_kw=3.6,
-    max_discharge_power_kw=3.6,
+@cached_stage("Simulation", max_entries=64)
+def get_energy_flows(
+    profile_key: str,
+    _pv_hourly,
+    _cons_hourly,
+    battery_kwh: float,
+    step_minutes: int = 60,
+    dispatch: str = "greedy",
+    dispatch_items: tuple = (),
+    tariff_items: tuple = (),
 ):
     """
-    Simulation batterie sur 8760 h :
-    - SOC persistant
-    - charge / décharge avec rendement et puissance limite
+    Flux par pas de temps (soc, autocons. directe, autocons. batterie, export, import),
+    mémorisés par empreinte des profils, capacité batterie (0 = sans batterie)
+    et pilotage.
     """
-    hours = len(pv_hourly)
-    soc = 0.0
-    soc_series = np.zeros(hours)
-    ac_direct = np.zeros(hours)
-    ac_batt = np.zeros(hours)
-    grid_export = np.zeros(hours)
-    grid_import = np.zeros(hours)
+    return energy_flows(
+        _pv_hourly,
+        _cons_hourly,
+        battery_kwh,
+        step_minutes,
+        dispatch=dispatch,
+        tariff=dict(tariff_items),
+        dispatch_options=dict(dispatch_items),
+    )
 
-    for h in range(hours):
-        prod = pv_hourly[h]    # kWh
-        conso = cons_hourly[h] # kWh
 
-        direct = min(prod, conso)
-        ac_direct[h] = direct
+@cached_stage("Durée de vie", max_entries=32)
+def get_lifetime(
+    profile_key: str,
+    _pv_hourly,
+    _cons_hourly,
+    battery_kwh: float,
+    years: int,
+    panel_degradation: float,
+    cycle_fade: float,
+    step_minutes: int = 60,
+    dispatch: str = "greedy",
+    dispatch_items: tuple = (),
+    tariff_items: tuple = (),
+):
+    """Bilans annuels sur la durée de vie (dégradation panneaux, vieillissement batterie, pilotage)."""
+    return simulate_lifetime(
+        _pv_hourly,
+        _cons_hourly,
+        battery_kwh,
+        years=years,
+        panel_degradation=panel_degradation,
+        cycle_fade=cycle_fade,
+        step_minutes=step_minutes,
+        dispatch=dispatch,
+        tariff=dict(tariff_items),
+        dispatch_options=dict(dispatch_items),
+    )
 
-        surplus = prod - direct
-        deficit = conso - direct
 
-        max_charge_kwh = max_charge_power_kw
-        max_discharge_kwh = max_discharge_power_kw
+@cached_stage("Bilan financier", max_entries=64)
+def get_financial_summary(
+    flows_key: str,
+    battery_kwh: float,
+    step_minutes: int,
+    tariff_items: tuple,
+    investment: float,
+    _cons_hourly,
+    _grid_import,
+    _grid_export,
+):
+    """Factures avec / sans installation, économies et temps de retour."""
+    return financial_summary(
+        _cons_hourly,
+        _grid_import,
+        _grid_export,
+        investment,
+        tariff=dict(tariff_items),
+        step_minutes=step_minutes,
+    )
 
-        charge_possible = min(surplus, max_charge_kwh)
-        charge_effective = charge_possible * charge_eff
-        soc = min(battery_capacity_kwh, soc + charge_effective)
 
-        discharge_possible = min(deficit, max_discharge_kwh)
-        discharge_effective = min(discharge_possible / discharge_eff, soc)
+@cached_stage("Exploration", max_entries=16)
+def get_design_space(
+    cons_key: str,
+    _cons_hourly,
+    panel_id: str,
+    n_modules_range: tuple,
+    battery_capacities: tuple,
+    grid_type: str,
+    fam_pref,
+    max_dc_ac: float,
+    t_min: float,
+    t_max: float,
+    costs_items: tuple,
+    tariff_items: tuple,
+    step_minutes: int = 60,
+    pv_losses: bool = False,
+):
+    """Balayage modules × onduleur × batterie, mémorisé par empreinte de la conso."""
+    return explore_design_space(
+        panel_id,
+        _cons_hourly,
+        n_modules_range=n_modules_range,
+        battery_capacities=battery_capacities,
+        grid_type=grid_type,
+        fam_pref=fam_pref,
+        max_dc_ac=max_dc_ac,
+        t_min=t_min,
+        t_max=t_max,
+        costs=dict(costs_items),
+        tariff=dict(tariff_items),
+        step_minutes=step_minutes,
+        pv_losses=pv_losses,
+    )
 
-        ac_batt[h] = discharge_effective * discharge_eff
-        soc -= discharge_effective
 
-        grid_export[h] = surplus - charge_possible
-        grid_import[h] = deficit - ac_batt[h]
+@cached_stage("Jours types", max_entries=64)
+def get_typical_days(flows_key: str, battery_kwh: float, step_minutes: int, _series: tuple):
+    """Jours types (12 mois) des séries PV, conso et autoconsommation totale."""
+    return typical_days(np.stack(_series), step_minutes)
 
-        soc_series[h] = soc
 
-    return soc_series, ac_direct, ac_batt, grid_export, grid_import
+# Stratégies de pilotage proposées (libellé -> clé de DISPATCH_STRATEGIES)
+DISPATCH_LABELS = {
+    "Autoconsommation (glouton)": "greedy",
+    "Écrêtage des pointes (tarif capacitaire)": "peak_shaving",
+    "Coût minimal (programmation dynamique)": "cost_optimal",
+}
 
 
 # ----------------------------------------------------
@@ -447,9 +368,13 @@ with st.sidebar:
     st.markdown("### 🔧 Paramètres généraux")
 
     panel_id = st.selectbox("Panneau", options=PANEL_IDS, index=0)
-    n_modules = st.number_input("Nombre de panneaux", min_value=3, max_value=100, value=12)
+    multi_inverter = st.checkbox("Plusieurs onduleurs (grandes installations)", value=False)
+    n_modules = st.number_input(
+        "Nombre de panneaux", min_value=3, max_value=1000 if multi_inverter else 100, value=12
+    )
 
-    panel_elec = get_panel_elec(panel_id)
+    with span("Catalogue"):
+        panel_elec = get_panel_elec(panel_id)
     if panel_elec is None:
         st.error("Panneau introuvable dans le catalogue.")
         st.stop()
@@ -469,12 +394,44 @@ with st.sidebar:
         fam_pref = None
 
     max_dc_ac = st.slider("Ratio DC/AC max (sélection auto)", min_value=1.0, max_value=2.0, value=1.35, step=0.01)
+    pv_losses = st.checkbox("Pertes température et écrêtage onduleur", value=False)
 
     battery_enabled = st.checkbox("Batterie", value=False)
     if battery_enabled:
         battery_kwh = st.slider("Capacité batterie (kWh)", 6.0, 50.0, 6.0, 0.5)
+        dispatch_label = st.selectbox("Pilotage batterie", list(DISPATCH_LABELS), index=0)
+        dispatch = DISPATCH_LABELS[dispatch_label]
+        dispatch_options = {}
+        if dispatch == "peak_shaving":
+            threshold = st.number_input("Seuil de pointe (kW, 0 = auto par mois)", 0.0, 50.0, 0.0, 0.5)
+            if threshold > 0:
+                dispatch_options["peak_threshold_kw"] = float(threshold)
+        if dispatch != "greedy":
+            dispatch_options["grid_charging"] = st.checkbox(
+                "Recharge depuis le réseau",
+                value=dispatch == "peak_shaving",
+                help="Sans dépasser le seuil de pointe (écrêtage) ou la pointe mensuelle sans recharge réseau (coût minimal)",
+            )
     else:
         battery_kwh = 0.0
+        dispatch = "greedy"
+        dispatch_options = {}
+
+    with st.expander("Tarif électricité"):
+        price_peak = st.number_input("Prix heures pleines (€/kWh)", 0.0, 1.0, DEFAULT_TARIFF["import_peak"], 0.01)
+        price_offpeak = st.number_input("Prix heures creuses (€/kWh)", 0.0, 1.0, DEFAULT_TARIFF["import_offpeak"], 0.01)
+        price_injection = st.number_input("Tarif d'injection (€/kWh)", 0.0, 0.5, DEFAULT_TARIFF["injection"], 0.005)
+        capacity_rate = st.number_input(
+            "Tarif capacitaire (€/kW/an)", 0.0, 200.0, DEFAULT_TARIFF["capacity_eur_kw_year"], 1.0
+        )
+        capacity_min = st.number_input("Pointe minimale facturée (kW)", 0.0, 10.0, DEFAULT_TARIFF["capacity_min_kw"], 0.5)
+    tariff = {
+        "import_peak": float(price_peak),
+        "import_offpeak": float(price_offpeak),
+        "injection": float(price_injection),
+        "capacity_eur_kw_year": float(capacity_rate),
+        "capacity_min_kw": float(capacity_min),
+    }
 
     st.markdown("---")
     st.markdown("### Profil de consommation")
@@ -488,6 +445,36 @@ with st.sidebar:
         index=1
     )
 
+    step_minutes = st.selectbox(
+        "Pas de simulation",
+        options=list(TIME_STEPS_MINUTES),
+        index=0,
+        format_func=lambda m: f"{m} min",
+    )
+
+    meter_upload = st.file_uploader("Relevés Fluvius (CSV quart-horaire)", type=["csv"])
+    meter = None
+    meter_year = None
+    if meter_upload is not None:
+        meter_bytes = meter_upload.getvalue()
+        try:
+            meter = get_meter_profile(hashlib.sha1(meter_bytes).hexdigest(), meter_bytes, step_minutes)
+        except MeterDataError as exc:
+            st.error(f"Relevés illisibles : {exc}")
+        else:
+            year_label = st.selectbox(
+                "Année des relevés",
+                ["Moyenne"] + [str(y) for y in meter["years"]],
+                index=0,
+            )
+            meter_year = None if year_label == "Moyenne" else int(year_label)
+            report = meter["report"]
+            st.caption(
+                f"Consommation issue des relevés (remplace le profil ci-dessus) : "
+                f"{len(meter['years'])} année(s), {report['duplicates']} doublons moyennés, "
+                f"{report['gaps_filled']} quarts d'heure interpolés, {report['invalid']} relevés invalides."
+            )
+
     month_for_hours = st.slider("Mois pour le profil horaire", 1, 12, 6)
 
     st.markdown("---")
@@ -496,56 +483,98 @@ with st.sidebar:
     t_max = st.number_input("Température max (°C)", 30, 90, 70)
 
     st.markdown("---")
-    st.markdown("### Choix de l’onduleur (auto ou manuel)")
+    st.markdown("### Toiture")
+    roof_faces = []
+    if st.checkbox("Orientation par pan de toiture (un pan par MPPT)", value=False):
+        n_faces = st.number_input("Nombre de pans", min_value=1, max_value=4, value=2)
+        default_faces = [(-90, 35), (90, 35), (0, 35), (180, 35)]
+        for j in range(int(n_faces)):
+            col_az, col_tilt = st.columns(2)
+            azimuth = col_az.number_input(
+                f"Pan {j+1} – azimut (°)", -180, 180, default_faces[j][0], 5,
+                help="0 = sud, -90 = est, +90 = ouest",
+            )
+            tilt = col_tilt.number_input(f"Pan {j+1} – inclinaison (°)", 0, 90, default_faces[j][1], 5)
+            roof_faces.append((float(azimuth), float(tilt)))
+    else:
+        st.caption("Profil standard (plein sud).")
 
-    best = select_best_inverter(
-        panel=panel_elec,
-        n_panels=int(n_modules),
-        grid_type=grid_type,
-        max_dc_ac=float(max_dc_ac),
-        fam_pref=fam_pref,
-        T_min=float(t_min),
-        T_max=float(t_max),
-    )
+    st.markdown("---")
+    st.markdown("### Choix de l’onduleur (auto ou manuel)")
 
-    if best is None:
-        st.error("Aucun onduleur compatible trouvé (sélection auto).")
-        st.stop()
+    combination = None
+    if multi_inverter:
+        max_inverters = st.number_input("Nombre max d'onduleurs", min_value=2, max_value=12, value=4)
+        combination = get_inverter_combination(
+            panel_id,
+            int(n_modules),
+            grid_type,
+            float(max_dc_ac),
+            fam_pref,
+            float(t_min),
+            float(t_max),
+            int(max_inverters),
+        )
+        if combination is None:
+            st.error("Aucune combinaison d'onduleurs compatible trouvée (sélection auto).")
+            st.stop()
+        st.caption(f"Combinaison retenue : {combination['label']}")
+
+    if combination is not None:
+        # Onduleur principal (le plus puissant), pour la fiche et l'export
+        inverter_id = combination["units"][0]["inv_id"]
+    else:
+        best = get_best_inverter(
+            panel_id=panel_id,
+            n_panels=int(n_modules),
+            grid_type=grid_type,
+            max_dc_ac=float(max_dc_ac),
+            fam_pref=fam_pref,
+            T_min=float(t_min),
+            T_max=float(t_max),
+        )
+        if best is None:
+            st.error("Aucun onduleur compatible trouvé (sélection auto).")
+            st.stop()
 
-    auto_inv_id = best["inv_id"]
+        auto_inv_id = best["inv_id"]
 
-    compatible_inv = [
-        inv[0] for inv in INVERTERS
-        if inv[8] == grid_type and (fam_pref is None or inv[9] == fam_pref)
-    ]
+        with span("Catalogue"):
+            compatible_inv = [inv["id"] for _, inv in candidate_inverters(grid_type, fam_pref)]
 
-    inv_options = [f"(Auto) {auto_inv_id}"] + compatible_inv
-    selected_inv_label = st.selectbox("Onduleur", inv_options, index=0)
+        inv_options = [f"(Auto) {auto_inv_id}"] + compatible_inv
+        selected_inv_label = st.selectbox("Onduleur", inv_options, index=0)
 
-    if selected_inv_label.startswith("(Auto)"):
-        inverter_id = auto_inv_id
-    else:
-        inverter_id = selected_inv_label
+        if selected_inv_label.startswith("(Auto)"):
+            inverter_id = auto_inv_id
+        else:
+            inverter_id = selected_inv_label
 
 
 # ----------------------------------------------------
 # CALCULS PRINCIPAUX
 # ----------------------------------------------------
-inv_elec = get_inverter_elec(inverter_id)
+with span("Catalogue"):
+    inv_elec = get_inverter_elec(inverter_id)
 if inv_elec is None:
     st.error("Spécifications onduleur introuvables.")
     st.stop()
 
-# Optimisation de strings pour l'onduleur choisi (physique, ratio jusqu'à 2.0)
-opt_result = optimize_strings(
-    N_tot=int(n_modules),
-    panel=panel_elec,
-    inverter=inv_elec,
-    T_min=float(t_min),
-    T_max=float(t_max),
-    ratio_dc_ac_min=0.8,
-    ratio_dc_ac_max=2.0,
-)
+if combination is not None:
+    # Câblage de chaque onduleur déjà calculé par la sélection multi-onduleurs
+    opt_result = combined_wiring(combination)
+else:
+    # Optimisation de strings pour l'onduleur choisi (physique, ratio jusqu'à 2.0) :
+    # table calculée une fois pour tous les nombres de modules, puis simple lecture.
+    wiring_table = get_wiring_table(
+        panel_id,
+        inverter_id,
+        float(t_min),
+        float(t_max),
+        ratio_dc_ac_min=0.8,
+        ratio_dc_ac_max=2.0,
+    )
+    opt_result = wiring_from_table(wiring_table, int(n_modules))
 
 if opt_result is None:
     st.error(
@@ -556,76 +585,82 @@ if opt_result is None:
 
 P_dc = opt_result["P_dc"]
 ratio_dc_ac = opt_result["ratio_dc_ac"]
-p_dc_kwp = P_dc / 1000.0
 
-# Profil mensuel PV et conso
-pv_kwh_per_kwp = monthly_pv_profile_kwh_kwp()
-pv_monthly = pv_kwh_per_kwp * p_dc_kwp
-cons_monthly = monthly_consumption_profile(annual_consumption, consumption_profile)
+# Pan de toiture de chaque MPPT câblé (par défaut : pans en alternance)
+mppt_orientations = ()
+if roof_faces:
+    st.markdown("### Pans de toiture par MPPT")
+    face_labels = [f"Pan {j+1} ({az:+.0f}° / {tilt:.0f}°)" for j, (az, tilt) in enumerate(roof_faces)]
+    used_mppts = [i for i, L in enumerate(opt_result["strings"]) if L > 0]
+    cols_faces = st.columns(max(len(used_mppts), 1))
+    faces = [0] * len(opt_result["strings"])
+    for col, i in zip(cols_faces, used_mppts):
+        with col:
+            faces[i] = face_labels.index(
+                st.selectbox(f"MPPT {i+1}", face_labels, index=used_mppts.index(i) % len(face_labels))
+            )
+    mppt_orientations = tuple(roof_faces[f] for f in faces)
+p_dc_kwp = P_dc / 1000.0
 
-months_labels = ["Jan", "Fév", "Mar", "Avr", "Mai", "Juin",
-                 "Juil", "Août", "Sep", "Oct", "Nov", "Déc"]
-hours_per_month = [31*24, 28*24, 31*24, 30*24, 31*24, 30*24,
-                   31*24, 31*24, 30*24, 31*24, 30*24, 31*24]
 
 # ----------------------------------------------------
 # SIMULATION HORAIRE COMPLETE
 # ----------------------------------------------------
-cons_frac = hourly_profile(hourly_profile_choice)
+pv_hourly, cons_hourly = get_hourly_profiles(
+    p_dc_kwp,
+    float(annual_consumption),
+    consumption_profile,
+    hourly_profile_choice,
+    step_minutes,
+)
+if mppt_orientations:
+    pv_hourly = get_array_pv_profile(
+        tuple(opt_result["strings"]),
+        tuple(opt_result.get("parallel") or [1] * len(opt_result["strings"])),
+        float(panel_elec["Pstc"]),
+        mppt_orientations,
+        step_minutes,
+    )
+if pv_losses:
+    # Échauffement des cellules et écrêtage à la puissance AC (totale si plusieurs onduleurs)
+    p_ac_w = combination["P_ac"] if combination is not None else inv_elec["P_ac"]
+    pv_hourly, temperature_loss_h, clipping_h = get_pv_losses(
+        profile_hash(pv_hourly), pv_hourly, float(P_dc), float(p_ac_w), step_minutes
+    )
+if meter is not None:
+    cons_hourly = meter_consumption(meter, meter_year)
+profile_key = profile_hash(pv_hourly, cons_hourly)
 
-pv_hourly = generate_pv_profile_hourly(pv_monthly)
-cons_hourly = generate_consumption_hourly(cons_monthly, cons_frac)
+soc, ac_direct_h, ac_batt_h, export_h, import_h = get_energy_flows(
+    profile_key,
+    pv_hourly,
+    cons_hourly,
+    float(battery_kwh) if battery_enabled else 0.0,
+    step_minutes,
+    dispatch,
+    tuple(sorted(dispatch_options.items())),
+    tuple(sorted(tariff.items())),
+)
+# Empreinte des flux (profils + pilotage) pour les étapes qui en dépendent
+flows_key = profile_key if dispatch == "greedy" else profile_hash(soc, import_h, export_h)
 
-if battery_enabled and battery_kwh > 0:
-    soc, ac_direct_h, ac_batt_h, export_h, import_h = simulate_battery_hourly(
-        pv_hourly,
-        cons_hourly,
-        battery_capacity_kwh=float(battery_kwh),
-        charge_eff=0.95,
-        discharge_eff=0.95,
-        max_charge_power_kw=3.6,
-        max_discharge_power_kw=3.6,
+# Agrégations mensuelles / annuelles depuis la série annuelle
+with span("Agrégation mensuelle"):
+    summary = energy_summary(
+        pv_hourly, cons_hourly, (soc, ac_direct_h, ac_batt_h, export_h, import_h), step_minutes
     )
-else:
-    soc = np.zeros_like(pv_hourly)
-    ac_direct_h = np.minimum(pv_hourly, cons_hourly)
-    ac_batt_h = np.zeros_like(pv_hourly)
-    export_h = pv_hourly - ac_direct_h
-    import_h = cons_hourly - ac_direct_h
-
-# Agrégation mensuelle depuis 8760 h
-pv_monthly_sim = []
-cons_monthly_sim = []
-ac_direct_monthly = []
-ac_batt_monthly = []
-
-start = 0
-for hm in hours_per_month:
-    end = start + hm
-    pv_monthly_sim.append(pv_hourly[start:end].sum())
-    cons_monthly_sim.append(cons_hourly[start:end].sum())
-    ac_direct_monthly.append(ac_direct_h[start:end].sum())
-    ac_batt_monthly.append(ac_batt_h[start:end].sum())
-    start = end
-
-pv_monthly_sim = np.array(pv_monthly_sim)
-cons_monthly_sim = np.array(cons_monthly_sim)
-ac_direct_monthly = np.array(ac_direct_monthly)
-ac_batt_monthly = np.array(ac_batt_monthly)
-ac_total_monthly = ac_direct_monthly + ac_batt_monthly
-
-# Énergie annuelle
-pv_year = pv_hourly.sum()
-cons_year = cons_hourly.sum()
-ac_direct_year = ac_direct_h.sum()
-ac_batt_year = ac_batt_h.sum()
-ac_total_year = ac_direct_year + ac_batt_year
-
-# Garantir AC ≤ PV et ≤ conso
-ac_total_year = min(ac_total_year, pv_year, cons_year)
-
-taux_auto = (ac_total_year / pv_year * 100) if pv_year > 0 else 0.0
-taux_couv = (ac_total_year / cons_year * 100) if cons_year > 0 else 0.0
+
+pv_monthly_sim = summary["pv_monthly"]
+cons_monthly_sim = summary["cons_monthly"]
+ac_direct_monthly = summary["ac_direct_monthly"]
+ac_batt_monthly = summary["ac_batt_monthly"]
+ac_total_monthly = summary["ac_total_monthly"]
+
+pv_year = summary["pv_year"]
+cons_year = summary["cons_year"]
+ac_batt_year = summary["ac_batt_year"]
+taux_auto = summary["taux_auto"]
+taux_couv = summary["taux_couv"]
 
 # ----------------------------------------------------
 # EN-TÊTE / METRICS
@@ -653,7 +688,7 @@ with col3:
     st.metric("Taux couverture", f"{taux_couv:.1f} %")
 
 with col4:
-    st.metric("Onduleur choisi", inverter_id)
+    st.metric("Onduleur choisi", combination["label"] if combination is not None else inverter_id)
     st.metric("Ratio DC/AC réel", f"{ratio_dc_ac:.2f}")
     if battery_enabled and battery_kwh > 0:
         st.metric("Autocons. via batterie", f"{ac_batt_year:.0f} kWh")
@@ -675,19 +710,28 @@ if opt_result["N_used"] < int(n_modules):
 # ----------------------------------------------------
 st.markdown("## 🔌 Câblage des strings")
 
-strings = opt_result["strings"]
-cols_strings = st.columns(len(strings))
-
-for i, s in enumerate(strings):
-    with cols_strings[i]:
-        if s > 0:
-            st.metric(
-                label=f"MPPT {i+1}",
-                value=f"{s} modules",
-                delta=f"{s * panel_elec['Vmp']:.0f} V"
-            )
-        else:
-            st.metric(label=f"MPPT {i+1}", value="Non utilisé")
+if combination is not None:
+    wiring_units = [(f"Onduleur {j+1} – {u['inv_id']}", u["opt"]) for j, u in enumerate(combination["units"])]
+else:
+    wiring_units = [(None, opt_result)]
+
+for unit_label, unit_wiring in wiring_units:
+    if unit_label:
+        st.markdown(f"**{unit_label}**")
+    strings = unit_wiring["strings"]
+    parallel = unit_wiring.get("parallel") or [1] * len(strings)
+    cols_strings = st.columns(len(strings))
+
+    for i, (s, k) in enumerate(zip(strings, parallel)):
+        with cols_strings[i]:
+            if s > 0:
+                st.metric(
+                    label=f"MPPT {i+1}",
+                    value=f"{k} × {s} modules" if k > 1 else f"{s} modules",
+                    delta=f"{s * panel_elec['Vmp']:.0f} V · {k * panel_elec['Isc']:.1f} A"
+                )
+            else:
+                st.metric(label=f"MPPT {i+1}", value="Non utilisé")
 
 # ----------------------------------------------------
 # PROFIL MENSUEL
@@ -695,7 +739,7 @@ for i, s in enumerate(strings):
 st.markdown("## 📊 Production vs Consommation – Profil mensuel")
 
 df_month = pd.DataFrame({
-    "Mois": months_labels,
+    "Mois": MONTH_LABELS,
     "Consommation (kWh)": cons_monthly_sim,
     "Production PV (kWh)": pv_monthly_sim,
     "Autocons. directe (kWh)": ac_direct_monthly,
@@ -703,52 +747,372 @@ df_month = pd.DataFrame({
     "Autocons. totale (kWh)": ac_total_monthly,
 })
 
-fig = px.bar(
-    df_month,
-    x="Mois",
-    y=["Consommation (kWh)", "Production PV (kWh)", "Autocons. totale (kWh)"],
-    barmode="group",
-    labels={"value": "kWh", "variable": ""},
-)
-st.plotly_chart(fig, use_container_width=True)
+with span("Graphiques"):
+    fig = px.bar(
+        df_month,
+        x="Mois",
+        y=["Consommation (kWh)", "Production PV (kWh)", "Autocons. totale (kWh)"],
+        barmode="group",
+        labels={"value": "kWh", "variable": ""},
+    )
+    st.plotly_chart(fig, use_container_width=True)
 st.dataframe(df_month)
 
+# ----------------------------------------------------
+# PERTES TEMPÉRATURE ET ÉCRÊTAGE
+# ----------------------------------------------------
+if pv_losses:
+    st.markdown("## 🌡️ Pertes température et écrêtage")
+
+    temperature_loss_monthly = monthly_totals(temperature_loss_h, step_minutes)
+    clipping_monthly = monthly_totals(clipping_h, step_minutes)
+    pv_before_losses = pv_year + temperature_loss_monthly.sum() + clipping_monthly.sum()
+
+    col_l1, col_l2, col_l3 = st.columns(3)
+    with col_l1:
+        st.metric("Production avant pertes", f"{pv_before_losses:.0f} kWh")
+    with col_l2:
+        st.metric(
+            "Pertes température",
+            f"{temperature_loss_monthly.sum():.0f} kWh",
+            f"{-temperature_loss_monthly.sum() / pv_before_losses * 100:.1f} %" if pv_before_losses > 0 else None,
+        )
+    with col_l3:
+        st.metric(
+            "Pertes écrêtage (P_ac)",
+            f"{clipping_monthly.sum():.0f} kWh",
+            f"{-clipping_monthly.sum() / pv_before_losses * 100:.1f} %" if pv_before_losses > 0 else None,
+        )
+
+    df_losses = pd.DataFrame({
+        "Mois": MONTH_LABELS,
+        "Pertes température (kWh)": temperature_loss_monthly,
+        "Écrêtage (kWh)": clipping_monthly,
+    })
+    with span("Graphiques"):
+        fig_losses = px.bar(
+            df_losses,
+            x="Mois",
+            y=["Pertes température (kWh)", "Écrêtage (kWh)"],
+            barmode="group",
+            labels={"value": "kWh", "variable": ""},
+        )
+        st.plotly_chart(fig_losses, use_container_width=True)
+
 # ----------------------------------------------------
 # PROFIL HORAIRE – JOUR TYPE (MOYEN SUR LE MOIS CHOISI)
 # ----------------------------------------------------
 st.markdown("## 🕒 Profil horaire – jour type (moyenne sur le mois)")
 
-idx = month_for_hours - 1
-start_h = sum(hours_per_month[:idx])
-end_h = start_h + hours_per_month[idx]
-days_sel = hours_per_month[idx] // 24
-
-pv_block = pv_hourly[start_h:end_h].reshape((days_sel, 24))
-cons_block = cons_hourly[start_h:end_h].reshape((days_sel, 24))
-ac_dir_block = ac_direct_h[start_h:end_h].reshape((days_sel, 24))
-ac_batt_block = ac_batt_h[start_h:end_h].reshape((days_sel, 24))
+# Jours types des 12 mois calculés en une fois (le curseur de mois ne fait
+# qu'indexer), exprimés en puissance moyenne (kW = kWh par heure)
+grid = time_grid(step_minutes)
+pv_days, cons_days, ac_total_days = get_typical_days(
+    flows_key,
+    float(battery_kwh) if battery_enabled else 0.0,
+    step_minutes,
+    (pv_hourly, cons_hourly, ac_direct_h + ac_batt_h),
+) * grid.steps_per_hour
 
-pv_day = pv_block.mean(axis=0)
-cons_day = cons_block.mean(axis=0)
-ac_total_day = (ac_dir_block + ac_batt_block).mean(axis=0)
+idx = month_for_hours - 1
+pv_day = pv_days[idx]
+cons_day = cons_days[idx]
+ac_total_day = ac_total_days[idx]
 
 df_hour = pd.DataFrame({
-    "Heure": np.arange(24),
-    "Consommation (kWh)": cons_day,
-    "Production PV (kWh)": pv_day,
-    "Autoconsommation (kWh)": ac_total_day,
+    "Heure": grid.hour_of_day[:grid.steps_per_day],
+    "Consommation (kW)": cons_day,
+    "Production PV (kW)": pv_day,
+    "Autoconsommation (kW)": ac_total_day,
 })
 
-fig2 = px.line(
-    df_hour,
-    x="Heure",
-    y=["Consommation (kWh)", "Production PV (kWh)", "Autoconsommation (kWh)"],
-    markers=True,
-    labels={"value": "kWh", "variable": ""},
-)
-st.plotly_chart(fig2, use_container_width=True)
+with span("Graphiques"):
+    fig2 = px.line(
+        df_hour,
+        x="Heure",
+        y=["Consommation (kW)", "Production PV (kW)", "Autoconsommation (kW)"],
+        markers=True,
+        labels={"value": "kW", "variable": ""},
+    )
+    st.plotly_chart(fig2, use_container_width=True)
 st.dataframe(df_hour)
 
+# ----------------------------------------------------
+# 🔋 DIMENSIONNEMENT BATTERIE – COURBE D'AUTOCONSOMMATION
+# ----------------------------------------------------
+st.markdown("## 🔋 Dimensionnement batterie – autoconsommation selon la capacité")
+
+battery_combos = battery_module_combinations(BATTERIES, max_kwh=50.0)
+curve_capacities = sorted(
+    set(np.arange(0.0, 50.0 + 1e-9, 1.0).tolist())
+    | {c["capacity_kwh"] for c in battery_combos}
+)
+curve = get_battery_sizing_curve(
+    profile_key,
+    pv_hourly,
+    cons_hourly,
+    tuple(curve_capacities),
+    step_minutes,
+)
+
+df_curve = pd.DataFrame({
+    "Capacité (kWh)": curve["capacity_kwh"],
+    "Taux autocons. (%)": curve["taux_auto"],
+    "Taux couverture (%)": curve["taux_couv"],
+    "Import réseau (kWh)": curve["import_kwh"],
+    "Export réseau (kWh)": curve["export_kwh"],
+}).set_index("Capacité (kWh)")
+
+knee_idx = knee_point(curve["capacity_kwh"], curve["taux_auto"])
+knee_kwh = float(curve["capacity_kwh"][knee_idx])
+
+# Recommandation : la plus petite combinaison du catalogue couvrant le coude
+recommended = next(
+    (c for c in battery_combos if c["capacity_kwh"] >= knee_kwh),
+    battery_combos[-1] if battery_combos else None,
+)
+
+with span("Graphiques"):
+    fig_curve = px.line(
+        df_curve.reset_index(),
+        x="Capacité (kWh)",
+        y=["Taux autocons. (%)", "Taux couverture (%)"],
+        labels={"value": "%", "variable": ""},
+    )
+    df_combos = pd.DataFrame([
+        {
+            "Combinaison": c["label"],
+            "Capacité (kWh)": c["capacity_kwh"],
+            **df_curve.loc[c["capacity_kwh"]].to_dict(),
+        }
+        for c in battery_combos
+    ])
+    if not df_combos.empty:
+        fig_curve.add_scatter(
+            x=df_combos["Capacité (kWh)"],
+            y=df_combos["Taux autocons. (%)"],
+            mode="markers",
+            name="Combinaisons Sigen",
+            text=df_combos["Combinaison"],
+        )
+    fig_curve.add_vline(
+        x=knee_kwh,
+        line_dash="dash",
+        annotation_text=f"Coude ≈ {knee_kwh:.0f} kWh",
+    )
+    st.plotly_chart(fig_curve, use_container_width=True)
+
+if recommended is not None:
+    rec = df_curve.loc[recommended["capacity_kwh"]]
+    st.info(
+        f"Recommandation : {recommended['label']} ({recommended['capacity_kwh']:.0f} kWh) – "
+        f"taux d'autoconsommation {rec['Taux autocons. (%)']:.1f} %, "
+        f"couverture {rec['Taux couverture (%)']:.1f} %. "
+        f"Au-delà de ~{knee_kwh:.0f} kWh, chaque kWh supplémentaire apporte peu."
+    )
+
+st.dataframe(df_combos)
+
+# ----------------------------------------------------
+# 📈 SIMULATION SUR LA DURÉE DE VIE
+# ----------------------------------------------------
+st.markdown("## 📈 Simulation sur la durée de vie")
+
+run_lifetime = st.checkbox("Simuler la durée de vie (dégradation panneaux, vieillissement batterie)", value=False)
+
+if run_lifetime:
+    col_life1, col_life2, col_life3 = st.columns(3)
+    with col_life1:
+        lifetime_years = st.slider("Durée (années)", 10, 30, 25)
+    with col_life2:
+        panel_degradation_pct = st.number_input(
+            "Dégradation panneaux (%/an)", min_value=0.0, max_value=2.0, value=0.5, step=0.05
+        )
+    with col_life3:
+        cycle_fade_pct = st.number_input(
+            "Perte capacité batterie (% / 1000 cycles)", min_value=0.0, max_value=20.0, value=5.0, step=0.5
+        )
+
+    lifetime = get_lifetime(
+        profile_key,
+        pv_hourly,
+        cons_hourly,
+        float(battery_kwh) if battery_enabled else 0.0,
+        int(lifetime_years),
+        panel_degradation_pct / 100.0,
+        cycle_fade_pct / 100.0 / 1000.0,
+        step_minutes,
+        dispatch,
+        tuple(sorted(dispatch_options.items())),
+        tuple(sorted(tariff.items())),
+    )
+
+    df_life = pd.DataFrame({
+        "Année": lifetime["year"],
+        "Prod PV (kWh)": lifetime["pv_year"],
+        "Taux autocons. (%)": lifetime["taux_auto"],
+        "Taux couverture (%)": lifetime["taux_couv"],
+        "Import réseau (kWh)": lifetime["import_year"],
+        "Export réseau (kWh)": lifetime["export_year"],
+        "SOH batterie (%)": lifetime["battery_soh"] * 100,
+        "Cycles batterie": lifetime["battery_cycles"],
+    }).set_index("Année")
+
+    with span("Graphiques"):
+        life_columns = ["Taux autocons. (%)", "Taux couverture (%)"]
+        if battery_enabled and battery_kwh > 0:
+            life_columns.append("SOH batterie (%)")
+        fig_life = px.line(
+            df_life.reset_index(),
+            x="Année",
+            y=life_columns,
+            labels={"value": "%", "variable": ""},
+        )
+        st.plotly_chart(fig_life, use_container_width=True)
+
+    st.dataframe(df_life.round(1))
+
+# ----------------------------------------------------
+# 💶 BILAN FINANCIER
+# ----------------------------------------------------
+st.markdown("## 💶 Bilan financier")
+
+with st.expander("Coûts d'investissement (tarifs : barre latérale)"):
+    col_t1, col_t2, col_t3 = st.columns(3)
+    with col_t1:
+        eur_per_wp = st.number_input("Coût PV (€/Wc)", 0.0, 5.0, DEFAULT_COSTS["eur_per_wp"], 0.05)
+    with col_t2:
+        eur_per_kwh_batt = st.number_input(
+            "Coût batterie (€/kWh)", 0.0, 2000.0, DEFAULT_COSTS["eur_per_kwh_battery"], 10.0
+        )
+    with col_t3:
+        fixed_costs = st.number_input("Frais fixes (€)", 0.0, 10000.0, DEFAULT_COSTS["fixed_eur"], 100.0)
+
+costs = {"eur_per_wp": eur_per_wp, "eur_per_kwh_battery": eur_per_kwh_batt, "fixed_eur": fixed_costs}
+investment = float(installation_cost(P_dc, float(battery_kwh) if battery_enabled else 0.0, costs))
+finance = get_financial_summary(
+    flows_key,
+    float(battery_kwh) if battery_enabled else 0.0,
+    step_minutes,
+    tuple(sorted(tariff.items())),
+    investment,
+    cons_hourly,
+    import_h,
+    export_h,
+)
+
+col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+with col_f1:
+    st.metric("Investissement estimé", f"{investment:,.0f} €".replace(",", " "))
+with col_f2:
+    st.metric("Facture sans installation", f"{finance['bill_reference']['total']:,.0f} €/an".replace(",", " "))
+with col_f3:
+    st.metric(
+        "Facture avec installation",
+        f"{finance['bill']['total']:,.0f} €/an".replace(",", " "),
+        delta=f"{-finance['annual_savings']:,.0f} €/an".replace(",", " "),
+        delta_color="inverse",
+    )
+with col_f4:
+    payback = float(finance["payback_years"])
+    st.metric("Temps de retour", f"{payback:.1f} ans" if np.isfinite(payback) else "> 25 ans")
+
+bill_rows = [
+    ("Import heures pleines", "import_peak_kwh", "kWh"),
+    ("Import heures creuses", "import_offpeak_kwh", "kWh"),
+    ("Injection", "export_kwh", "kWh"),
+    ("Coût import", "import_cost", "€"),
+    ("Tarif capacitaire", "capacity_cost", "€"),
+    ("Revenu injection", "export_revenue", "€"),
+    ("Total", "total", "€"),
+]
+df_bill = pd.DataFrame({
+    "Poste": [f"{label} ({unit})" for label, _, unit in bill_rows],
+    "Sans installation": [float(finance["bill_reference"][key]) for _, key, _ in bill_rows],
+    "Avec installation": [float(finance["bill"][key]) for _, key, _ in bill_rows],
+}).set_index("Poste")
+st.dataframe(df_bill.round(1))
+
+df_peaks = pd.DataFrame({
+    "Mois": MONTH_LABELS,
+    "Sans installation": finance["bill_reference"]["monthly_peak_kw"],
+    "Avec installation": finance["bill"]["monthly_peak_kw"],
+})
+with span("Graphiques"):
+    fig_peaks = px.bar(
+        df_peaks,
+        x="Mois",
+        y=["Sans installation", "Avec installation"],
+        barmode="group",
+        labels={"value": "Pointe mensuelle (kW)", "variable": ""},
+    )
+    st.plotly_chart(fig_peaks, use_container_width=True)
+
+# ----------------------------------------------------
+# 🧭 EXPLORATION DES CONFIGURATIONS (FRONT DE PARETO)
+# ----------------------------------------------------
+st.markdown("## 🧭 Exploration des configurations")
+
+col_x1, col_x2 = st.columns(2)
+with col_x1:
+    explore_range = st.slider("Nombre de panneaux (plage)", 3, 60, (6, 30))
+with col_x2:
+    explore_max_kwh = st.slider("Capacité batterie max (kWh)", 0.0, 50.0, 30.0, 1.0)
+run_explorer = st.checkbox("Explorer toutes les combinaisons panneaux × onduleur × batterie", value=False)
+
+if run_explorer:
+    explore_capacities = [0.0] + [
+        c["capacity_kwh"] for c in battery_module_combinations(BATTERIES, max_kwh=explore_max_kwh)
+    ]
+    space = get_design_space(
+        profile_hash(cons_hourly),
+        cons_hourly,
+        panel_id,
+        tuple(int(n) for n in explore_range),
+        tuple(explore_capacities),
+        grid_type,
+        fam_pref,
+        float(max_dc_ac),
+        float(t_min),
+        float(t_max),
+        tuple(sorted(costs.items())),
+        tuple(sorted(tariff.items())),
+        step_minutes,
+        pv_losses,
+    )
+    df_space = pd.DataFrame({
+        "Panneaux": space["n_modules"],
+        "Onduleur": space["inverter_id"],
+        "Strings": space["strings"],
+        "P_dc (Wc)": space["P_dc"],
+        "Batterie (kWh)": space["battery_kwh"],
+        "Coût (€)": space["cost"],
+        "Taux autocons. (%)": space["taux_auto"],
+        "Taux couverture (%)": space["taux_couv"],
+        "Économies (€/an)": space["annual_savings"],
+        "Retour (ans)": space["payback_years"],
+        "Pareto": np.where(space["pareto"], "Front de Pareto", "Dominé"),
+    })
+    st.caption(
+        f"{space['stats']['designs']} câblages retenus, {space['stats']['candidates']} configurations, "
+        f"{space['stats']['simulated']} simulations ; {int(space['pareto'].sum())} sur le front de Pareto."
+    )
+    with span("Graphiques"):
+        fig_space = px.scatter(
+            df_space,
+            x="Coût (€)",
+            y="Taux couverture (%)",
+            color="Taux autocons. (%)",
+            symbol="Pareto",
+            symbol_map={"Front de Pareto": "circle", "Dominé": "x"},
+            hover_data=["Panneaux", "Onduleur", "Strings", "Batterie (kWh)", "Économies (€/an)", "Retour (ans)"],
+        )
+        st.plotly_chart(fig_space, use_container_width=True)
+    st.dataframe(
+        df_space[space["pareto"]].drop(columns="Pareto").sort_values("Coût (€)").round(2),
+        use_container_width=True,
+    )
+
 # ----------------------------------------------------
 # EXPORT EXCEL
 # ----------------------------------------------------
@@ -761,19 +1125,72 @@ config = {
     "battery_enabled": battery_enabled,
     "battery_kwh": float(battery_kwh),
     "max_dc_ac": float(max_dc_ac),
-    "annual_consumption": float(annual_consumption),
+    "annual_consumption": float(cons_year) if meter is not None else float(annual_consumption),
     "consumption_profile": consumption_profile,
     "t_min": float(t_min),
     "t_max": float(t_max),
+    "step_minutes": int(step_minutes),
     "n_series": int(opt_result["N_series_main"]),
     "inverter_id": inverter_id,
+    "inverter_combination": combination["label"] if combination is not None else "",
 }
 
+include_hourly = st.checkbox("Inclure les résultats horaires (feuille « Horaire », 8760 h)", value=True)
+
 if st.button("Générer l’Excel"):
-    xlsx_bytes = generate_workbook_bytes(config)
+    hourly_results = {
+        "pv_hourly": pv_hourly,
+        "cons_hourly": cons_hourly,
+        "ac_direct": ac_direct_h,
+        "ac_batt": ac_batt_h,
+        "soc": soc,
+        "grid_import": import_h,
+        "grid_export": export_h,
+    } if include_hourly else None
+    with span("Export Excel"):
+        xlsx_bytes = cached_workbook_bytes(get_workbook_cache(), config, hourly_results)
     st.download_button(
         "Télécharger le fichier Excel",
         data=xlsx_bytes,
         file_name="Dimensionnement_Sigen_Complet.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
+
+# ----------------------------------------------------
+# DEBUG – CACHE DES ÉTAPES
+# ----------------------------------------------------
+with st.expander("Cache des calculs (debug)"):
+    st.dataframe(pd.DataFrame([
+        {
+            "Étape": stage,
+            "Appels": c["calls"],
+            "Hits": c["calls"] - c["misses"],
+            "Misses": c["misses"],
+        }
+        for stage, c in get_cache_stats().items()
+    ]))
+    st.caption(
+        "Classeurs Excel : "
+        + ", ".join(f"{k} = {v}" for k, v in get_workbook_cache().stats.items())
+    )
+
+# ----------------------------------------------------
+# PERFORMANCE – DURÉES PAR ÉTAPE
+# ----------------------------------------------------
+with st.expander("Performance"):
+    perf_report = perf.as_dict()
+    df_perf = (
+        pd.DataFrame(perf_report["spans"], columns=["stage", "depth", "ms"])
+        .groupby("stage", sort=False)["ms"]
+        .agg(["count", "sum"])
+        .reset_index()
+        .rename(columns={"stage": "Étape", "count": "Appels", "sum": "Durée (ms)"})
+    )
+    st.metric("Durée totale du rerun", f"{perf_report['total_ms']:.0f} ms")
+    st.dataframe(df_perf.round({"Durée (ms)": 2}))
+    if perf_report["counters"]:
+        st.dataframe(pd.DataFrame(
+            [{"Compteur": k, "Valeur": v} for k, v in perf_report["counters"].items()]
+        ))
+
+log_recording(perf, panel_id=panel_id, n_modules=int(n_modules), inverter_id=inverter_id)
@@ -0,0 +1,287 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from excel_generator import generate_workbook_bytes
+from sizing_engine import (
+    generate_consumption_hourly,
+    generate_pv_profile_hourly,
+    get_inverter_elec,
+    get_panel_elec,
+    hourly_profile,
+    monthly_consumption_profile,
+    monthly_pv_profile_kwh_kwp,
+    optimize_strings,
+    optimize_strings_table,
+    select_best_inverter,
+    simulate_battery_fast,
+    simulate_battery_hourly,
+    simulate_dispatch,
+    size_installation,
+)
+
+
+# ----------------------------------------------------
+# CAS DE MESURE
+# ----------------------------------------------------
+def _hourly_inputs():
+    pv_hourly = generate_pv_profile_hourly(monthly_pv_profile_kwh_kwp() * 10.0)
+    cons_hourly = generate_consumption_hourly(
+        monthly_consumption_profile(3500.0, "Standard"),
+        hourly_profile("Classique (matin + soir)"),
+    )
+    return pv_hourly, cons_hourly
+
+
+def build_cases(include_reference: bool = False):
+    """Cas représentatifs : {nom: fonction sans argument}."""
+    solux = get_panel_elec("Solux415")
+    trina = get_panel_elec("Trina450")
+    tetra = get_inverter_elec("Store30.0Tetra")
+    pv_hourly, cons_hourly = _hourly_inputs()
+    pv_quarter = generate_pv_profile_hourly(monthly_pv_profile_kwh_kwp() * 10.0, step_minutes=15)
+    cons_quarter = generate_consumption_hourly(
+        monthly_consumption_profile(3500.0, "Standard"),
+        hourly_profile("Classique (matin + soir)"),
+        step_minutes=15,
+    )
+    pv_monthly = monthly_pv_profile_kwh_kwp() * 10.0
+    cons_monthly = monthly_consumption_profile(3500.0, "Standard")
+    cons_frac = hourly_profile("Classique (matin + soir)")
+
+    config = {
+        "panel_id": "Trina450",
+        "n_modules": 24,
+        "grid_type": "Tri 3x400",
+        "battery_enabled": True,
+        "battery_kwh": 10.0,
+        "max_dc_ac": 1.35,
+        "annual_consumption": 3500.0,
+        "consumption_profile": "Standard",
+        "t_min": -10.0,
+        "t_max": 70.0,
+        "n_series": 12,
+        "inverter_id": "Store10.0Tetra",
+    }
+    hourly_results = size_installation(config)
+
+    # Panneau fictif à faible courant : jusqu'à 4 strings en parallèle par MPPT
+    low_current = {**solux, "Isc": solux["Isc"] / 4.0}
+
+    cases = {
+        "optimize_strings.tetra4_solux_n100": lambda: optimize_strings(100, solux, tetra, -10.0, 70.0),
+        "optimize_strings.tetra4_solux_n64": lambda: optimize_strings(64, solux, tetra, -20.0, 85.0),
+        "optimize_strings.tetra4_parallel_n100": lambda: optimize_strings(100, low_current, tetra, -10.0, 70.0),
+        "optimize_strings_table.tetra4_parallel_n100": lambda: optimize_strings_table(
+            low_current, tetra, -10.0, 70.0
+        ),
+        "select_best_inverter.auto_tri400_n40": lambda: select_best_inverter(
+            trina, 40, "Tri 3x400", 1.35, None, -10.0, 70.0
+        ),
+        "select_best_inverter.auto_mono_n12": lambda: select_best_inverter(
+            trina, 12, "Mono", 1.35, None, -10.0, 70.0
+        ),
+        "simulate_battery_hourly.8760h_10kwh": lambda: simulate_battery_hourly(pv_hourly, cons_hourly, 10.0),
+        "simulate_battery_fast.8760h_10kwh": lambda: simulate_battery_fast(pv_hourly, cons_hourly, 10.0),
+        "simulate_battery_fast.35040q_10kwh": lambda: simulate_battery_fast(
+            pv_quarter, cons_quarter, 10.0, step_hours=0.25
+        ),
+        "simulate_dispatch.peak_shaving_8760h_10kwh": lambda: simulate_dispatch(
+            pv_hourly, cons_hourly, 10.0, "peak_shaving"
+        ),
+        "simulate_dispatch.cost_optimal_8760h_10kwh": lambda: simulate_dispatch(
+            pv_hourly, cons_hourly, 10.0, "cost_optimal"
+        ),
+        "generate_pv_profile_hourly.8760h": lambda: generate_pv_profile_hourly(pv_monthly),
+        "generate_consumption_hourly.8760h": lambda: generate_consumption_hourly(cons_monthly, cons_frac),
+        "generate_workbook_bytes.default": lambda: generate_workbook_bytes(config),
+        "generate_workbook_bytes.hourly_streaming": lambda: generate_workbook_bytes(config, hourly_results),
+    }
+    if include_reference:
+        cases["optimize_strings.tetra4_solux_n100_exhaustive"] = lambda: optimize_strings(
+            100, solux, tetra, -10.0, 70.0, method="exhaustive"
+        )
+    return cases
+
+
+# ----------------------------------------------------
+# CONTRÔLES DE COHÉRENCE
+# ----------------------------------------------------
+def _stored_pv(pv, cons, soc, charge_eff=0.95):
+    """Énergie PV stockée (avant rendement) : hausse du SOC aux pas de surplus."""
+    rise = np.diff(np.concatenate(([0.0], soc))) / charge_eff
+    return np.where(pv > cons, rise, 0.0)
+
+
+def build_checks():
+    """Contrôles : {nom: fonction sans argument renvoyant l'écart maximal (kWh)}."""
+    pv_hourly, cons_hourly = _hourly_inputs()
+
+    def greedy_vs_reference():
+        fast = simulate_dispatch(pv_hourly, cons_hourly, 10.0, "greedy")
+        ref = simulate_battery_hourly(pv_hourly, cons_hourly, 10.0)
+        # L'export du glouton suit le bilan des autres pilotages (pas la référence)
+        return max(np.abs(fast[i] - ref[i]).max() for i in (0, 1, 2, 4))
+
+    def peak_shaving_zero_is_greedy():
+        greedy = simulate_dispatch(pv_hourly, cons_hourly, 10.0, "greedy")
+        shaved = simulate_dispatch(
+            pv_hourly, cons_hourly, 10.0, "peak_shaving", peak_threshold_kw=0.0, grid_charging=False
+        )
+        return max(np.abs(a - b).max() for a, b in zip(greedy, shaved))
+
+    def energy_balance(strategy):
+        def check():
+            soc, ac_direct, _, grid_export, _ = simulate_dispatch(pv_hourly, cons_hourly, 10.0, strategy)
+            stored = _stored_pv(pv_hourly, cons_hourly, soc)
+            return np.abs(pv_hourly - ac_direct - stored - grid_export).max()
+        return check
+
+    checks = {
+        "greedy.matches_simulate_battery_hourly": greedy_vs_reference,
+        "peak_shaving.threshold0_no_grid_is_greedy": peak_shaving_zero_is_greedy,
+    }
+    for strategy in ("greedy", "peak_shaving", "cost_optimal"):
+        checks[f"{strategy}.pv_balance"] = energy_balance(strategy)
+    return checks
+
+
+def run_checks(tol: float = 1e-9) -> list:
+    """Lance les contrôles ; renvoie les noms de ceux dont l'écart dépasse tol."""
+    failed = []
+    for name, func in build_checks().items():
+        deviation = func()
+        flag = "" if deviation <= tol else "  <-- échec"
+        print(f"{name:<52} {deviation:10.2e} kWh{flag}", file=sys.stderr)
+        if deviation > tol:
+            failed.append(name)
+    return failed
+
+
+# ----------------------------------------------------
+# MESURE
+# ----------------------------------------------------
+def time_case(func, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Temps par appel (s) : chaque répétition enchaîne assez d'appels pour durer
+    au moins min_time. On garde min / médiane / moyenne sur les répétitions.
+    """
+    func()  # échauffement (imports, caches)
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    per_call = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number)
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_s": min(per_call),
+        "median_s": statistics.median(per_call),
+        "mean_s": statistics.fmean(per_call),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(filter_text: str = "", repeat: int = 5, min_time: float = 0.2, include_reference: bool = False) -> dict:
+    results = {}
+    for name, func in build_cases(include_reference).items():
+        if filter_text and filter_text not in name:
+            continue
+        results[name] = time_case(func, repeat=repeat, min_time=min_time)
+        print(f"{name:<52} {results[name]['min_s'] * 1e3:10.3f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Cas dont le temps min dépasse threshold × celui de la référence."""
+    regressions = []
+    print(f"{'cas':<52} {'réf. ms':>10} {'ms':>10} {'ratio':>7}", file=sys.stderr)
+    for name, res in current["results"].items():
+        ref = baseline["results"].get(name)
+        if ref is None:
+            continue
+        ratio = res["min_s"] / ref["min_s"] if ref["min_s"] > 0 else float("inf")
+        flag = "  <-- régression" if ratio > threshold else ""
+        print(
+            f"{name:<52} {ref['min_s'] * 1e3:10.3f} {res['min_s'] * 1e3:10.3f} {ratio:7.2f}{flag}",
+            file=sys.stderr,
+        )
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmarks du câblage, de la simulation horaire et de l'export Excel.",
+    )
+    parser.add_argument("-o", "--output", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio de régression toléré (défaut 1.25)")
+    parser.add_argument("-k", "--filter", default="", help="ne lancer que les cas contenant ce texte")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="durée minimale d'une répétition (s)")
+    parser.add_argument("--reference", action="store_true", help="inclure le moteur de câblage exhaustif (lent)")
+    parser.add_argument("--check", action="store_true", help="lancer les contrôles de cohérence au lieu des mesures")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if run_checks() else 0
+
+    current = run(args.filter, args.repeat, args.min_time, args.reference)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,85 +1,31 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 from io import BytesIO
+
+import numpy as np
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
+from sizing_engine.catalog import CATALOG_VERSION, get_catalog
+from sizing_engine.profiles import profile_hash
+from sizing_engine.timegrid import MONTH_LABELS, time_grid
 
-def get_catalog():
-    # ----------------------------------------------------
-    # PANNEAUX
-    # ----------------------------------------------------
-    panels = [
-        ["Trina450", 450, 52.9, 44.6, 10.74, 10.09, -0.24],
-        ["Trina500", 500, 40.1, 38.3, 15.03, 12.18, -0.24],
-        ["Trina505", 505, 51.7, 43.7, 12.13, 11.56, -0.25],
-        ["Solux415", 415, 37.95, 31.83, 13.77, 13.04, -0.28],
-        ["Solux420", 420, 38.14, 32.02, 13.85, 13.12, -0.28],
-        ["Solux425", 425, 38.32, 32.20, 13.93, 13.20, -0.28],
-    ]
-
-    # ----------------------------------------------------
-    # SIGENERGY — ONDULEURS COMPLETS CORRIGÉS
-    # Format :
-    # (ID, P_AC_nom, P_DC_max, V_MPP_min, V_MPP_max, V_DC_max,
-    #  I_MPPT, Nb_MPPT, Type_reseau, Famille, V_nom_dc)
-    # ----------------------------------------------------
-
-    inverters = [
-        # --- MONO Hybride ---
-        ("Hybride2.0Mono", 2000, 4000, 50, 550, 600, 16, 2, "Mono", "Hybride", 350),
-        ("Hybride3.0Mono", 3000, 6000, 50, 550, 600, 16, 2, "Mono", "Hybride", 350),
-        ("Hybride6.0Mono", 6000, 12000, 50, 550, 600, 16, 2, "Mono", "Hybride", 350),
-
-        # --- MONO Store ---
-        ("Store3.0Mono", 3000, 6000, 50, 550, 600, 16, 2, "Mono", "Store", 350),
-        ("Store3.6Mono", 3680, 7360, 50, 550, 600, 16, 2, "Mono", "Store", 350),
-        ("Store4.0Mono", 4000, 8000, 50, 550, 600, 16, 2, "Mono", "Store", 350),
-        ("Store4.6Mono", 4600, 9200, 50, 550, 600, 16, 2, "Mono", "Store", 350),
-        ("Store6.0Mono", 6000, 12000, 50, 550, 600, 16, 2, "Mono", "Store", 350),
-        ("Store8.0Mono", 8000, 16000, 50, 550, 600, 16, 3, "Mono", "Store", 350),
-        ("Store10.0Mono", 10000, 20000, 50, 550, 600, 16, 4, "Mono", "Store", 350),
-        ("Store12.0Mono", 12000, 24000, 50, 550, 600, 16, 4, "Mono", "Store", 350),
-
-        # --- TRI 3x230 Hybride ---
-        ("Hybride3.0Delta", 3000, 6000, 50, 550, 600, 16, 2, "Tri 3x230", "Hybride", 360),
-        ("Hybride5.0Delta", 5000, 10000, 50, 550, 600, 16, 2, "Tri 3x230", "Hybride", 360),
-        ("Hybride6.0Delta", 6000, 12000, 50, 550, 600, 16, 3, "Tri 3x230", "Hybride", 360),
-        ("Hybride8.0Delta", 8000, 16000, 50, 550, 600, 16, 3, "Tri 3x230", "Hybride", 360),
-        ("Hybride10.0Delta", 10000, 20000, 50, 550, 600, 16, 4, "Tri 3x230", "Hybride", 360),
-
-        # --- TRI 3x230 Store ---
-        ("Store6.0Delta", 6000, 12000, 50, 550, 600, 16, 2, "Tri 3x230", "Store", 360),
-        ("Store8.0Delta", 8000, 16000, 50, 550, 600, 16, 3, "Tri 3x230", "Store", 360),
-
-        # --- TRI 3x400 Hybride (Haute tension) ---
-        ("Hybride3.0Tetra", 3000, 6000, 160, 1000, 1100, 16, 2, "Tri 3x400", "Hybride", 600),
-        ("Hybride5.0Tetra", 5000, 10000, 160, 1000, 1100, 16, 2, "Tri 3x400", "Hybride", 600),
-        ("Hybride6.0Tetra", 6000, 12000, 160, 1000, 1100, 16, 3, "Tri 3x400", "Hybride", 600),
-        ("Hybride8.0Tetra", 8000, 16000, 160, 1000, 1100, 16, 3, "Tri 3x400", "Hybride", 600),
-        ("Hybride10.0Tetra", 10000, 20000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Hybride", 600),
-        ("Hybride12.0Tetra", 12000, 24000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Hybride", 600),
-        ("Hybride15.0Tetra", 15000, 30000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Hybride", 600),
-
-        # --- TRI 3x400 Store (Haute tension) ---
-        ("Store5.0Tetra", 5000, 10000, 160, 1000, 1100, 16, 2, "Tri 3x400", "Store", 600),
-        ("Store6.0Tetra", 6000, 12000, 160, 1000, 1100, 16, 2, "Tri 3x400", "Store", 600),
-        ("Store8.0Tetra", 8000, 16000, 160, 1000, 1100, 16, 3, "Tri 3x400", "Store", 600),
-        ("Store10.0Tetra", 10000, 20000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-        ("Store15.0Tetra", 15000, 30000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-        ("Store17.0Tetra", 17000, 34000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-        ("Store20.0Tetra", 20000, 40000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-        ("Store25.0Tetra", 25000, 50000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-        ("Store30.0Tetra", 30000, 60000, 160, 1000, 1100, 16, 4, "Tri 3x400", "Store", 600),
-    ]
-
-    # ----------------------------------------------------
-    # BATTERIES
-    # ----------------------------------------------------
-    batteries = [
-        ["Sigen6", 6],
-        ["Sigen10", 10],
-    ]
 
-    return panels, inverters, batteries
+# Colonnes de la feuille "Horaire" : (en-tête, clé du résultat de simulation)
+HOURLY_COLUMNS = [
+    ("Prod_PV_kWh", "pv_hourly"),
+    ("Conso_kWh", "cons_hourly"),
+    ("Autocons_directe_kWh", "ac_direct"),
+    ("Autocons_batterie_kWh", "ac_batt"),
+    ("SOC_kWh", "soc"),
+    ("Import_kWh", "grid_import"),
+    ("Export_kWh", "grid_export"),
+]
 
 
 def _autofit(ws, width=16, max_col=20):
@@ -87,90 +33,90 @@ def _autofit(ws, width=16, max_col=20):
         ws.column_dimensions[get_column_letter(col)].width = width
 
 
-def generate_workbook_bytes(config: dict) -> bytes:
-    panels, inverters, batteries = get_catalog()
-    wb = Workbook()
-
-    # ---------------- CATALOGUE ----------------
-    ws_cat = wb.active
-    ws_cat.title = "Catalogue"
-
-    ws_cat.append(["Panneaux"])
-    ws_cat.append(["ID", "P_STC_W", "Voc", "Vmp", "Isc", "Imp", "alpha_V_%/°C"])
-    first_panel_row = ws_cat.max_row + 1
-    for p in panels:
-        ws_cat.append(p)
-    last_panel_row = ws_cat.max_row
-
-    ws_cat.append([""])
-    ws_cat.append(["Onduleurs"])
-    ws_cat.append([
-        "ID", "P_AC_nom", "P_DC_max", "V_MPP_min", "V_MPP_max",
-        "V_DC_max", "I_MPPT", "Nb_MPPT", "Type_reseau", "Famille"
-    ])
-    first_inv_row = ws_cat.max_row + 1
-    for inv in inverters:
-        ws_cat.append(list(inv))
-    last_inv_row = ws_cat.max_row
-
-    ws_cat.append([""])
-    ws_cat.append(["Batteries"])
-    ws_cat.append(["ID", "Cap_kWh"])
-    first_bat_row = ws_cat.max_row + 1
-    for b in batteries:
-        ws_cat.append(b)
-    last_bat_row = ws_cat.max_row
-
-    _autofit(ws_cat, max_col=10)
-
-    # ---------------- CHOIX ----------------
-    ws_ch = wb.create_sheet("Choix")
-
-    ws_ch["A1"] = "Panneau"
-    ws_ch["B1"] = config.get("panel_id", "")
-
-    ws_ch["A2"] = "Nombre modules"
-    ws_ch["B2"] = config.get("n_modules", 10)
-
-    ws_ch["A3"] = "Type réseau"
-    ws_ch["B3"] = config.get("grid_type", "")
-
-    ws_ch["A4"] = "Batterie ?"
-    ws_ch["B4"] = "Oui" if config.get("battery_enabled", False) else "Non"
-
-    ws_ch["A5"] = "Batterie (kWh)"
-    ws_ch["B5"] = config.get("battery_kwh", 0.0)
-
-    ws_ch["A6"] = "Ratio DC/AC max"
-    ws_ch["B6"] = config.get("max_dc_ac", 1.5)
-
-    ws_ch["A7"] = "Onduleur"
-    ws_ch["B7"] = config.get("inverter_id", "")
-
-    ws_ch["A9"] = "P_STC panneau"
-    ws_ch["B9"] = (
-        f"=IFERROR(VLOOKUP(B1,Catalogue!$A${first_panel_row}:$G${last_panel_row},2,FALSE),\"\")"
-    )
-
-    ws_ch["A10"] = "Puissance DC totale (W)"
-    ws_ch["B10"] = "=IF(B9<>\"\",B9*B2,\"\")"
-
-    _autofit(ws_ch, max_col=7)
-
-    # ---------------- PROFIL ----------------
-    ws_pr = wb.create_sheet("Profil")
-
-    ws_pr["A1"] = "Conso annuelle (kWh)"
-    ws_pr["B1"] = config.get("annual_consumption", 3500)
-
-    ws_pr["A2"] = "Profil conso"
-    ws_pr["B2"] = config.get("consumption_profile", "Standard")
+def _write_sheet(wb, title: str, rows, max_col: int):
+    """
+    Écrit les lignes dans une nouvelle feuille, par append uniquement :
+    compatible avec les classeurs normaux et write-only (streaming).
+    Les largeurs de colonnes sont fixées avant l'écriture des lignes.
+    """
+    ws = wb.create_sheet(title)
+    _autofit(ws, max_col=max_col)
+    for row in rows:
+        ws.append(row)
+    return ws
+
+
+# ----------------------------------------------------
+# CONTENU DES FEUILLES (LIGNES)
+# ----------------------------------------------------
+@functools.lru_cache(maxsize=4)
+def _catalog_sheet(catalog_version: str):
+    """
+    Feuille Catalogue pré-rendue une fois par version du catalogue :
+    lignes figées (tuples) et plages panneaux / onduleurs, réutilisées
+    par tous les classeurs.
+    """
+    rows, panel_rows, inv_rows = _catalog_rows(*get_catalog())
+    return tuple(tuple(r) for r in rows), panel_rows, inv_rows
+
+
+def _catalog_rows(panels, inverters, batteries):
+    """Lignes de la feuille Catalogue et plages (première, dernière ligne) par section."""
+    rows = [
+        ["Panneaux"],
+        ["ID", "P_STC_W", "Voc", "Vmp", "Isc", "Imp", "alpha_V_%/°C"],
+    ]
+    panel_rows = (len(rows) + 1, len(rows) + len(panels))
+    rows += [list(p) for p in panels]
+
+    rows += [
+        [""],
+        ["Onduleurs"],
+        [
+            "ID", "P_AC_nom", "P_DC_max", "V_MPP_min", "V_MPP_max",
+            "V_DC_max", "I_MPPT", "Nb_MPPT", "Type_reseau", "Famille"
+        ],
+    ]
+    inv_rows = (len(rows) + 1, len(rows) + len(inverters))
+    rows += [list(inv) for inv in inverters]
 
-    ws_pr.append([""])
-    ws_pr.append(["Mois", "%_conso", "Conso_kWh", "Prod_PV_kWh", "kWh_kWp_BEL", "Autocons_kWh"])
+    rows += [
+        [""],
+        ["Batteries"],
+        ["ID", "Cap_kWh"],
+    ]
+    rows += [list(b) for b in batteries]
+
+    return rows, panel_rows, inv_rows
+
+
+def _choix_rows(config: dict, panel_rows):
+    first_panel_row, last_panel_row = panel_rows
+    return [
+        ["Panneau", config.get("panel_id", "")],
+        ["Nombre modules", config.get("n_modules", 10)],
+        ["Type réseau", config.get("grid_type", "")],
+        ["Batterie ?", "Oui" if config.get("battery_enabled", False) else "Non"],
+        ["Batterie (kWh)", config.get("battery_kwh", 0.0)],
+        ["Ratio DC/AC max", config.get("max_dc_ac", 1.5)],
+        ["Onduleur", config.get("inverter_id", "")],
+        [],
+        [
+            "P_STC panneau",
+            f"=IFERROR(VLOOKUP(B1,Catalogue!$A${first_panel_row}:$G${last_panel_row},2,FALSE),\"\")",
+        ],
+        ["Puissance DC totale (W)", "=IF(B9<>\"\",B9*B2,\"\")"],
+    ] + ([["Combinaison onduleurs", config["inverter_combination"]]] if config.get("inverter_combination") else [])
+
+
+def _profil_rows(config: dict):
+    rows = [
+        ["Conso annuelle (kWh)", config.get("annual_consumption", 3500)],
+        ["Profil conso", config.get("consumption_profile", "Standard")],
+        [""],
+        ["Mois", "%_conso", "Conso_kWh", "Prod_PV_kWh", "kWh_kWp_BEL", "Autocons_kWh"],
+    ]
 
-    months = ["Jan", "Fév", "Mar", "Avr", "Mai", "Juin",
-              "Juil", "Août", "Sep", "Oct", "Nov", "Déc"]
     percent_std = [7, 7, 8, 9, 9, 9, 9, 9, 8, 8, 8, 9]
     percent_winter = [10, 10, 10, 9, 8, 7, 6, 6, 7, 8, 9, 10]
     percent_summer = [6, 6, 7, 8, 9, 10, 11, 11, 10, 8, 7, 7]
@@ -180,127 +126,250 @@ def generate_workbook_bytes(config: dict) -> bytes:
     kwh_kwp = [annual_kwh_kwp * d / 100.0 for d in distribution]
 
     start = 5
-    for i, m in enumerate(months):
+    for i, m in enumerate(MONTH_LABELS):
         r = start + i
-        ws_pr.cell(r, 1).value = m
         formula_pct = (
             '=CHOOSE(MATCH($B$2,{"Standard","Hiver fort","Été fort"},0),'
             f'{percent_std[i]},{percent_winter[i]},{percent_summer[i]})'
         )
-        ws_pr.cell(r, 2).value = formula_pct
-        ws_pr.cell(r, 3).value = f"=($B$1*B{r}/100)"
-        ws_pr.cell(r, 5).value = kwh_kwp[i]
-        ws_pr.cell(r, 4).value = f"=E{r}*Choix!$B$10/1000"
-        ws_pr.cell(r, 6).value = f"=MIN(C{r},D{r})"
-
-    _autofit(ws_pr, max_col=6)
-
-    # ---------------- STRINGS ----------------
-    ws_st = wb.create_sheet("Strings")
-
-    ws_st["A1"] = "Vérification string"
-    ws_st["A3"] = "Panneau"
-    ws_st["B3"] = config.get("panel_id", "")
-    ws_st["A4"] = "Onduleur"
-    ws_st["B4"] = config.get("inverter_id", "")
-
-    ws_st["A5"] = "T° min"
-    ws_st["B5"] = config.get("t_min", -10)
-
-    ws_st["A6"] = "T° max"
-    ws_st["B6"] = config.get("t_max", 70)
-
-    ws_st["A7"] = "Modules en série"
-    ws_st["B7"] = config.get("n_series", 10)
-
-    ws_st["A9"] = "Voc module"
-    ws_st["B9"] = (
-        f"=IFERROR(VLOOKUP(B3,Catalogue!$A${first_panel_row}:$G${last_panel_row},3,FALSE),\"\")"
-    )
-
-    ws_st["A10"] = "Vmp module"
-    ws_st["B10"] = (
-        f"=IFERROR(VLOOKUP(B3,Catalogue!$A${first_panel_row}:$G${last_panel_row},4,FALSE),\"\")"
-    )
-
-    ws_st["A11"] = "α_V (%/°C)"
-    ws_st["B11"] = (
-        f"=IFERROR(VLOOKUP(B3,Catalogue!$A${first_panel_row}:$G${last_panel_row},7,FALSE),\"\")"
-    )
-
-    ws_st["A13"] = "V_DC_max"
-    ws_st["B13"] = (
-        f"=IFERROR(VLOOKUP(B4,Catalogue!$A${first_inv_row}:$J${last_inv_row},6,FALSE),\"\")"
-    )
-
-    ws_st["A14"] = "V_MPP_min"
-    ws_st["B14"] = (
-        f"=IFERROR(VLOOKUP(B4,Catalogue!$A${first_inv_row}:$J${last_inv_row},4,FALSE),\"\")"
-    )
-
-    ws_st["A15"] = "V_MPP_max"
-    ws_st["B15"] = (
-        f"=IFERROR(VLOOKUP(B4,Catalogue!$A${first_inv_row}:$J${last_inv_row},5,FALSE),\"\")"
-    )
-
-    ws_st["A17"] = "Voc string froid"
-    ws_st["B17"] = "=B7*B9*(1+B11/100*(B5-25))"
-
-    ws_st["A18"] = "Vmp string chaud"
-    ws_st["B18"] = "=B7*B10*(1+B11/100*(B6-25))"
-
-    ws_st["A20"] = "Check Voc <= V_DC_max"
-    ws_st["B20"] = "=IF(AND(B17<>\"\",B13<>\"\"),IF(B17<=B13,\"OK\",\"DÉPASSE\"),\"\")"
-
-    ws_st["A21"] = "Check Vmp dans MPPT"
-    ws_st["B21"] = "=IF(AND(B18<>\"\",B14<>\"\",B15<>\"\"),IF(AND(B18>=B14,B18<=B15),\"OK\",\"HORS PLAGE\"),\"\")"
-
-    _autofit(ws_st, max_col=4)
-
-    # ---------------- SYNTHÈSE ----------------
-    ws_sy = wb.create_sheet("Synthese")
-
-    ws_sy["A1"] = "Synthèse client"
-
-    ws_sy["A3"] = "Panneau"
-    ws_sy["B3"] = "=Choix!B1"
-
-    ws_sy["A4"] = "Modules"
-    ws_sy["B4"] = "=Choix!B2"
-
-    ws_sy["A5"] = "Puissance DC totale"
-    ws_sy["B5"] = "=Choix!B10"
-
-    ws_sy["A7"] = "Onduleur"
-    ws_sy["B7"] = "=Choix!B7"
-
-    ws_sy["A9"] = "Conso annuelle"
-    ws_sy["B9"] = "=Profil!B1"
-
-    ws_sy["A10"] = "Prod PV annuelle"
-    ws_sy["B10"] = "=SUM(Profil!D5:D16)"
-
-    ws_sy["A11"] = "Autocons annuelle"
-    ws_sy["B11"] = "=SUM(Profil!F5:F16)"
-
-    ws_sy["A12"] = "Taux autocons"
-    ws_sy["B12"] = "=IF(B10>0,B11/B10,\"\")"
-
-    ws_sy["A13"] = "Taux couverture"
-    ws_sy["B13"] = "=IF(B9>0,B11/B9,\"\")"
+        rows.append([
+            m,
+            formula_pct,
+            f"=($B$1*B{r}/100)",
+            f"=E{r}*Choix!$B$10/1000",
+            kwh_kwp[i],
+            f"=MIN(C{r},D{r})",
+        ])
+    return rows
+
+
+def _strings_rows(config: dict, panel_rows, inv_rows):
+    first_panel_row, last_panel_row = panel_rows
+    first_inv_row, last_inv_row = inv_rows
+    panel_range = f"Catalogue!$A${first_panel_row}:$G${last_panel_row}"
+    inv_range = f"Catalogue!$A${first_inv_row}:$J${last_inv_row}"
+    return [
+        ["Vérification string"],
+        [],
+        ["Panneau", config.get("panel_id", "")],
+        ["Onduleur", config.get("inverter_id", "")],
+        ["T° min", config.get("t_min", -10)],
+        ["T° max", config.get("t_max", 70)],
+        ["Modules en série", config.get("n_series", 10)],
+        [],
+        ["Voc module", f"=IFERROR(VLOOKUP(B3,{panel_range},3,FALSE),\"\")"],
+        ["Vmp module", f"=IFERROR(VLOOKUP(B3,{panel_range},4,FALSE),\"\")"],
+        ["α_V (%/°C)", f"=IFERROR(VLOOKUP(B3,{panel_range},7,FALSE),\"\")"],
+        [],
+        ["V_DC_max", f"=IFERROR(VLOOKUP(B4,{inv_range},6,FALSE),\"\")"],
+        ["V_MPP_min", f"=IFERROR(VLOOKUP(B4,{inv_range},4,FALSE),\"\")"],
+        ["V_MPP_max", f"=IFERROR(VLOOKUP(B4,{inv_range},5,FALSE),\"\")"],
+        [],
+        ["Voc string froid", "=B7*B9*(1+B11/100*(B5-25))"],
+        ["Vmp string chaud", "=B7*B10*(1+B11/100*(B6-25))"],
+        [],
+        [
+            "Check Voc <= V_DC_max",
+            "=IF(AND(B17<>\"\",B13<>\"\"),IF(B17<=B13,\"OK\",\"DÉPASSE\"),\"\")",
+        ],
+        [
+            "Check Vmp dans MPPT",
+            "=IF(AND(B18<>\"\",B14<>\"\",B15<>\"\"),IF(AND(B18>=B14,B18<=B15),\"OK\",\"HORS PLAGE\"),\"\")",
+        ],
+    ]
 
-    ws_sy["A15"] = "Batterie ?"
-    ws_sy["B15"] = "=Choix!B4"
 
-    ws_sy["A16"] = "Capacité batterie (kWh)"
-    ws_sy["B16"] = "=Choix!B5"
+def _synthese_rows():
+    return [
+        ["Synthèse client"],
+        [],
+        ["Panneau", "=Choix!B1"],
+        ["Modules", "=Choix!B2"],
+        ["Puissance DC totale", "=Choix!B10"],
+        [],
+        ["Onduleur", "=Choix!B7"],
+        [],
+        ["Conso annuelle", "=Profil!B1"],
+        ["Prod PV annuelle", "=SUM(Profil!D5:D16)"],
+        ["Autocons annuelle", "=SUM(Profil!F5:F16)"],
+        ["Taux autocons", "=IF(B10>0,B11/B10,\"\")"],
+        ["Taux couverture", "=IF(B9>0,B11/B9,\"\")"],
+        [],
+        ["Batterie ?", "=Choix!B4"],
+        ["Capacité batterie (kWh)", "=Choix!B5"],
+        ["Modèle batterie", "=IF(B15<>\"Oui\",\"Aucune\",IF(B16<=6,\"Sigen6\",\"Sigen10\"))"],
+    ]
 
-    ws_sy["A17"] = "Modèle batterie"
-    ws_sy["B17"] = "=IF(B15<>\"Oui\",\"Aucune\",IF(B16<=6,\"Sigen6\",\"Sigen10\"))"
 
-    _autofit(ws_sy, max_col=4)
+def _hourly_rows(results: dict, step_minutes: int = 60):
+    """
+    Lignes de la feuille Horaire (8760 h, ou un pas de step_minutes par
+    ligne), produites à la volée : en mode write-only, seule la ligne
+    courante est en mémoire côté openpyxl.
+    """
+    yield ["Heure", "Mois", "Heure_jour"] + [header for header, _ in HOURLY_COLUMNS]
+
+    grid = time_grid(step_minutes)
+    if grid.steps_per_hour == 1:
+        hours = range(grid.n_steps)
+    else:
+        hours = (np.arange(grid.n_steps) / grid.steps_per_hour).tolist()
+    months = [MONTH_LABELS[m] for m in grid.month.tolist()]
+    columns = [results[key].tolist() for _, key in HOURLY_COLUMNS]
+    for hour, month, hour_of_day, *values in zip(hours, months, grid.hour_of_day.tolist(), *columns):
+        yield [hour, month, hour_of_day, *values]
+
+
+# ----------------------------------------------------
+# CLASSEUR
+# ----------------------------------------------------
+def generate_workbook_bytes(config: dict, results: dict | None = None, streaming: bool = True) -> bytes:
+    """
+    Classeur client : feuilles à formules (Catalogue, Choix, Profil,
+    Strings, Synthese) et, si `results` est fourni, feuille "Horaire"
+    avec les 8760 h de simulation (clés de HOURLY_COLUMNS, comme le
+    dictionnaire renvoyé par size_installation).
+
+    streaming=True : classeur openpyxl write-only (mémoire bornée).
+    streaming=False : classeur normal en mémoire (mode historique).
+    """
+    wb = Workbook(write_only=streaming)
+    if not streaming:
+        wb.remove(wb.active)
+
+    cat_rows, panel_rows, inv_rows = _catalog_sheet(CATALOG_VERSION)
+
+    _write_sheet(wb, "Catalogue", cat_rows, max_col=10)
+    _write_sheet(wb, "Choix", _choix_rows(config, panel_rows), max_col=7)
+    _write_sheet(wb, "Profil", _profil_rows(config), max_col=6)
+    _write_sheet(wb, "Strings", _strings_rows(config, panel_rows, inv_rows), max_col=4)
+    _write_sheet(wb, "Synthese", _synthese_rows(), max_col=4)
+
+    if results is not None:
+        _write_sheet(
+            wb,
+            "Horaire",
+            _hourly_rows(results, int(config.get("step_minutes", 60))),
+            max_col=3 + len(HOURLY_COLUMNS),
+        )
 
     buffer = BytesIO()
     wb.save(buffer)
     buffer.seek(0)
     return buffer.getvalue()
+
+
+# ----------------------------------------------------
+# CACHE DES CLASSEURS (CLÉ = CONTENU)
+# ----------------------------------------------------
+def workbook_cache_key(config: dict, results: dict | None = None, streaming: bool = True) -> str:
+    """
+    Empreinte stable d'un export : config (clés triées), version du
+    catalogue, mode d'écriture et, le cas échéant, profils horaires.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps(config, sort_keys=True, default=str).encode())
+    h.update(f"|{CATALOG_VERSION}|{int(streaming)}|".encode())
+    if results is not None:
+        h.update(profile_hash(*(results[key] for _, key in HOURLY_COLUMNS)).encode())
+    return h.hexdigest()
+
+
+class WorkbookCache:
+    """
+    Cache des classeurs générés, à deux niveaux :
+    - mémoire : LRU de `max_entries` classeurs ;
+    - disque (optionnel, `disk_dir`) : un fichier .xlsx par clé, les moins
+      récemment utilisés sont supprimés au-delà de `max_disk_bytes`.
+    """
+
+    def __init__(self, max_entries: int = 16, disk_dir: str | None = None, max_disk_bytes: int = 200 * 1024**2):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.xlsx")
+
+    def _remember(self, key: str, data: bytes):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+
+            if self.disk_dir:
+                path = self._path(key)
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    os.utime(path)  # date d'accès pour l'éviction LRU
+                except OSError:
+                    data = None
+                if data is not None:
+                    self._remember(key, data)
+                    self.stats["disk_hits"] += 1
+                    return data
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._remember(key, data)
+            if self.disk_dir:
+                # Écriture atomique : fichier temporaire puis renommage
+                fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+                self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".xlsx"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def cached_workbook_bytes(
+    cache: WorkbookCache,
+    config: dict,
+    results: dict | None = None,
+    streaming: bool = True,
+) -> bytes:
+    """generate_workbook_bytes avec cache : un export identique est renvoyé tel quel."""
+    key = workbook_cache_key(config, results, streaming)
+    data = cache.get(key)
+    if data is None:
+        data = generate_workbook_bytes(config, results, streaming)
+        cache.put(key, data)
+    return data
@@ -0,0 +1,117 @@
+"""Moteur de dimensionnement (câblage, onduleur, simulation) indépendant de Streamlit."""
+
+from .batch import REQUEST_FIELDS, select_best_inverters_batch
+from .battery import (
+    battery_module_combinations,
+    battery_sizing_curve,
+    knee_point,
+    simulate_battery_fast,
+    simulate_battery_hourly,
+    simulate_battery_scenarios,
+)
+from .catalog import (
+    BATTERIES,
+    CATALOG,
+    CATALOG_VERSION,
+    INVERTERS,
+    PANEL_IDS,
+    PANELS,
+    Catalog,
+    CatalogTable,
+    get_catalog,
+    get_inverter_elec,
+    get_panel_elec,
+    load_catalog,
+)
+from .dispatch import (
+    DISPATCH_STRATEGIES,
+    register_dispatch,
+    simulate_dispatch,
+)
+from .explorer import (
+    candidate_designs,
+    explore_design_space,
+    pareto_front,
+)
+from .lifetime import (
+    LIFETIME_YEARS,
+    equivalent_cycles,
+    simulate_lifetime,
+)
+from .meter import (
+    MeterDataError,
+    load_meter_file,
+    meter_consumption,
+    parse_meter_csv,
+)
+from .pipeline import (
+    DEFAULT_CONFIG,
+    SizingError,
+    energy_flows,
+    energy_summary,
+    hourly_profiles,
+    monthly_totals,
+    size_installation,
+    typical_days,
+)
+from .profiling import (
+    Recorder,
+    count,
+    log_recording,
+    recording,
+    span,
+    start_recording,
+)
+from .profiles import (
+    generate_consumption_hourly,
+    generate_pv_profile_hourly,
+    hourly_profile,
+    monthly_consumption_profile,
+    monthly_pv_profile_kwh_kwp,
+    profile_hash,
+    pv_day_profile,
+)
+from .pvmodel import (
+    ambient_temperature_profile,
+    apply_pv_losses,
+)
+from .solar import (
+    array_pv_profile,
+    mppt_kwp,
+    orientation_profile,
+    plane_of_array,
+    solar_geometry,
+)
+from .tariffs import (
+    DEFAULT_COSTS,
+    DEFAULT_TARIFF,
+    energy_bill,
+    financial_summary,
+    installation_cost,
+    monthly_peaks,
+    payback_period,
+    peak_mask,
+    step_prices,
+)
+from .timegrid import (
+    DAYS_PER_MONTH,
+    HOURS_PER_MONTH,
+    MONTH_LABELS,
+    TIME_STEPS_MINUTES,
+    TimeGrid,
+    steps_per_hour,
+    time_grid,
+)
+from .wiring import (
+    candidate_inverters,
+    combined_wiring,
+    evaluate_inverter,
+    get_nominal_dc_voltage,
+    inverter_p_dc_upper_bound,
+    optimize_strings,
+    optimize_strings_table,
+    select_best_inverter,
+    select_inverter_combination,
+    strings_label,
+    wiring_from_table,
+)
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .catalog import INVERTERS, get_inverter_elec
+from .wiring import (
+    candidate_inverters,
+    evaluate_inverter,
+    inverter_p_dc_upper_bound,
+    select_best_inverter,
+)
+
+# Ordre des champs d'une demande donnée sous forme de tuple
+# (mêmes arguments que select_best_inverter).
+REQUEST_FIELDS = ("panel", "n_panels", "grid_type", "max_dc_ac", "fam_pref", "T_min", "T_max")
+
+# Catalogue onduleurs (id -> caractéristiques) du processus worker,
+# transmis une seule fois à l'initialisation du pool.
+_worker_inverters = None
+
+
+def _init_worker(inverters: dict):
+    global _worker_inverters
+    _worker_inverters = inverters
+
+
+def _evaluate_task(task):
+    request_index, order, inv_id, panel, n_panels, max_dc_ac, T_min, T_max = task
+    candidate = evaluate_inverter(
+        panel,
+        _worker_inverters[inv_id],
+        n_panels,
+        max_dc_ac,
+        T_min,
+        T_max,
+    )
+    return request_index, order, candidate
+
+
+def _normalize_request(request) -> dict:
+    if isinstance(request, dict):
+        return {field: request[field] for field in REQUEST_FIELDS}
+    return dict(zip(REQUEST_FIELDS, request))
+
+
+def select_best_inverters_batch(requests, max_workers: int | None = None, chunksize: int | None = None):
+    """
+    Sélection auto de l'onduleur pour un lot de demandes.
+
+    Chaque demande est un dict (ou un tuple dans l'ordre de REQUEST_FIELDS) avec
+    les arguments de select_best_inverter. Les appels optimize_strings par
+    (demande, onduleur) sont répartis sur un pool de processus ; le catalogue
+    onduleurs est envoyé une fois par worker. Renvoie la liste des résultats
+    (dict ou None) dans l'ordre des demandes, identiques à select_best_inverter.
+    """
+    requests = [_normalize_request(r) for r in requests]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers <= 1 or len(requests) <= 1:
+        return [select_best_inverter(**r) for r in requests]
+
+    tasks = []
+    for request_index, r in enumerate(requests):
+        for order, inv_elec in candidate_inverters(r["grid_type"], r["fam_pref"]):
+            # Onduleurs sans string possible : inutile de les envoyer au pool
+            bound = inverter_p_dc_upper_bound(
+                r["panel"], inv_elec, r["n_panels"], r["max_dc_ac"], r["T_min"], r["T_max"]
+            )
+            if bound <= 0:
+                continue
+            tasks.append((
+                request_index,
+                order,
+                inv_elec["id"],
+                r["panel"],
+                r["n_panels"],
+                r["max_dc_ac"],
+                r["T_min"],
+                r["T_max"],
+            ))
+
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (4 * max_workers))
+
+    inverters = {inv[0]: get_inverter_elec(inv[0]) for inv in INVERTERS}
+
+    results = [None] * len(requests)
+    best_orders = [None] * len(requests)
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(inverters,),
+    ) as pool:
+        for request_index, order, candidate in pool.map(_evaluate_task, tasks, chunksize=chunksize):
+            if candidate is None:
+                continue
+            # Même règle que select_best_inverter : P_dc max, puis rang catalogue
+            best = results[request_index]
+            if (
+                best is None
+                or candidate["P_dc"] > best["P_dc"]
+                or (candidate["P_dc"] == best["P_dc"] and order < best_orders[request_index])
+            ):
+                results[request_index] = candidate
+                best_orders[request_index] = order
+
+    return results
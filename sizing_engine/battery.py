@@ -0,0 +1,322 @@
+import numpy as np
+
+
+# ----------------------------------------------------
+# SIMULATION BATTERIE (8760 H OU PAS INFRA-HORAIRE)
+# ----------------------------------------------------
+def simulate_battery_hourly(
+    pv_hourly,
+    cons_hourly,
+    battery_capacity_kwh,
+    charge_eff=0.95,
+    discharge_eff=0.95,
+    max_charge_power_kw=3.6,
+    max_discharge_power_kw=3.6,
+    step_hours=1.0,
+):
+    """
+    Simulation batterie sur 8760 h (ou tout pas de durée step_hours) :
+    - SOC persistant
+    - charge / décharge avec rendement et puissance limite
+    """
+    hours = len(pv_hourly)
+    soc = 0.0
+    soc_series = np.zeros(hours)
+    ac_direct = np.zeros(hours)
+    ac_batt = np.zeros(hours)
+    grid_export = np.zeros(hours)
+    grid_import = np.zeros(hours)
+
+    for h in range(hours):
+        prod = pv_hourly[h]    # kWh
+        conso = cons_hourly[h] # kWh
+
+        direct = min(prod, conso)
+        ac_direct[h] = direct
+
+        surplus = prod - direct
+        deficit = conso - direct
+
+        max_charge_kwh = max_charge_power_kw * step_hours
+        max_discharge_kwh = max_discharge_power_kw * step_hours
+
+        charge_possible = min(surplus, max_charge_kwh)
+        charge_effective = charge_possible * charge_eff
+        soc = min(battery_capacity_kwh, soc + charge_effective)
+
+        discharge_possible = min(deficit, max_discharge_kwh)
+        discharge_effective = min(discharge_possible / discharge_eff, soc)
+
+        ac_batt[h] = discharge_effective * discharge_eff
+        soc -= discharge_effective
+
+        grid_export[h] = surplus - charge_possible
+        grid_import[h] = deficit - ac_batt[h]
+
+        soc_series[h] = soc
+
+    return soc_series, ac_direct, ac_batt, grid_export, grid_import
+
+
+def simulate_battery_scenarios(
+    pv_hourly,
+    cons_hourly,
+    battery_capacity_kwh,
+    charge_eff=0.95,
+    discharge_eff=0.95,
+    max_charge_power_kw=3.6,
+    max_discharge_power_kw=3.6,
+    step_hours=1.0,
+):
+    """
+    Simulation batterie de S scénarios simultanés (même modèle que
+    simulate_battery_hourly) :
+    - capacité, rendements et puissances : scalaires ou tableaux (S,)
+    - état (SOC) vectorisé sur les scénarios, boucle uniquement sur le temps
+
+    Renvoie les mêmes séries que simulate_battery_hourly, de forme (S, heures) ;
+    pour S = 1, les valeurs sont identiques.
+    """
+    pv_hourly = np.asarray(pv_hourly, dtype=float)
+    cons_hourly = np.asarray(cons_hourly, dtype=float)
+    capacity, charge_eff, discharge_eff, max_charge, max_discharge = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (
+            battery_capacity_kwh,
+            charge_eff,
+            discharge_eff,
+            max_charge_power_kw,
+            max_discharge_power_kw,
+        ))
+    )
+    max_charge = max_charge * step_hours
+    max_discharge = max_discharge * step_hours
+
+    ac_direct = np.minimum(pv_hourly, cons_hourly)
+    surplus = pv_hourly - ac_direct
+    deficit = cons_hourly - ac_direct
+
+    # Tout ce qui ne dépend pas du SOC est calculé d'un bloc, en (heures, S)
+    charge_possible = np.minimum(surplus[:, None], max_charge)
+    charge_effective = charge_possible * charge_eff
+    discharge_wanted = np.minimum(deficit[:, None], max_discharge) / discharge_eff
+
+    hours = len(pv_hourly)
+    n_scenarios = capacity.size
+    soc_series = np.empty((hours, n_scenarios))
+    discharge_effective = np.empty((hours, n_scenarios))
+
+    # Le SOC de l'heure h est calculé directement dans soc_series[h]
+    soc_prev = np.zeros(n_scenarios)
+    for h, soc in enumerate(soc_series):
+        np.add(soc_prev, charge_effective[h], out=soc)
+        np.minimum(capacity, soc, out=soc)
+        discharge_h = discharge_effective[h]
+        np.minimum(discharge_wanted[h], soc, out=discharge_h)
+        soc -= discharge_h
+        soc_prev = soc
+
+    ac_batt = discharge_effective * discharge_eff
+    grid_export = surplus[:, None] - charge_possible
+    grid_import = deficit[:, None] - ac_batt
+
+    return (
+        np.ascontiguousarray(soc_series.T),
+        np.broadcast_to(ac_direct, (n_scenarios, hours)).copy(),
+        np.ascontiguousarray(ac_batt.T),
+        np.ascontiguousarray(grid_export.T),
+        np.ascontiguousarray(grid_import.T),
+    )
+
+
+def _clamp_prefix_scan(shift, lower, upper):
+    """
+    Itérés x_t = clip(x_{t-1} + shift_t, lower_t, upper_t) depuis x_0 = 0,
+    par balayage parallèle (Hillis-Steele) : la composition de deux
+    fonctions « décalage puis écrêtage » en est encore une, donc les
+    préfixes se calculent en log2(T) passes vectorisées. Le temps est le
+    dernier axe (séries empilées acceptées).
+    """
+    shift, lower, upper = (np.array(a, dtype=float) for a in np.broadcast_arrays(shift, lower, upper))
+    k = 1
+    while k < shift.shape[-1]:
+        # f (pas antérieurs, [:-k]) puis g (pas courants, [k:]) :
+        # g∘f = décalage a_f + a_g, bornes de f décalées puis écrêtées par g
+        shift_g, lower_g, upper_g = shift[..., k:], lower[..., k:], upper[..., k:]
+        new_lower = np.clip(lower[..., :-k] + shift_g, lower_g, upper_g)
+        new_upper = np.clip(upper[..., :-k] + shift_g, lower_g, upper_g)
+        new_shift = shift[..., :-k] + shift_g
+        lower[..., k:], upper[..., k:], shift[..., k:] = new_lower, new_upper, new_shift
+        k *= 2
+    return np.clip(shift, lower, upper)
+
+
+def simulate_battery_fast(
+    pv_hourly,
+    cons_hourly,
+    battery_capacity_kwh,
+    charge_eff=0.95,
+    discharge_eff=0.95,
+    max_charge_power_kw=3.6,
+    max_discharge_power_kw=3.6,
+    step_hours=1.0,
+):
+    """
+    Même modèle et mêmes sorties que simulate_battery_hourly, sans boucle
+    Python sur le temps. Un pas s'écrit SOC' = clip(SOC + charge - décharge
+    demandée, 0, max(capacité - décharge demandée, 0)) : le SOC de chaque
+    pas est obtenu par _clamp_prefix_scan, puis les flux sont recalculés
+    pas à pas à partir du SOC précédent (écarts ~1e-12 kWh avec la boucle).
+
+    Séries empilées acceptées : profils (..., T), capacité scalaire ou (...,).
+    """
+    pv_hourly = np.asarray(pv_hourly, dtype=float)
+    cons_hourly = np.asarray(cons_hourly, dtype=float)
+    capacity = np.asarray(battery_capacity_kwh, dtype=float)
+    if capacity.ndim:
+        capacity = capacity[..., None]
+
+    ac_direct = np.minimum(pv_hourly, cons_hourly)
+    surplus = pv_hourly - ac_direct
+    deficit = cons_hourly - ac_direct
+
+    charge_possible = np.minimum(surplus, max_charge_power_kw * step_hours)
+    charge_effective = charge_possible * charge_eff
+    discharge_wanted = np.minimum(deficit, max_discharge_power_kw * step_hours) / discharge_eff
+
+    soc_scan = _clamp_prefix_scan(
+        charge_effective - discharge_wanted,
+        np.zeros_like(discharge_wanted),
+        np.maximum(capacity - discharge_wanted, 0.0),
+    )
+    soc_prev = np.concatenate((np.zeros(soc_scan.shape[:-1] + (1,)), soc_scan[..., :-1]), axis=-1)
+
+    soc_charged = np.minimum(capacity, soc_prev + charge_effective)
+    discharge_effective = np.minimum(discharge_wanted, soc_charged)
+    soc_series = soc_charged - discharge_effective
+
+    ac_batt = discharge_effective * discharge_eff
+    grid_export = surplus - charge_possible
+    grid_import = deficit - ac_batt
+
+    return soc_series, ac_direct, ac_batt, grid_export, grid_import
+
+
+def _unstored_export(pv_hourly, cons_hourly, soc_series, charge_eff=0.95):
+    """
+    Export du glouton au même bilan que les autres pilotages : surplus PV
+    moins l'énergie réellement stockée (hausse du SOC aux pas de surplus,
+    ramenée avant rendement). Les simulations ci-dessus, gardées comme
+    référence, comptent comme chargé tout le surplus jusqu'à la limite de
+    puissance, même batterie pleine. Séries empilées acceptées.
+    """
+    surplus = pv_hourly - np.minimum(pv_hourly, cons_hourly)
+    soc_series = np.asarray(soc_series, dtype=float)
+    soc_prev = np.concatenate((np.zeros(soc_series.shape[:-1] + (1,)), soc_series[..., :-1]), axis=-1)
+    # Pas de surplus : pas de décharge, la hausse du SOC est la charge
+    stored = np.where(surplus > 0, (soc_series - soc_prev) / charge_eff, 0.0)
+    return surplus - stored
+
+
+# ----------------------------------------------------
+# DIMENSIONNEMENT BATTERIE (COURBE SUR UNE GRILLE DE CAPACITÉS)
+# ----------------------------------------------------
+def battery_module_combinations(batteries, max_kwh: float, max_modules: int = 5):
+    """
+    Combinaisons de modules du catalogue batteries (ex. 1× Sigen6 + 1× Sigen10)
+    dont la capacité totale ne dépasse pas max_kwh. Pour chaque capacité, on
+    garde la combinaison au plus petit nombre de modules.
+    """
+    by_capacity = {}
+
+    def walk(index, counts, capacity):
+        if index == len(batteries):
+            n_modules = sum(counts)
+            if n_modules == 0:
+                return
+            if capacity not in by_capacity or n_modules < sum(by_capacity[capacity]):
+                by_capacity[capacity] = counts[:]
+            return
+        for n in range(max_modules + 1):
+            cap = capacity + n * float(batteries[index][1])
+            if cap > max_kwh or sum(counts) + n > max_modules:
+                break
+            counts.append(n)
+            walk(index + 1, counts, cap)
+            counts.pop()
+
+    walk(0, [], 0.0)
+
+    combos = []
+    for capacity in sorted(by_capacity):
+        counts = by_capacity[capacity]
+        label = " + ".join(
+            f"{n}× {batteries[i][0]}" for i, n in enumerate(counts) if n > 0
+        )
+        combos.append({"label": label, "capacity_kwh": capacity})
+    return combos
+
+
+def battery_sizing_curve(
+    pv_hourly,
+    cons_hourly,
+    capacities_kwh,
+    charge_eff=0.95,
+    discharge_eff=0.95,
+    max_charge_power_kw=3.6,
+    max_discharge_power_kw=3.6,
+    step_hours=1.0,
+):
+    """
+    Autoconsommation, couverture, import et export annuels pour toute une
+    grille de capacités, en une seule simulation multi-scénarios.
+    Une capacité nulle correspond à l'installation sans batterie.
+    """
+    capacities = np.asarray(capacities_kwh, dtype=float)
+    pv_year = pv_hourly.sum()
+    cons_year = cons_hourly.sum()
+
+    ac_direct_year = np.minimum(pv_hourly, cons_hourly).sum()
+    ac_batt_year = np.zeros(capacities.shape)
+    export_year = np.full(capacities.shape, pv_year - ac_direct_year)
+    import_year = np.full(capacities.shape, cons_year - ac_direct_year)
+
+    with_battery = capacities > 0
+    if with_battery.any():
+        soc, _, ac_batt, _, grid_import = simulate_battery_scenarios(
+            pv_hourly,
+            cons_hourly,
+            battery_capacity_kwh=capacities[with_battery],
+            charge_eff=charge_eff,
+            discharge_eff=discharge_eff,
+            max_charge_power_kw=max_charge_power_kw,
+            max_discharge_power_kw=max_discharge_power_kw,
+            step_hours=step_hours,
+        )
+        ac_batt_year[with_battery] = ac_batt.sum(axis=1)
+        export_year[with_battery] = _unstored_export(pv_hourly, cons_hourly, soc, charge_eff).sum(axis=1)
+        import_year[with_battery] = grid_import.sum(axis=1)
+
+    # Garantir AC ≤ PV et ≤ conso (comme pour la simulation principale)
+    ac_total_year = np.minimum(ac_direct_year + ac_batt_year, min(pv_year, cons_year))
+
+    return {
+        "capacity_kwh": capacities,
+        "taux_auto": ac_total_year / pv_year * 100 if pv_year > 0 else np.zeros(capacities.shape),
+        "taux_couv": ac_total_year / cons_year * 100 if cons_year > 0 else np.zeros(capacities.shape),
+        "import_kwh": import_year,
+        "export_kwh": export_year,
+    }
+
+
+def knee_point(x, y) -> int:
+    """
+    Indice du coude d'une courbe croissante et concave : point le plus éloigné
+    de la corde reliant le premier et le dernier point (courbe normalisée).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 3 or x[-1] == x[0] or y[-1] == y[0]:
+        return 0
+    x_n = (x - x[0]) / (x[-1] - x[0])
+    y_n = (y - y[0]) / (y[-1] - y[0])
+    return int(np.argmax(y_n - x_n))
@@ -0,0 +1,258 @@
+import csv
+import hashlib
+import os
+
+import numpy as np
+
+
+# ----------------------------------------------------
+# SOURCE DU CATALOGUE (FICHIERS CSV)
+# ----------------------------------------------------
+# Répertoire des fichiers panels.csv, inverters.csv, batteries.csv
+# (remplaçable par la variable d'environnement SIGEN_CATALOG_DIR)
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# Schéma des tables : colonnes (en-têtes CSV) et types numpy
+TABLE_SCHEMAS = {
+    "panels": [
+        ("ID", str),
+        ("P_STC_W", float),
+        ("Voc", float),
+        ("Vmp", float),
+        ("Isc", float),
+        ("Imp", float),
+        ("alpha_V_%/°C", float),
+    ],
+    "inverters": [
+        ("ID", str),
+        ("P_AC_nom", float),
+        ("P_DC_max", float),
+        ("V_MPP_min", float),
+        ("V_MPP_max", float),
+        ("V_DC_max", float),
+        ("I_MPPT", float),
+        ("Nb_MPPT", int),
+        ("Type_reseau", str),
+        ("Famille", str),
+        ("V_nom_dc", float),
+    ],
+    "batteries": [
+        ("ID", str),
+        ("Cap_kWh", float),
+    ],
+}
+
+# Version du format du cache binaire (à incrémenter si le schéma change)
+_CACHE_FORMAT = 1
+
+
+class CatalogTable:
+    """
+    Table du catalogue stockée par colonnes (tableaux numpy), avec un index
+    ID -> ligne et des index de groupes (ex. type réseau + famille)
+    construits à la demande.
+    """
+
+    def __init__(self, name: str, columns: dict):
+        self.name = name
+        self.columns = columns
+        self.ids = columns["ID"]
+        self.index = {inv_id: row for row, inv_id in enumerate(self.ids.tolist())}
+        if len(self.index) != len(self.ids):
+            raise ValueError(f"Catalogue {name} : identifiants en double.")
+        self._groups = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    def row(self, item_id: str):
+        """Ligne de l'identifiant, ou None s'il est absent."""
+        return self.index.get(item_id)
+
+    def select(self, **criteria) -> np.ndarray:
+        """
+        Lignes (ordre catalogue) dont les colonnes valent exactement `criteria`,
+        ex. select(Type_reseau="Mono", Famille="Store").
+        """
+        key = tuple(sorted(criteria))
+        groups = self._groups.get(key)
+        if groups is None:
+            groups = {}
+            values = zip(*(self.columns[c].tolist() for c in key))
+            for row, value in enumerate(values):
+                groups.setdefault(value, []).append(row)
+            groups = {value: np.array(rows, dtype=np.intp) for value, rows in groups.items()}
+            self._groups[key] = groups
+        return groups.get(tuple(criteria[c] for c in key), np.empty(0, dtype=np.intp))
+
+    def records(self) -> list:
+        """Lignes sous forme de listes de valeurs Python (ordre des colonnes du schéma)."""
+        names = [name for name, _ in TABLE_SCHEMAS[self.name]]
+        return [list(values) for values in zip(*(self.columns[n].tolist() for n in names))]
+
+
+class Catalog:
+    """Panneaux, onduleurs et batteries chargés depuis les fichiers du catalogue."""
+
+    def __init__(self, tables: dict, version: str, source: str):
+        self.panels = tables["panels"]
+        self.inverters = tables["inverters"]
+        self.batteries = tables["batteries"]
+        self.version = version
+        self.source = source
+        self._panel_elec = {}
+        self._inverter_elec = {}
+
+    def panel_elec(self, panel_id: str):
+        elec = self._panel_elec.get(panel_id)
+        if elec is None:
+            row = self.panels.row(panel_id)
+            if row is None:
+                return None
+            t = self.panels
+            elec = self._panel_elec[panel_id] = {
+                "id": panel_id,
+                "Pstc": float(t["P_STC_W"][row]),
+                "Voc": float(t["Voc"][row]),
+                "Vmp": float(t["Vmp"][row]),
+                "Isc": float(t["Isc"][row]),
+                "alpha_V": float(t["alpha_V_%/°C"][row]),  # %/°C
+            }
+        return dict(elec)
+
+    def inverter_elec(self, inv_id: str):
+        elec = self._inverter_elec.get(inv_id)
+        if elec is None:
+            row = self.inverters.row(inv_id)
+            if row is None:
+                return None
+            t = self.inverters
+            elec = self._inverter_elec[inv_id] = {
+                "id": inv_id,
+                "P_ac": float(t["P_AC_nom"][row]),
+                "P_dc_max": float(t["P_DC_max"][row]),
+                "Vmpp_min": float(t["V_MPP_min"][row]),
+                "Vmpp_max": float(t["V_MPP_max"][row]),
+                "Vdc_max": float(t["V_DC_max"][row]),
+                "Impp_max": float(t["I_MPPT"][row]),
+                "nb_mppt": int(t["Nb_MPPT"][row]),
+                "type_reseau": str(t["Type_reseau"][row]),
+                "famille": str(t["Famille"][row]),
+                "V_nom_dc": float(t["V_nom_dc"][row]),
+            }
+        return dict(elec)
+
+
+# ----------------------------------------------------
+# CHARGEMENT (CSV + CACHE BINAIRE NPZ)
+# ----------------------------------------------------
+def _read_csv_table(path: str, name: str) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c, _ in TABLE_SCHEMAS[name] if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Catalogue {name} : colonnes manquantes {missing} ({path}).")
+        rows = list(reader)
+
+    columns = {}
+    for column, dtype in TABLE_SCHEMAS[name]:
+        values = [r[column].strip() for r in rows]
+        try:
+            if dtype is str:
+                columns[column] = np.array(values, dtype=str)
+            else:
+                columns[column] = np.array([float(v) for v in values]).astype(dtype)
+        except ValueError as exc:
+            raise ValueError(f"Catalogue {name} : valeur invalide dans la colonne {column} ({exc}).") from None
+    return columns
+
+
+def _source_digest(paths: dict) -> str:
+    h = hashlib.sha1(f"format={_CACHE_FORMAT}".encode())
+    for name, path in sorted(paths.items()):
+        with open(path, "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_catalog(data_dir: str | None = None, cache_dir: str | None = None) -> Catalog:
+    """
+    Charge le catalogue depuis `data_dir` (panels.csv, inverters.csv,
+    batteries.csv). Les colonnes sont mises en cache dans un fichier .npz
+    identifié par l'empreinte des fichiers source : tant qu'ils ne changent
+    pas, le CSV n'est plus analysé. Le cache est facultatif (ignoré s'il
+    ne peut pas être écrit).
+    """
+    data_dir = data_dir or os.environ.get("SIGEN_CATALOG_DIR") or DATA_DIR
+    cache_dir = cache_dir or os.path.join(data_dir, "__pycache__")
+    paths = {name: os.path.join(data_dir, f"{name}.csv") for name in TABLE_SCHEMAS}
+
+    digest = _source_digest(paths)
+    cache_path = os.path.join(cache_dir, f"catalog-{digest[:20]}.npz")
+
+    columns = None
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            columns = {
+                name: {c: npz[f"{name}/{c}"] for c, _ in schema}
+                for name, schema in TABLE_SCHEMAS.items()
+            }
+    except (OSError, KeyError, ValueError):
+        columns = None
+
+    if columns is None:
+        columns = {name: _read_csv_table(path, name) for name, path in paths.items()}
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(
+                cache_path,
+                **{f"{name}/{c}": a for name, cols in columns.items() for c, a in cols.items()},
+            )
+        except OSError:
+            pass
+
+    tables = {name: CatalogTable(name, cols) for name, cols in columns.items()}
+    return Catalog(tables, version=digest[:12], source=data_dir)
+
+
+# ----------------------------------------------------
+# CATALOGUE
+# ----------------------------------------------------
+CATALOG = load_catalog()
+
+# Empreinte du contenu du catalogue (invalide les caches dérivés s'il change)
+CATALOG_VERSION = CATALOG.version
+
+
+def get_catalog():
+    """
+    Catalogue sous forme de lignes (panneaux, onduleurs, batteries),
+    dans l'ordre des colonnes des fichiers source.
+
+    Onduleurs : (ID, P_AC_nom, P_DC_max, V_MPP_min, V_MPP_max, V_DC_max,
+                 I_MPPT, Nb_MPPT, Type_reseau, Famille, V_nom_dc)
+    """
+    return (
+        CATALOG.panels.records(),
+        [tuple(r) for r in CATALOG.inverters.records()],
+        CATALOG.batteries.records(),
+    )
+
+
+PANELS, INVERTERS, BATTERIES = get_catalog()
+PANEL_IDS = CATALOG.panels.ids.tolist()
+
+
+# ----------------------------------------------------
+# FONCTIONS CATALOGUE
+# ----------------------------------------------------
+def get_panel_elec(panel_id: str):
+    return CATALOG.panel_elec(panel_id)
+
+
+def get_inverter_elec(inv_id: str):
+    return CATALOG.inverter_elec(inv_id)
@@ -0,0 +1,188 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .pipeline import DEFAULT_CONFIG, size_installation
+from .wiring import strings_label
+
+# Colonnes du fichier de résultats
+RESULT_FIELDS = [
+    "row", "id", "panel_id", "n_modules", "grid_type", "battery_kwh",
+    "inverter_id", "strings", "N_used", "P_dc", "ratio_dc_ac",
+    "pv_year", "cons_year", "ac_total_year", "import_year", "export_year",
+    "taux_auto", "taux_couv", "clipping_year", "annual_savings", "payback_years", "error",
+]
+
+
+def _orientations(value: str) -> list:
+    """Orientations par MPPT : "azimut/inclinaison" séparés par ";" (ex. "-90/35;90/35")."""
+    return [tuple(float(x) for x in part.split("/")) for part in value.split(";") if part.strip()]
+
+
+def _flag(value: str) -> bool:
+    """Booléen CSV : 1 / 0, oui / non, true / false."""
+    return value.lower() in ("1", "oui", "true", "yes")
+
+
+# Conversion des colonnes CSV (chaînes) vers les types de DEFAULT_CONFIG
+_CONVERTERS = {
+    "n_modules": int,
+    "max_dc_ac": float,
+    "battery_kwh": float,
+    "annual_consumption": float,
+    "t_min": float,
+    "t_max": float,
+    "meter_year": int,
+    "step_minutes": int,
+    "lifetime_years": int,
+    "investment_eur": float,
+    "max_inverters": int,
+    "mppt_orientations": _orientations,
+    "pv_losses": _flag,
+}
+
+
+def parse_request(row: dict) -> dict:
+    """Ligne CSV -> config de size_installation (colonnes vides = valeur par défaut)."""
+    config = {}
+    for key in DEFAULT_CONFIG:
+        value = (row.get(key) or "").strip()
+        if not value:
+            continue
+        if key in _CONVERTERS:
+            value = _CONVERTERS[key](value.replace(",", "."))
+        elif key in ("fam_pref", "inverter_id") and value == "Auto":
+            value = None
+        config[key] = value
+    return config
+
+
+def size_row(row_index: int, row: dict) -> dict:
+    """Dimensionne une ligne de demande ; les erreurs sont reportées dans la colonne error."""
+    out = {
+        "row": row_index,
+        "id": row.get("id", ""),
+        "panel_id": row.get("panel_id", ""),
+        "n_modules": row.get("n_modules", ""),
+        "grid_type": row.get("grid_type", ""),
+        "battery_kwh": row.get("battery_kwh", ""),
+    }
+    try:
+        result = size_installation(parse_request(row))
+    except (ValueError, KeyError) as exc:
+        out["error"] = str(exc)
+        return out
+    except Exception as exc:
+        # Cellule mal formée ou cas non prévu : la ligne est en erreur, pas le lot
+        out["error"] = f"{type(exc).__name__}: {exc}"
+        return out
+
+    out.update({
+        "inverter_id": result["inverter_id"],
+        "strings": strings_label(result["wiring"]),
+        "N_used": result["wiring"]["N_used"],
+        "P_dc": result["P_dc"],
+        "ratio_dc_ac": round(result["ratio_dc_ac"], 4),
+        "pv_year": round(float(result["pv_year"]), 1),
+        "cons_year": round(float(result["cons_year"]), 1),
+        "ac_total_year": round(float(result["ac_total_year"]), 1),
+        "import_year": round(float(result["import_year"]), 1),
+        "export_year": round(float(result["export_year"]), 1),
+        "taux_auto": round(float(result["taux_auto"]), 2),
+        "taux_couv": round(float(result["taux_couv"]), 2),
+        "clipping_year": round(result["clipping_year"], 1),
+        "annual_savings": round(float(result["finance"]["annual_savings"]), 2),
+        "payback_years": round(float(result["finance"]["payback_years"]), 2),
+    })
+    return out
+
+
+class _CsvSink:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, result: dict):
+        self.writer.writerow(result)
+
+
+class _JsonlSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, result: dict):
+        # JSON strict : inf / nan (ex. retour jamais atteint) -> null
+        result = {
+            key: None if isinstance(value, float) and not math.isfinite(value) else value
+            for key, value in result.items()
+        }
+        self.stream.write(json.dumps(result, ensure_ascii=False, allow_nan=False) + "\n")
+
+
+def run_batch(rows, sink, max_workers: int = 1, max_in_flight: int | None = None) -> int:
+    """
+    Dimensionne les demandes `rows` (itérable de dicts) et écrit chaque résultat
+    dans `sink` dès qu'il est prêt (ordre d'achèvement, colonne row = rang).
+    Au plus max_in_flight demandes sont en cours : la mémoire reste constante
+    quelle que soit la taille du fichier. Renvoie le nombre de lignes traitées.
+    """
+    if max_workers <= 1:
+        n_rows = 0
+        for row_index, row in enumerate(rows):
+            sink.write(size_row(row_index, row))
+            n_rows += 1
+        return n_rows
+
+    if max_in_flight is None:
+        max_in_flight = 4 * max_workers
+
+    n_rows = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for row_index, row in enumerate(rows):
+            pending.add(pool.submit(size_row, row_index, row))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sink.write(future.result())
+                    n_rows += 1
+        for future in wait(pending).done:
+            sink.write(future.result())
+            n_rows += 1
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m sizing_engine",
+        description="Dimensionnement en lot depuis un CSV de demandes clients.",
+    )
+    parser.add_argument("input", help="CSV des demandes (colonnes : clés de DEFAULT_CONFIG, id optionnel)")
+    parser.add_argument("-o", "--output", default="-", help="fichier de résultats .csv ou .jsonl (défaut : stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="format de sortie (défaut : selon l'extension)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="processus de calcul")
+    parser.add_argument("--delimiter", default=",", help="séparateur du CSV d'entrée")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    out_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+
+    start = time.perf_counter()
+    try:
+        with open(args.input, newline="", encoding="utf-8-sig") as in_stream:
+            sink = _JsonlSink(out_stream) if fmt == "jsonl" else _CsvSink(out_stream)
+            rows = csv.DictReader(in_stream, delimiter=args.delimiter)
+            n_rows = run_batch(rows, sink, max_workers=args.workers)
+    finally:
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+    elapsed = time.perf_counter() - start
+    rate = n_rows / elapsed if elapsed > 0 else 0.0
+    print(f"{n_rows} lignes en {elapsed:.1f} s ({rate:.1f} lignes/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,312 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .battery import _clamp_prefix_scan, _unstored_export, simulate_battery_fast
+from .tariffs import DEFAULT_TARIFF, monthly_peaks, peak_mask, step_prices
+from .timegrid import time_grid
+
+# Stratégies de pilotage : nom -> fonction (mêmes arguments, même tuple de sorties)
+DISPATCH_STRATEGIES = {}
+
+# Pas de la grille de SOC du pilotage optimal (kWh)
+DP_SOC_STEP_KWH = 0.2
+
+
+def register_dispatch(name: str):
+    """Décorateur : ajoute une stratégie de pilotage à DISPATCH_STRATEGIES."""
+    def register(strategy):
+        DISPATCH_STRATEGIES[name] = strategy
+        return strategy
+    return register
+
+
+def simulate_dispatch(
+    pv_hourly,
+    cons_hourly,
+    battery_capacity_kwh: float,
+    strategy: str = "greedy",
+    charge_eff=0.95,
+    discharge_eff=0.95,
+    max_charge_power_kw=3.6,
+    max_discharge_power_kw=3.6,
+    step_minutes: int = 60,
+    tariff: dict | None = None,
+    **options,
+):
+    """
+    Simulation batterie avec la stratégie de pilotage `strategy` (clé de
+    DISPATCH_STRATEGIES) ; options : paramètres propres à la stratégie.
+    Renvoie (soc, autocons. directe, autocons. batterie, export, import),
+    comme simulate_battery_hourly. Lève ValueError si la stratégie est inconnue.
+    """
+    if strategy not in DISPATCH_STRATEGIES:
+        raise ValueError(f"Stratégie de pilotage inconnue : {strategy} (attendu : {tuple(DISPATCH_STRATEGIES)}).")
+    pv_hourly = np.asarray(pv_hourly, dtype=float)
+    cons_hourly = np.asarray(cons_hourly, dtype=float)
+    if battery_capacity_kwh <= 0:
+        ac_direct = np.minimum(pv_hourly, cons_hourly)
+        zeros = np.zeros_like(pv_hourly)
+        return zeros, ac_direct, zeros.copy(), pv_hourly - ac_direct, cons_hourly - ac_direct
+    return DISPATCH_STRATEGIES[strategy](
+        pv_hourly,
+        cons_hourly,
+        float(battery_capacity_kwh),
+        charge_eff=charge_eff,
+        discharge_eff=discharge_eff,
+        max_charge_power_kw=max_charge_power_kw,
+        max_discharge_power_kw=max_discharge_power_kw,
+        step_minutes=step_minutes,
+        tariff=tariff,
+        **options,
+    )
+
+
+# ----------------------------------------------------
+# AUTOCONSOMMATION (GLOUTON)
+# ----------------------------------------------------
+@register_dispatch("greedy")
+def dispatch_greedy(pv, cons, capacity, charge_eff, discharge_eff, max_charge_power_kw,
+                    max_discharge_power_kw, step_minutes, tariff=None):
+    """
+    Charge sur le surplus PV, décharge sur le déficit (simulate_battery_fast),
+    le surplus non stocké (batterie pleine) étant injecté comme pour les
+    autres stratégies (_unstored_export).
+    """
+    soc, ac_direct, ac_batt, _, grid_import = simulate_battery_fast(
+        pv,
+        cons,
+        capacity,
+        charge_eff=charge_eff,
+        discharge_eff=discharge_eff,
+        max_charge_power_kw=max_charge_power_kw,
+        max_discharge_power_kw=max_discharge_power_kw,
+        step_hours=step_minutes / 60.0,
+    )
+    return soc, ac_direct, ac_batt, _unstored_export(pv, cons, soc, charge_eff), grid_import
+
+
+# ----------------------------------------------------
+# ÉCRÊTAGE DES POINTES (SEUIL MENSUEL)
+# ----------------------------------------------------
+def _peak_shaving_flows(pv, cons, capacity, threshold_kwh, grid_charging, charge_eff, discharge_eff,
+                        max_charge_kwh, max_discharge_kwh):
+    """
+    Flux à seuil d'import donné (kWh par pas) : la batterie ne se décharge
+    que sur la part du déficit au-dessus du seuil ; elle se charge sur le
+    surplus PV et, aux pas où grid_charging (booléens), depuis le réseau
+    sous le seuil. Même forme « décalage puis écrêtage » que le glouton
+    (_clamp_prefix_scan) ; seuil nul sans recharge réseau = glouton, le
+    surplus PV non stocké (batterie pleine) étant injecté.
+    """
+    ac_direct = np.minimum(pv, cons)
+    surplus = pv - ac_direct
+    deficit = cons - ac_direct
+
+    charge_pv = np.minimum(surplus, max_charge_kwh)
+    headroom = np.where(grid_charging & (surplus <= 0), np.maximum(threshold_kwh - deficit, 0.0), 0.0)
+    charge_grid = np.minimum(headroom, max_charge_kwh)
+    charge_effective = (charge_pv + charge_grid) * charge_eff
+    discharge_wanted = np.minimum(np.maximum(deficit - threshold_kwh, 0.0), max_discharge_kwh) / discharge_eff
+
+    soc_scan = _clamp_prefix_scan(
+        charge_effective - discharge_wanted,
+        np.zeros_like(discharge_wanted),
+        np.maximum(capacity - discharge_wanted, 0.0),
+    )
+    soc_prev = np.concatenate(([0.0], soc_scan[:-1]))
+    soc_charged = np.minimum(capacity, soc_prev + charge_effective)
+    discharge_effective = np.minimum(discharge_wanted, soc_charged)
+    soc_series = soc_charged - discharge_effective
+
+    ac_batt = discharge_effective * discharge_eff
+    # Charge PV ou réseau : seulement l'énergie réellement stockée
+    stored = (soc_charged - soc_prev) / charge_eff
+    grid_charged = np.where(charge_grid > 0, stored, 0.0)
+    grid_export = surplus - np.where(charge_pv > 0, stored, 0.0)
+    grid_import = deficit - ac_batt + grid_charged
+    return soc_series, ac_direct, ac_batt, grid_export, grid_import
+
+
+@register_dispatch("peak_shaving")
+def dispatch_peak_shaving(pv, cons, capacity, charge_eff, discharge_eff, max_charge_power_kw,
+                          max_discharge_power_kw, step_minutes, tariff=None,
+                          peak_threshold_kw=None, grid_charging=True, iterations=30):
+    """
+    Écrêtage des pointes pour le tarif capacitaire : la batterie est gardée
+    pour ramener l'import sous un seuil mensuel (kW, scalaire ou 12 valeurs).
+    Recharge sur le surplus PV et, si grid_charging, depuis le réseau en
+    heures creuses sans dépasser le seuil.
+
+    peak_threshold_kw = None : seuil de chaque mois le plus bas tenu par la
+    batterie, par dichotomie sur les 12 mois à la fois (une simulation de
+    l'année par itération), sans descendre sous la pointe minimale facturée.
+    Les mois sans pointe à écrêter (seuil ≥ pointe sans batterie) sont
+    pilotés en autoconsommation (glouton).
+    """
+    grid = time_grid(step_minutes)
+    step_hours = step_minutes / 60.0
+    args = (charge_eff, discharge_eff, max_charge_power_kw * step_hours, max_discharge_power_kw * step_hours)
+    tariff = {**DEFAULT_TARIFF, **(tariff or {})}
+    unshaved = monthly_peaks(cons - np.minimum(pv, cons), step_minutes)
+    # Recharge réseau en heures creuses seulement
+    offpeak = grid_charging & ~peak_mask(step_minutes, tariff)
+
+    def flows(threshold_kw):
+        active = threshold_kw < unshaved
+        threshold_kwh = np.where(active, threshold_kw, 0.0)[grid.month] * step_hours
+        return _peak_shaving_flows(pv, cons, capacity, threshold_kwh, offpeak & active[grid.month], *args)
+
+    if peak_threshold_kw is not None:
+        return flows(np.broadcast_to(np.asarray(peak_threshold_kw, dtype=float), (12,)))
+
+    high = unshaved
+    low = np.minimum(float(tariff["capacity_min_kw"]), high)
+    for _ in range(iterations):
+        threshold = (low + high) / 2.0
+        held = monthly_peaks(flows(threshold)[4], step_minutes) <= threshold + 1e-9
+        high = np.where(held, threshold, high)
+        low = np.where(held, low, threshold)
+    return flows(high)
+
+
+# ----------------------------------------------------
+# COÛT OPTIMAL (PROGRAMMATION DYNAMIQUE SUR UNE GRILLE DE SOC)
+# ----------------------------------------------------
+def _move_flows(moves, surplus, deficit, import_price, export_price, cap_kwh, charge_eff, discharge_eff,
+                grid_charging, penalty):
+    """
+    Flux et coût d'une variation de SOC (kWh stockés, négatif = décharge),
+    par diffusion (pas, candidats) : la charge prend le surplus PV puis le
+    réseau, la décharge alimente la conso. Coût infini si non réalisable ;
+    l'import au-delà de cap_kwh coûte en plus penalty par kWh.
+    """
+    charge_ac = np.maximum(moves, 0.0) / charge_eff
+    from_pv = np.minimum(charge_ac, surplus)
+    from_grid = charge_ac - from_pv
+    delivered = np.maximum(-moves, 0.0) * discharge_eff
+    grid_import = deficit - delivered + from_grid
+    grid_export = surplus - from_pv
+    feasible = delivered <= deficit + 1e-9
+    if not grid_charging:
+        feasible &= from_grid <= 1e-9
+    cost = grid_import * import_price - grid_export * export_price + np.maximum(grid_import - cap_kwh, 0.0) * penalty
+    cost = np.where(feasible, cost, np.inf)
+    return cost, delivered, grid_export, grid_import
+
+
+@register_dispatch("cost_optimal")
+def dispatch_cost_optimal(pv, cons, capacity, charge_eff, discharge_eff, max_charge_power_kw,
+                          max_discharge_power_kw, step_minutes, tariff=None,
+                          grid_charging=False, soc_step_kwh=DP_SOC_STEP_KWH, peak_cap_kw=None):
+    """
+    Pilotage de coût minimal (prix par pas de step_prices : heures pleines /
+    creuses ou tarif dynamique) par programmation dynamique sur un SOC
+    discrétisé au pas soc_step_kwh, les journées s'enchaînant par le SOC de
+    fin de jour sur toute l'année.
+
+    Actions de chaque pas : une variation de SOC d'un nombre entier de pas
+    de grille, ou charger tout le surplus / couvrir tout le déficit (actions
+    continues, valeur interpolée) pour ne pas perdre les petits flux entre
+    deux points. La récurrence arrière est vectorisée sur les états
+    (fenêtres glissantes de la valeur du pas suivant) et ne garde que la
+    valeur courante et la table des décisions (pas, états) en petits
+    entiers. La trajectoire est ensuite suivie en SOC continu depuis une
+    batterie vide, avec la décision du point de grille le plus proche (cible
+    ramenée dans la plage accessible).
+
+    Tarif capacitaire : l'import au-delà d'un seuil mensuel peak_cap_kw (kW,
+    scalaire ou 12 valeurs, jamais sous la pointe minimale facturée) est
+    pénalisé au prix d'un kW de pointe du mois. Par défaut, avec recharge
+    réseau, le seuil est la pointe de chaque mois du pilotage sans recharge
+    réseau : la recharge ne relève pas la pointe facturée. La pointe n'est
+    pas réduite activement (voir peak_shaving).
+    """
+    step_hours = step_minutes / 60.0
+    tariff = {**DEFAULT_TARIFF, **(tariff or {})}
+    capacity_price = float(tariff["capacity_eur_kw_year"])
+    if peak_cap_kw is None and grid_charging and capacity_price > 0:
+        unaided = dispatch_cost_optimal(
+            pv, cons, capacity, charge_eff, discharge_eff, max_charge_power_kw, max_discharge_power_kw,
+            step_minutes, tariff, grid_charging=False, soc_step_kwh=soc_step_kwh,
+        )
+        peak_cap_kw = monthly_peaks(unaided[4], step_minutes)
+    if peak_cap_kw is None:
+        cap_kwh, penalty = np.full(len(pv), np.inf), 0.0
+    else:
+        cap_kw = np.maximum(np.broadcast_to(np.asarray(peak_cap_kw, dtype=float), (12,)), tariff["capacity_min_kw"])
+        cap_kwh = cap_kw[time_grid(step_minutes).month] * step_hours
+        # Un kWh au-delà du seuil sur un pas = 1/step_hours kW de pointe du mois
+        penalty = capacity_price / 12.0 / step_hours
+
+    import_price, export_price = step_prices(tariff, step_minutes)
+    ac_direct = np.minimum(pv, cons)
+    surplus = pv - ac_direct
+    deficit = cons - ac_direct
+    prices = (import_price, export_price, cap_kwh, charge_eff, discharge_eff, grid_charging, penalty)
+
+    n_states = max(int(round(capacity / soc_step_kwh)), 1) + 1
+    levels = np.linspace(0.0, capacity, n_states)
+    delta = levels[1]
+    max_charge = max_charge_power_kw * step_hours * charge_eff
+    max_discharge = max_discharge_power_kw * step_hours / discharge_eff
+    up = int(np.floor(max_charge / delta + 1e-9))
+    down = int(np.floor(max_discharge / delta + 1e-9))
+    moves = np.arange(-down, up + 1) * delta
+
+    # Actions continues : tout le surplus en charge, tout le déficit en décharge
+    charge_all = np.minimum(surplus * charge_eff, max_charge)
+    discharge_all = np.minimum(deficit / discharge_eff, max_discharge)
+    CHARGE_ALL, DISCHARGE_ALL = len(moves), len(moves) + 1
+
+    def continuous_targets(t, soc):
+        return np.minimum(soc + charge_all[t], capacity), np.maximum(soc - discharge_all[t], 0.0)
+
+    # Coûts des variations de grille, indépendants du SOC : (pas, variations)
+    per_step = (surplus[:, None], deficit[:, None], import_price[:, None], export_price[:, None], cap_kwh[:, None],
+                *prices[3:])
+    grid_cost = _move_flows(moves[None, :], *per_step)[0]
+
+    # Récurrence arrière : following = coût minimal du pas suivant à la fin
+    # de l'année, par état ; decisions[t] = action retenue depuis chaque état
+    n_steps = len(pv)
+    decisions = np.empty((n_steps, n_states), dtype=np.int8 if len(moves) + 2 <= 127 else np.int16)
+    following = np.zeros(n_states)
+    states = np.arange(n_states)
+    padded = np.full(n_states + down + up, np.inf)
+    windows = sliding_window_view(padded, len(moves))
+    for t in range(n_steps - 1, -1, -1):
+        padded[down:down + n_states] = following
+        totals = windows + grid_cost[t]
+        action = totals.argmin(axis=1)
+        best = totals[states, action]
+        for continuous, to_soc in zip((CHARGE_ALL, DISCHARGE_ALL), continuous_targets(t, levels)):
+            value = _move_flows(to_soc - levels, surplus[t], deficit[t], import_price[t], export_price[t],
+                                cap_kwh[t], *prices[3:])[0] + np.interp(to_soc, levels, following)
+            better = value < best
+            best = np.where(better, value, best)
+            action[better] = continuous
+        decisions[t] = action
+        following = best
+
+    # Trajectoire en SOC continu : décision du point de grille le plus proche
+    soc_series = np.empty(n_steps)
+    soc = 0.0
+    for t in range(n_steps):
+        state = int(round(soc / delta))
+        action = decisions[t, state]
+        if action == CHARGE_ALL:
+            soc = continuous_targets(t, soc)[0]
+        elif action == DISCHARGE_ALL:
+            soc = continuous_targets(t, soc)[1]
+        else:
+            highest, lowest = continuous_targets(t, soc)
+            if grid_charging:
+                # Recharge réseau sous le seuil d'import
+                headroom = max(cap_kwh[t] - deficit[t], 0.0)
+                highest = min(soc + max_charge, soc + (surplus[t] + headroom) * charge_eff, capacity)
+            soc = min(max(levels[state] + moves[action], lowest), highest)
+        soc_series[t] = soc
+
+    soc_prev = np.concatenate(([0.0], soc_series[:-1]))
+    _, delivered, grid_export, grid_import = _move_flows(soc_series - soc_prev, surplus, deficit, *prices)
+    return soc_series, ac_direct, delivered, grid_export, grid_import
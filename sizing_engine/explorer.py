@@ -0,0 +1,266 @@
+import functools
+
+import numpy as np
+
+from .battery import _unstored_export, simulate_battery_fast
+from .catalog import get_inverter_elec, get_panel_elec
+from .profiles import generate_pv_profile_hourly, monthly_pv_profile_kwh_kwp
+from .profiling import count, span
+from .pvmodel import apply_pv_losses
+from .tariffs import energy_bill, installation_cost, payback_period
+from .wiring import candidate_inverters, optimize_strings_table, strings_label
+
+# Taille d'un bloc de simulation (scénarios × pas) : borne la mémoire
+EXPLORER_BLOCK_CELLS = 1_000_000
+
+
+# ----------------------------------------------------
+# FRONT DE PARETO
+# ----------------------------------------------------
+def pareto_front(objectives, block: int = 256) -> np.ndarray:
+    """
+    Points non dominés d'un tableau (points, critères) à minimiser : un point
+    est dominé si un autre est au moins aussi bon sur tous les critères et
+    strictement meilleur sur l'un d'eux. Comparaisons vectorisées par blocs.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    n = len(objectives)
+    efficient = np.ones(n, dtype=bool)
+    for start in range(0, n, block):
+        points = objectives[start:start + block, None, :]
+        not_worse = (objectives[None, :, :] <= points).all(axis=-1)
+        better = (objectives[None, :, :] < points).any(axis=-1)
+        efficient[start:start + block] = ~(not_worse & better).any(axis=1)
+    return efficient
+
+
+# ----------------------------------------------------
+# CONFIGURATIONS CANDIDATES (MODULES × ONDULEUR)
+# ----------------------------------------------------
+@functools.lru_cache(maxsize=256)
+def _explorer_wiring_table(panel_id, inverter_id, t_min, t_max, max_dc_ac, n_max):
+    table = optimize_strings_table(
+        get_panel_elec(panel_id),
+        get_inverter_elec(inverter_id),
+        t_min,
+        t_max,
+        ratio_dc_ac_min=0.8,
+        ratio_dc_ac_max=max_dc_ac,
+        N_max=n_max,
+    )
+    table.setflags(write=False)
+    return table
+
+
+@functools.lru_cache(maxsize=8)
+def _pv_per_kwp(step_minutes):
+    pv = generate_pv_profile_hourly(monthly_pv_profile_kwh_kwp(), step_minutes)
+    pv.setflags(write=False)
+    return pv
+
+
+def candidate_designs(
+    panel_id: str,
+    n_modules_range,
+    grid_type: str,
+    fam_pref: str | None = None,
+    max_dc_ac: float = 1.35,
+    t_min: float = -10.0,
+    t_max: float = 70.0,
+    costs: dict | None = None,
+) -> list:
+    """
+    Couples (nombre de modules, onduleur) réalisables, chacun avec son
+    câblage optimal (tables de optimize_strings_table, ratio ≤ max_dc_ac,
+    P_dc ≤ P_DC_max). La production ne dépend que de P_dc et de P_ac
+    (écrêtage) : pour un même câblage (modules câblés, P_dc) et une même
+    P_ac, seul l'onduleur le moins cher est gardé.
+    """
+    n_lo, n_hi = int(n_modules_range[0]), int(n_modules_range[1])
+    best = {}
+    for _, inverter in candidate_inverters(grid_type, fam_pref):
+        table = _explorer_wiring_table(panel_id, inverter["id"], t_min, t_max, float(max_dc_ac), n_hi)
+        rows = table[n_lo:n_hi + 1]
+        ok = rows["valid"] & (rows["P_dc"] <= inverter["P_dc_max"])
+        count("explorer.infeasible", int((~ok).sum()))
+        for row in rows[ok]:
+            p_dc = float(row["P_dc"])
+            key = (int(row["N_used"]), p_dc, inverter["P_ac"])
+            cost = float(installation_cost(p_dc, 0.0, costs, p_ac_w=inverter["P_ac"]))
+            if key in best:
+                count("explorer.costlier_inverters")
+                if best[key]["cost"] <= cost:
+                    continue
+            best[key] = {
+                "n_modules": key[0],
+                "inverter_id": inverter["id"],
+                "P_ac": inverter["P_ac"],
+                "strings": [int(L) for L in row["strings"]],
+                "parallel": [int(k) for k in row["parallel"]],
+                "P_dc": p_dc,
+                "ratio_dc_ac": float(row["ratio_dc_ac"]),
+                "cost": cost,
+            }
+    return [best[key] for key in sorted(best)]
+
+
+# ----------------------------------------------------
+# EXPLORATION (SIMULATION PAR LOTS)
+# ----------------------------------------------------
+def explore_design_space(
+    panel_id: str,
+    cons_hourly,
+    n_modules_range=(6, 30),
+    battery_capacities=(0.0,),
+    grid_type: str = "Mono",
+    fam_pref: str | None = None,
+    max_dc_ac: float = 1.35,
+    t_min: float = -10.0,
+    t_max: float = 70.0,
+    costs: dict | None = None,
+    tariff: dict | None = None,
+    max_cost: float | None = None,
+    step_minutes: int = 60,
+    pv_losses: bool = False,
+) -> dict:
+    """
+    Balayage modules × onduleur × capacité batterie et front de Pareto
+    coût / autoconsommation / couverture.
+
+    - élagage avant simulation : câblages impossibles, onduleurs plus
+      chers pour un même câblage et une même P_ac, candidats au-delà de
+      max_cost ;
+    - élagage des capacités saturées : une simulation sans limite de
+      capacité donne, par configuration, le SOC maximal atteint ; les
+      capacités au-delà de la première qui le couvre ne sont pas simulées
+      (mêmes flux) et sont écartées (même résultat, plus chères : dominées) ;
+    - production : un profil à 1 kWc, mis à l'échelle de chaque P_dc, puis
+      échauffement et écrêtage à P_ac si pv_losses (apply_pv_losses) ;
+    - simulation : tous les couples ((P_dc, P_ac), capacité) d'un bloc à la
+      fois (simulate_battery_fast sur des piles (P_dc, capacités, pas)).
+
+    Renvoie une colonne (tableau ou liste) par grandeur, une valeur par
+    candidat, dont "pareto" (booléens), et les compteurs d'élagage ("stats").
+    """
+    cons_hourly = np.asarray(cons_hourly, dtype=float)
+    capacities = np.unique(np.asarray(battery_capacities, dtype=float))
+    step_hours = step_minutes / 60.0
+
+    with span("Exploration : candidats"):
+        designs = candidate_designs(
+            panel_id, n_modules_range, grid_type, fam_pref, max_dc_ac, t_min, t_max, costs
+        )
+    design_idx = np.repeat(np.arange(len(designs)), len(capacities))
+    p_dc = np.array([d["P_dc"] for d in designs])[design_idx]
+    p_ac = np.array([d["P_ac"] for d in designs])[design_idx]
+    battery_kwh = np.tile(capacities, len(designs))
+    cost = installation_cost(p_dc, battery_kwh, costs, p_ac_w=p_ac)
+
+    keep = np.ones(len(cost), dtype=bool) if max_cost is None else cost <= max_cost
+    count("explorer.over_budget", int((~keep).sum()))
+    design_idx = design_idx[keep]
+    p_dc, battery_kwh, cost = p_dc[keep], battery_kwh[keep], cost[keep]
+
+    # Couples ((kWc, P_ac), capacité) à simuler : un profil par kWc et
+    # puissance AC (écrêtage), quel que soit l'onduleur ; sans pertes, un par kWc
+    p_ac = p_ac[keep] if pv_losses else np.zeros_like(p_dc)
+    plants, kwp_idx = np.unique(np.column_stack((p_dc, p_ac)), axis=0, return_inverse=True)
+    kwp_idx = kwp_idx.ravel()
+    kwp_values = plants[:, 0] / 1000.0
+    capacities, cap_idx = np.unique(battery_kwh, return_inverse=True)
+    pv_kwp = _pv_per_kwp(step_minutes)
+    n_steps = len(pv_kwp)
+    ac_total = np.zeros((len(kwp_values), len(capacities)))
+    import_year = np.zeros_like(ac_total)
+    export_year = np.zeros_like(ac_total)
+    bill_total = np.zeros_like(ac_total)
+    plant_pv_year = np.zeros(len(kwp_values))
+    saturated_kwh = np.full(len(kwp_values), np.inf)
+    simulated = 0
+    count("explorer.scenarios", ac_total.size)
+
+    cons_year = cons_hourly.sum()
+    with span("Exploration : simulation"):
+        block = max(1, EXPLORER_BLOCK_CELLS // (n_steps * max(len(capacities), 1)))
+        for start in range(0, len(kwp_values), block):
+            rows = slice(start, start + block)
+            pv = kwp_values[rows, None] * pv_kwp[None, :]
+            if pv_losses:
+                pv, _, _ = apply_pv_losses(pv, plants[rows, 0], plants[rows, 1], step_minutes=step_minutes)
+            ac_direct = np.minimum(pv, cons_hourly)
+            grid_import = np.repeat((cons_hourly - ac_direct)[:, None, :], len(capacities), axis=1)
+            grid_export = np.repeat((pv - ac_direct)[:, None, :], len(capacities), axis=1)
+
+            with_battery = capacities > 0
+            if with_battery.any():
+                # Saturation : SOC maximal sans limite de capacité. Au-delà, la
+                # capacité ne borne jamais le SOC : mêmes flux que la première
+                # capacité saturée, seules les capacités jusqu'à celle-ci sont simulées
+                soc, _, _, _, _ = simulate_battery_fast(pv, cons_hourly, pv.sum(axis=1) + 1.0, step_hours=step_hours)
+                battery_caps = capacities[with_battery]
+                first_saturated = np.searchsorted(battery_caps, soc.max(axis=1) - 1e-9)
+                saturated_kwh[rows] = np.where(
+                    first_saturated < len(battery_caps),
+                    battery_caps[np.minimum(first_saturated, len(battery_caps) - 1)],
+                    np.inf,
+                )
+                n_simulated = min(int(first_saturated.max()) + 1, len(battery_caps))
+                simulated += len(pv) * n_simulated
+                soc_b, _, _, _, imp_b = simulate_battery_fast(
+                    pv[:, None, :],
+                    cons_hourly,
+                    battery_caps[:n_simulated],
+                    step_hours=step_hours,
+                )
+                exp_b = _unstored_export(pv[:, None, :], cons_hourly, soc_b)
+                same_as = np.minimum(np.arange(len(battery_caps))[None, :], first_saturated[:, None])
+                block_rows = np.arange(len(pv))[:, None]
+                grid_import[:, with_battery] = imp_b[block_rows, same_as]
+                grid_export[:, with_battery] = exp_b[block_rows, same_as]
+
+            plant_pv_year[rows] = pv.sum(axis=1)
+            import_year[rows] = grid_import.sum(axis=-1)
+            export_year[rows] = grid_export.sum(axis=-1)
+            # Autoconsommation = conso - import (garantie ≤ PV et ≤ conso)
+            ac_total[rows] = np.minimum(cons_year - import_year[rows], np.minimum(plant_pv_year[rows, None], cons_year))
+            bill_total[rows] = energy_bill(grid_import, grid_export, tariff, step_minutes)["total"]
+
+    # Capacités au-delà de la saturation : mêmes flux, plus chères que la
+    # capacité saturée de la même configuration, donc dominées
+    keep = battery_kwh <= saturated_kwh[kwp_idx]
+    count("explorer.saturated", int((~keep).sum()))
+    design_idx, kwp_idx, cap_idx = design_idx[keep], kwp_idx[keep], cap_idx[keep]
+    p_dc, battery_kwh, cost = p_dc[keep], battery_kwh[keep], cost[keep]
+
+    pv_year = plant_pv_year[kwp_idx]
+    ac = ac_total[kwp_idx, cap_idx]
+    taux_auto = np.where(pv_year > 0, ac / np.where(pv_year > 0, pv_year, 1.0) * 100, 0.0)
+    taux_couv = ac / cons_year * 100 if cons_year > 0 else np.zeros(len(ac))
+    savings = energy_bill(cons_hourly, None, tariff, step_minutes)["total"] - bill_total[kwp_idx, cap_idx]
+
+    pareto = pareto_front(np.column_stack((cost, -taux_auto, -taux_couv)))
+    count("explorer.pareto", int(pareto.sum()))
+
+    return {
+        "n_modules": np.array([designs[i]["n_modules"] for i in design_idx], dtype=int),
+        "inverter_id": [designs[i]["inverter_id"] for i in design_idx],
+        "strings": [strings_label(designs[i]) for i in design_idx],
+        "P_dc": p_dc,
+        "ratio_dc_ac": np.array([designs[i]["ratio_dc_ac"] for i in design_idx]),
+        "battery_kwh": battery_kwh,
+        "cost": cost,
+        "pv_year": pv_year,
+        "taux_auto": taux_auto,
+        "taux_couv": taux_couv,
+        "import_year": import_year[kwp_idx, cap_idx],
+        "export_year": export_year[kwp_idx, cap_idx],
+        "annual_savings": savings,
+        "payback_years": payback_period(cost, savings),
+        "pareto": pareto,
+        "stats": {
+            "designs": len(designs),
+            "candidates": int(len(cost)),
+            "simulated": int(simulated),
+            "saturated": int((~keep).sum()),
+        },
+    }
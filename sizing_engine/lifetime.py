@@ -0,0 +1,149 @@
+import numpy as np
+
+from .battery import _unstored_export, simulate_battery_fast
+from .dispatch import simulate_dispatch
+
+
+# ----------------------------------------------------
+# HYPOTHÈSES DE VIEILLISSEMENT
+# ----------------------------------------------------
+LIFETIME_YEARS = 25
+PANEL_DEGRADATION = 0.005      # perte de production par an (0.5 %/an)
+BATTERY_CYCLE_FADE = 0.00005   # perte de capacité par cycle équivalent (30 % à 6000 cycles)
+BATTERY_CALENDAR_FADE = 0.0    # perte de capacité par an, hors cycles
+
+
+def equivalent_cycles(soc_series, capacity_kwh):
+    """
+    Cycles complets équivalents d'une série de SOC (..., pas) : demi-somme
+    des variations de SOC rapportée à la capacité nominale.
+    """
+    soc_series = np.asarray(soc_series, dtype=float)
+    if capacity_kwh <= 0:
+        return np.zeros(soc_series.shape[:-1])
+    swing = np.abs(np.diff(soc_series, axis=-1, prepend=0.0)).sum(axis=-1)
+    return swing / (2.0 * capacity_kwh)
+
+
+def simulate_lifetime(
+    pv_hourly,
+    cons_hourly,
+    battery_kwh: float,
+    years: int = LIFETIME_YEARS,
+    panel_degradation: float = PANEL_DEGRADATION,
+    cycle_fade: float = BATTERY_CYCLE_FADE,
+    calendar_fade: float = BATTERY_CALENDAR_FADE,
+    step_minutes: int = 60,
+    tol: float = 1e-6,
+    dispatch: str = "greedy",
+    tariff: dict | None = None,
+    dispatch_options: dict | None = None,
+) -> dict:
+    """
+    Simulation sur la durée de vie : toutes les années d'un bloc, en
+    tableaux (années, pas).
+
+    - production de l'année y : profil neuf × (1 - panel_degradation)^y ;
+    - capacité batterie de l'année y : capacité × SOH, le SOH (début
+      d'année) diminuant de cycle_fade par cycle équivalent des années
+      précédentes (et de calendar_fade par an) ;
+    - consommation identique chaque année.
+
+    Le SOH dépend des cycles des années précédentes, qui dépendent du SOH :
+    point fixe, chaque itération simulant d'un bloc les années dont le SOH
+    a changé (simulate_battery_fast, même modèle que simulate_battery_hourly).
+    La dépendance étant triangulaire, le point fixe est exact en au plus
+    `years` itérations (2 à 4 en pratique).
+
+    dispatch : stratégie de pilotage de la batterie (simulate_dispatch, avec
+    tariff et dispatch_options). Hors glouton, les stratégies simulant une
+    série à la fois, la dépendance triangulaire est résolue en un seul
+    passage, année après année (`years` simulations).
+
+    Renvoie des tableaux (années,) : production, autoconsommation,
+    import / export, taux, SOH et cycles de la batterie.
+    """
+    pv_hourly = np.asarray(pv_hourly, dtype=float)
+    cons_hourly = np.asarray(cons_hourly, dtype=float)
+    step_hours = step_minutes / 60.0
+    year_index = np.arange(years)
+
+    panel_factor = (1.0 - panel_degradation) ** year_index
+    pv = panel_factor[:, None] * pv_hourly[None, :]
+    cons = np.broadcast_to(cons_hourly, pv.shape)
+
+    ac_direct = np.minimum(pv, cons)
+    ac_batt_year = np.zeros(years)
+    export_year = (pv - ac_direct).sum(axis=1)
+    import_year = (cons - ac_direct).sum(axis=1)
+    cycles = np.zeros(years)
+    soh = np.ones(years)
+    iterations = 0
+
+    calendar = 1.0 - calendar_fade * year_index
+    if battery_kwh > 0 and dispatch != "greedy":
+        iterations = 1
+        for y in year_index:
+            soh[y] = np.clip(calendar[y] - cycle_fade * cycles[:y].sum(), 0.0, 1.0)
+            soc, _, ac_batt, grid_export, grid_import = simulate_dispatch(
+                pv[y],
+                cons[y],
+                battery_kwh * soh[y],
+                dispatch,
+                step_minutes=step_minutes,
+                tariff=tariff,
+                **(dispatch_options or {}),
+            )
+            cycles[y] = equivalent_cycles(soc, battery_kwh)
+            ac_batt_year[y] = ac_batt.sum()
+            export_year[y] = grid_export.sum()
+            import_year[y] = grid_import.sum()
+
+    elif battery_kwh > 0:
+        soh = np.clip(calendar, 0.0, 1.0)
+        todo = year_index
+        while len(todo):
+            iterations += 1
+            soc, _, ac_batt, _, grid_import = simulate_battery_fast(
+                pv[todo],
+                cons[todo],
+                battery_kwh * soh[todo],
+                step_hours=step_hours,
+            )
+            cycles[todo] = equivalent_cycles(soc, battery_kwh)
+            ac_batt_year[todo] = ac_batt.sum(axis=1)
+            export_year[todo] = _unstored_export(pv[todo], cons[todo], soc).sum(axis=1)
+            import_year[todo] = grid_import.sum(axis=1)
+
+            previous_cycles = np.concatenate(([0.0], np.cumsum(cycles)[:-1]))
+            new_soh = np.clip(calendar - cycle_fade * previous_cycles, 0.0, 1.0)
+            todo = np.flatnonzero(np.abs(new_soh - soh) > tol)
+            soh = new_soh
+
+    pv_year = pv.sum(axis=1)
+    cons_year = cons.sum(axis=1)
+    ac_direct_year = ac_direct.sum(axis=1)
+    # Garantir AC ≤ PV et ≤ conso
+    ac_total_year = np.minimum(ac_direct_year + ac_batt_year, np.minimum(pv_year, cons_year))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taux_auto = np.where(pv_year > 0, ac_total_year / pv_year * 100, 0.0)
+        taux_couv = np.where(cons_year > 0, ac_total_year / cons_year * 100, 0.0)
+
+    return {
+        "year": year_index + 1,
+        "panel_factor": panel_factor,
+        "battery_soh": soh,
+        "battery_capacity_kwh": battery_kwh * soh,
+        "battery_cycles": cycles,
+        "pv_year": pv_year,
+        "cons_year": cons_year,
+        "ac_direct_year": ac_direct_year,
+        "ac_batt_year": ac_batt_year,
+        "ac_total_year": ac_total_year,
+        "import_year": import_year,
+        "export_year": export_year,
+        "taux_auto": taux_auto,
+        "taux_couv": taux_couv,
+        "iterations": iterations,
+    }
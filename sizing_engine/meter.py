@@ -0,0 +1,364 @@
+import csv
+import hashlib
+import io
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ----------------------------------------------------
+# FORMAT DES EXPORTS FLUVIUS (QUART-HORAIRE)
+# ----------------------------------------------------
+# En-têtes acceptés (export néerlandais ou français) -> colonne interne
+COLUMN_ALIASES = {
+    "date": ("Van (datum)", "Date de début"),
+    "time": ("Van (tijdstip)", "Heure de début"),
+    "register": ("Register", "Registre"),
+    "volume": ("Volume",),
+    "unit": ("Eenheid", "Unité"),
+}
+
+# Registres : préfixe -> flux (prélèvement réseau ou injection)
+REGISTER_KINDS = {
+    "afname": "consumption",
+    "prélèvement": "consumption",
+    "prelevement": "consumption",
+    "injectie": "injection",
+    "injection": "injection",
+}
+
+METER_STEP_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // METER_STEP_MINUTES
+DAYS_PER_YEAR = 365
+
+
+class MeterDataError(ValueError):
+    """Fichier de relevés illisible ou incomplet."""
+
+
+def _resolve_columns(fieldnames) -> dict:
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        found = next((name for name in aliases if name in fieldnames), None)
+        if found is None and key != "unit":
+            raise MeterDataError(f"Colonne manquante dans le fichier de relevés : {aliases[0]}.")
+        columns[key] = found
+    return columns
+
+
+def _register_kind(register: str):
+    name = register.strip().lower()
+    for prefix, kind in REGISTER_KINDS.items():
+        if name.startswith(prefix):
+            return kind
+    return None
+
+
+def _to_float(values: list) -> np.ndarray:
+    """Volumes (virgule décimale acceptée) ; valeurs vides ou invalides -> NaN."""
+    values = [v.replace(",", ".") for v in values]
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+def _to_minutes(dates: list, times: list, memo: dict) -> np.ndarray:
+    """
+    Dates JJ-MM-AAAA (ou JJ/MM/AAAA) + heures HH:MM[:SS] -> minutes depuis
+    1970 (heure locale). Chaque date et chaque heure distincte n'est
+    convertie qu'une fois (`memo`, partagé entre les blocs).
+    """
+    new_dates = {d for d in dates if d not in memo}
+    new_times = {t for t in times if t not in memo}
+    try:
+        for d in new_dates:
+            memo[d] = int(np.datetime64(f"{d[6:10]}-{d[3:5]}-{d[0:2]}", "m").astype(np.int64))
+        for t in new_times:
+            hours, minutes = int(t[0:2]), int(t[3:5])
+            if not (0 <= hours < 24 and 0 <= minutes < 60):
+                raise ValueError(t)
+            memo[t] = hours * 60 + minutes
+    except ValueError:
+        raise MeterDataError("Date ou heure invalide dans le fichier de relevés.") from None
+    return np.array([memo[d] + memo[t] for d, t in zip(dates, times)], dtype=np.int64)
+
+
+# ----------------------------------------------------
+# LECTURE PAR BLOCS
+# ----------------------------------------------------
+def _parse_chunks(text, delimiter: str, chunk_rows: int):
+    """
+    Lit le fichier par blocs de `chunk_rows` lignes et renvoie, pour chaque
+    bloc, (minutes, registre, flux, volume) en tableaux numpy.
+    """
+    reader = csv.reader(text, delimiter=delimiter)
+    header = [f.strip() for f in next(reader, [])]
+    if not header:
+        raise MeterDataError("Fichier de relevés vide.")
+    columns = _resolve_columns(header)
+    col = {key: header.index(name) for key, name in columns.items() if name is not None}
+    n_cols = max(col.values()) + 1
+
+    registers = {}
+    stamps = {}
+    while True:
+        rows = [r for r in itertools.islice(reader, chunk_rows) if len(r) >= n_cols]
+        if not rows:
+            break
+
+        if "unit" in col:
+            units = {r[col["unit"]].strip().lower() for r in rows} - {""}
+            if units - {"kwh"}:
+                raise MeterDataError(f"Unité non supportée : {', '.join(sorted(units))} (kWh attendu).")
+
+        kinds = []
+        register_ids = []
+        for r in rows:
+            register = r[col["register"]].strip()
+            kinds.append(_register_kind(register))
+            register_ids.append(registers.setdefault(register, len(registers)))
+
+        keep = np.array([k is not None for k in kinds])
+        minutes = _to_minutes(
+            [r[col["date"]].strip() for r in rows],
+            [r[col["time"]].strip() for r in rows],
+            stamps,
+        )
+        volume = _to_float([r[col["volume"]].strip() for r in rows])
+        injection = np.array([k == "injection" for k in kinds])
+
+        yield (
+            minutes[keep],
+            np.array(register_ids, dtype=np.int64)[keep],
+            injection[keep],
+            volume[keep],
+        )
+
+
+def _slot_of_year(minutes: np.ndarray):
+    """
+    Minutes depuis 1970 -> (année, rang du quart d'heure dans l'année de
+    365 jours). Rang -1 pour le 29 février.
+    """
+    day = minutes // (24 * 60)
+    year = day.astype("datetime64[D]").astype("datetime64[Y]")
+    day_of_year = day - year.astype("datetime64[D]").astype(np.int64)
+    year = year.astype(np.int64) + 1970
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    feb29 = leap & (day_of_year == 31 + 28)
+    day_of_year = day_of_year - (leap & (day_of_year > 31 + 28))
+    slot = day_of_year * SLOTS_PER_DAY + (minutes % (24 * 60)) // METER_STEP_MINUTES
+    return year, np.where(feb29, -1, slot)
+
+
+def parse_meter_csv(
+    text,
+    step_minutes: int = 60,
+    delimiter: str = ";",
+    chunk_rows: int = 50_000,
+    min_coverage: float = 0.9,
+) -> dict:
+    """
+    Analyse un export Fluvius quart-horaire (flux texte), par blocs : chaque
+    bloc est validé puis cumulé dans des accumulateurs par année et par
+    registre (somme et nombre de relevés de chaque quart d'heure), la
+    mémoire ne dépend pas de la longueur du fichier mais du nombre d'années.
+
+    - relevés en double (ex. heure répétée au passage à l'heure d'hiver,
+      export concaténé) : moyennés par registre et quart d'heure ;
+    - quarts d'heure manquants (ex. passage à l'heure d'été, lacunes) :
+      interpolés linéairement ;
+    - registres jour / nuit additionnés ; 29 février ignoré (année de 365 j) ;
+    - années couvertes à moins de `min_coverage` écartées.
+
+    Renvoie consumption / injection (kWh) de forme (années, pas de l'année)
+    au pas `step_minutes` (multiple de 15), les années retenues et un rapport.
+    """
+    if step_minutes % METER_STEP_MINUTES or (24 * 60) % step_minutes:
+        raise MeterDataError(f"Pas de temps non supporté : {step_minutes} min.")
+
+    n_slots = DAYS_PER_YEAR * SLOTS_PER_DAY
+    # (année, registre) -> [somme des volumes, nombre de relevés] par quart d'heure
+    accumulators = {}
+    register_injection = {}
+    report = {"rows": 0, "invalid": 0}
+    n_chunks = 0
+    for minutes, register, injection_rows, volume in _parse_chunks(text, delimiter, chunk_rows):
+        n_chunks += 1
+        # Volumes illisibles et horodatages hors grille quart-horaire : ignorés
+        valid = ~np.isnan(volume) & (minutes % METER_STEP_MINUTES == 0)
+        report["rows"] += int(len(minutes))
+        report["invalid"] += int(len(minutes) - valid.sum())
+        year, slot = _slot_of_year(minutes[valid])
+        register, volume = register[valid], volume[valid]
+        register_injection.update(zip(register.tolist(), injection_rows[valid].tolist()))
+
+        in_grid = slot >= 0
+        year, slot, register, volume = year[in_grid], slot[in_grid], register[in_grid], volume[in_grid]
+        for y, r in set(zip(year.tolist(), register.tolist())):
+            rows = (year == y) & (register == r)
+            total, count = accumulators.setdefault((y, r), [np.zeros(n_slots), np.zeros(n_slots, dtype=np.int64)])
+            total += np.bincount(slot[rows], weights=volume[rows], minlength=n_slots)
+            count += np.bincount(slot[rows], minlength=n_slots)
+
+    if not n_chunks:
+        raise MeterDataError("Aucun relevé de prélèvement ou d'injection dans le fichier.")
+    if not accumulators:
+        raise MeterDataError("Aucun volume valide dans le fichier de relevés.")
+
+    # Doublons : moyenne par registre ; registres d'un même flux additionnés
+    report["duplicates"] = int(sum(np.maximum(count - 1, 0).sum() for _, count in accumulators.values()))
+    flows = {}
+    for (y, r), (total, count) in accumulators.items():
+        kind = "injection" if register_injection[r] else "consumption"
+        values, present = flows.setdefault((y, kind), [np.zeros(n_slots), np.zeros(n_slots, dtype=bool)])
+        seen = count > 0
+        values[seen] += total[seen] / count[seen]
+        present |= seen
+
+    per_step = step_minutes // METER_STEP_MINUTES
+    years = []
+    gaps = 0
+    result = {"consumption": [], "injection": []}
+    for year in sorted({y for y, _ in flows}):
+        consumption = flows.get((year, "consumption"))
+        coverage = consumption[1].mean() if consumption is not None else 0.0
+        if coverage < min_coverage:
+            continue
+
+        for kind in ("consumption", "injection"):
+            values, present = flows.get((year, kind), (np.zeros(n_slots), np.zeros(n_slots, dtype=bool)))
+            values = np.where(present, values, np.nan)
+            missing = ~present
+            if missing.all():
+                values = np.zeros(n_slots)
+            elif missing.any():
+                idx = np.arange(n_slots)
+                values[missing] = np.interp(idx[missing], idx[~missing], values[~missing])
+                if kind == "consumption":
+                    gaps += int(missing.sum())
+            result[kind].append(values.reshape(-1, per_step).sum(axis=1))
+        years.append(int(year))
+
+    if not years:
+        raise MeterDataError(
+            f"Aucune année couverte à {min_coverage:.0%} au moins par les relevés de prélèvement."
+        )
+
+    report["gaps_filled"] = gaps
+    return {
+        "consumption": np.vstack(result["consumption"]),
+        "injection": np.vstack(result["injection"]),
+        "years": years,
+        "step_minutes": step_minutes,
+        "report": report,
+    }
+
+
+# ----------------------------------------------------
+# CACHE (CLÉ = EMPREINTE DU FICHIER)
+# ----------------------------------------------------
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 16
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class _HashingReader(io.RawIOBase):
+    """Lecture binaire qui calcule l'empreinte sha1 des octets au fil de l'eau."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha1 = hashlib.sha1()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        if n:
+            self.sha1.update(memoryview(buffer)[:n])
+        return n
+
+
+# Empreinte des fichiers déjà lus : (chemin, taille, date de modification) -> sha1
+_path_digests = {}
+
+
+def _cached(key):
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+        return cached
+
+
+def load_meter_file(source, step_minutes: int = 60, encoding: str = "utf-8-sig", **kwargs) -> dict:
+    """
+    Charge un export Fluvius (chemin, octets ou fichier binaire) ; le résultat
+    est mémorisé par empreinte du contenu, un même fichier n'est analysé
+    qu'une fois. Les chemins et fichiers sont lus en flux (analyse par blocs
+    et empreinte calculées sur la même lecture), sans charger le fichier en
+    mémoire. Les tableaux renvoyés sont partagés et en lecture seule.
+    """
+    options = (step_minutes, encoding, tuple(sorted(kwargs.items())))
+
+    def parse(stream):
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+        return parse_meter_csv(text, step_minutes=step_minutes, **kwargs)
+
+    if isinstance(source, (bytes, bytearray)):
+        digest = file_digest(source)
+        parsed = _cached((digest, *options))
+        if parsed is None:
+            parsed = parse(io.BytesIO(source))
+    elif hasattr(source, "read"):
+        reader = _HashingReader(source)
+        parsed = parse(io.BufferedReader(reader))
+        digest = reader.sha1.hexdigest()
+    else:
+        stat = os.stat(source)
+        path_key = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+        digest = _path_digests.get(path_key)
+        parsed = _cached((digest, *options)) if digest is not None else None
+        if parsed is None:
+            with open(source, "rb", buffering=0) as f:
+                reader = _HashingReader(f)
+                parsed = parse(io.BufferedReader(reader))
+            digest = _path_digests[path_key] = reader.sha1.hexdigest()
+
+    key = (digest, *options)
+    cached = _cached(key)
+    if cached is not None:
+        return cached
+    for name in ("consumption", "injection"):
+        parsed[name].setflags(write=False)
+    parsed["digest"] = digest
+
+    with _cache_lock:
+        _cache[key] = parsed
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def meter_consumption(parsed: dict, year: int | None = None) -> np.ndarray:
+    """Consommation d'une année des relevés, ou moyenne des années si year=None."""
+    if year is None:
+        return parsed["consumption"].mean(axis=0)
+    if year not in parsed["years"]:
+        raise MeterDataError(f"Année {year} absente des relevés (disponibles : {parsed['years']}).")
+    return parsed["consumption"][parsed["years"].index(year)].copy()
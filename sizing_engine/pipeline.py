@@ -0,0 +1,411 @@
+import functools
+
+import numpy as np
+
+from .dispatch import simulate_dispatch
+from .catalog import get_inverter_elec, get_panel_elec
+from .lifetime import simulate_lifetime
+from .meter import load_meter_file, meter_consumption
+from .profiling import span
+from .profiles import (
+    generate_consumption_hourly,
+    generate_pv_profile_hourly,
+    hourly_profile,
+    monthly_consumption_profile,
+    monthly_pv_profile_kwh_kwp,
+)
+from .pvmodel import apply_pv_losses
+from .solar import array_pv_profile
+from .tariffs import financial_summary, installation_cost
+from .timegrid import TIME_STEPS_MINUTES, time_grid
+from .wiring import (
+    combined_wiring,
+    optimize_strings,
+    optimize_strings_table,
+    select_best_inverter,
+    select_inverter_combination,
+    wiring_from_table,
+)
+
+# Nombre de modules couvert par les tables de câblage mémorisées
+WIRING_TABLE_N_MAX = 100
+
+# Paramètres d'un dimensionnement (mêmes valeurs par défaut que l'interface)
+DEFAULT_CONFIG = {
+    "panel_id": None,
+    "n_modules": 12,
+    "grid_type": "Mono",
+    "fam_pref": None,            # None = Auto, "Store" ou "Hybride"
+    "max_dc_ac": 1.35,
+    "inverter_id": None,         # None = sélection automatique
+    "max_inverters": 1,          # > 1 : répartition auto sur plusieurs onduleurs
+    "mppt_orientations": None,   # [(azimut, inclinaison)] par MPPT, None = profil sud standard
+    "pv_losses": False,          # échauffement des cellules + écrêtage à P_ac
+    "ambient_temperature": None, # série de température ambiante (°C par pas), None = année type
+    "battery_kwh": 0.0,          # 0 = sans batterie
+    "dispatch": "greedy",        # pilotage batterie : clé de DISPATCH_STRATEGIES
+    "dispatch_options": None,    # options de la stratégie (ex. peak_threshold_kw, grid_charging)
+    "annual_consumption": 3500.0,
+    "consumption_profile": "Standard",
+    "hourly_profile": "Classique (matin + soir)",
+    "meter_file": None,          # export Fluvius 15 min (remplace le profil de conso)
+    "meter_year": None,          # None = moyenne des années du relevé
+    "step_minutes": 60,          # pas de simulation : 60, 30 ou 15 min
+    "lifetime_years": 0,         # > 0 : bilans annuels sur la durée de vie
+    "tariff": None,              # tarifs (clés de DEFAULT_TARIFF), None = défauts
+    "costs": None,               # coûts d'investissement (clés de DEFAULT_COSTS)
+    "investment_eur": None,      # None = estimation à partir de costs
+    "t_min": -10.0,
+    "t_max": 70.0,
+}
+
+
+class SizingError(ValueError):
+    """Dimensionnement impossible : catalogue, onduleur ou câblage introuvable."""
+
+
+# ----------------------------------------------------
+# ÉTAPES DU DIMENSIONNEMENT
+# ----------------------------------------------------
+def hourly_profiles(
+    p_dc_kwp: float,
+    annual_consumption: float,
+    consumption_profile: str,
+    hourly_profile_choice: str,
+    step_minutes: int = 60,
+):
+    """Profils PV et conso sur l'année, au pas step_minutes (8760 pas à 60 min)."""
+    pv_monthly = monthly_pv_profile_kwh_kwp() * p_dc_kwp
+    cons_monthly = monthly_consumption_profile(annual_consumption, consumption_profile)
+    pv_hourly = generate_pv_profile_hourly(pv_monthly, step_minutes)
+    cons_hourly = generate_consumption_hourly(
+        cons_monthly, hourly_profile(hourly_profile_choice), step_minutes
+    )
+    return pv_hourly, cons_hourly
+
+
+def energy_flows(
+    pv_hourly,
+    cons_hourly,
+    battery_kwh: float,
+    step_minutes: int = 60,
+    dispatch: str = "greedy",
+    tariff: dict | None = None,
+    dispatch_options: dict | None = None,
+):
+    """
+    Flux par pas de temps (soc, autocons. directe, autocons. batterie, export, import).
+    battery_kwh = 0 : installation sans batterie. Les limites de puissance
+    de la batterie (kW) sont converties en énergie par pas ; la batterie
+    est pilotée selon `dispatch` (tarif utilisé par les stratégies de coût).
+    """
+    if battery_kwh > 0:
+        return simulate_dispatch(
+            pv_hourly,
+            cons_hourly,
+            battery_kwh,
+            strategy=dispatch,
+            charge_eff=0.95,
+            discharge_eff=0.95,
+            max_charge_power_kw=3.6,
+            max_discharge_power_kw=3.6,
+            step_minutes=step_minutes,
+            tariff=tariff,
+            **(dispatch_options or {}),
+        )
+
+    ac_direct_h = np.minimum(pv_hourly, cons_hourly)
+    return (
+        np.zeros_like(pv_hourly),
+        ac_direct_h,
+        np.zeros_like(pv_hourly),
+        pv_hourly - ac_direct_h,
+        cons_hourly - ac_direct_h,
+    )
+
+
+def monthly_totals(hourly, step_minutes: int = 60):
+    """Somme mensuelle (12 valeurs) d'une série annuelle au pas step_minutes."""
+    return time_grid(step_minutes).monthly_totals(hourly)
+
+
+def typical_days(series, step_minutes: int = 60):
+    """Jours types des 12 mois, (12, pas par jour) ; accepte une pile de séries (..., pas)."""
+    return time_grid(step_minutes).typical_days(series)
+
+
+def energy_summary(pv_hourly, cons_hourly, flows, step_minutes: int = 60) -> dict:
+    """Agrégations mensuelles et annuelles, taux d'autoconsommation et de couverture."""
+    soc, ac_direct_h, ac_batt_h, export_h, import_h = flows
+
+    ac_direct_monthly = monthly_totals(ac_direct_h, step_minutes)
+    ac_batt_monthly = monthly_totals(ac_batt_h, step_minutes)
+
+    pv_year = pv_hourly.sum()
+    cons_year = cons_hourly.sum()
+    ac_direct_year = ac_direct_h.sum()
+    ac_batt_year = ac_batt_h.sum()
+
+    # Garantir AC ≤ PV et ≤ conso
+    ac_total_year = min(ac_direct_year + ac_batt_year, pv_year, cons_year)
+
+    return {
+        "pv_monthly": monthly_totals(pv_hourly, step_minutes),
+        "cons_monthly": monthly_totals(cons_hourly, step_minutes),
+        "ac_direct_monthly": ac_direct_monthly,
+        "ac_batt_monthly": ac_batt_monthly,
+        "ac_total_monthly": ac_direct_monthly + ac_batt_monthly,
+        "pv_year": pv_year,
+        "cons_year": cons_year,
+        "ac_direct_year": ac_direct_year,
+        "ac_batt_year": ac_batt_year,
+        "ac_total_year": ac_total_year,
+        "import_year": import_h.sum(),
+        "export_year": export_h.sum(),
+        "taux_auto": (ac_total_year / pv_year * 100) if pv_year > 0 else 0.0,
+        "taux_couv": (ac_total_year / cons_year * 100) if cons_year > 0 else 0.0,
+    }
+
+
+# ----------------------------------------------------
+# RÉSULTATS INTERMÉDIAIRES PARTAGÉS (MÉMORISÉS PAR PROCESSUS)
+# ----------------------------------------------------
+# Les dimensionnements en lot réutilisent ces résultats d'une demande à
+# l'autre. Les tableaux renvoyés sont en lecture seule.
+@functools.lru_cache(maxsize=512)
+def _auto_inverter(panel_id, n_modules, grid_type, max_dc_ac, fam_pref, t_min, t_max):
+    return select_best_inverter(
+        panel=get_panel_elec(panel_id),
+        n_panels=n_modules,
+        grid_type=grid_type,
+        max_dc_ac=max_dc_ac,
+        fam_pref=fam_pref,
+        T_min=t_min,
+        T_max=t_max,
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _wiring_table(panel_id, inverter_id, t_min, t_max):
+    table = optimize_strings_table(
+        get_panel_elec(panel_id),
+        get_inverter_elec(inverter_id),
+        t_min,
+        t_max,
+        ratio_dc_ac_min=0.8,
+        ratio_dc_ac_max=2.0,
+        N_max=WIRING_TABLE_N_MAX,
+    )
+    table.setflags(write=False)
+    return table
+
+
+@functools.lru_cache(maxsize=512)
+def _pv_hourly(p_dc_kwp, step_minutes):
+    pv_hourly = generate_pv_profile_hourly(monthly_pv_profile_kwh_kwp() * p_dc_kwp, step_minutes)
+    pv_hourly.setflags(write=False)
+    return pv_hourly
+
+
+@functools.lru_cache(maxsize=128)
+def _cons_hourly(annual_consumption, consumption_profile, hourly_profile_choice, step_minutes):
+    cons_hourly = generate_consumption_hourly(
+        monthly_consumption_profile(annual_consumption, consumption_profile),
+        hourly_profile(hourly_profile_choice),
+        step_minutes,
+    )
+    cons_hourly.setflags(write=False)
+    return cons_hourly
+
+
+# ----------------------------------------------------
+# DIMENSIONNEMENT COMPLET
+# ----------------------------------------------------
+def size_installation(config: dict) -> dict:
+    """
+    Dimensionnement complet, sans interface : sélection de l'onduleur
+    (ou d'une combinaison d'onduleurs si max_inverters > 1), câblage des
+    strings, simulation horaire et bilans énergétiques.
+
+    Avec pv_losses, la production horaire tient compte de l'échauffement
+    des cellules et de l'écrêtage à la puissance AC (totale, pour une
+    combinaison d'onduleurs) ; pertes par mois dans temperature_loss_monthly
+    et clipping_monthly.
+
+    config : clés de DEFAULT_CONFIG (panel_id obligatoire).
+    Lève SizingError si aucune solution n'existe.
+
+    Sélection d'onduleur, tables de câblage et profils sont mémorisés par
+    processus : les profils renvoyés sont partagés et en lecture seule.
+    """
+    cfg = {**DEFAULT_CONFIG, **config}
+
+    panel = get_panel_elec(cfg["panel_id"])
+    if panel is None:
+        raise SizingError("Panneau introuvable dans le catalogue.")
+
+    n_modules = int(cfg["n_modules"])
+    t_min = float(cfg["t_min"])
+    t_max = float(cfg["t_max"])
+    step_minutes = int(cfg["step_minutes"])
+    if step_minutes not in TIME_STEPS_MINUTES:
+        raise SizingError(f"Pas de temps non supporté : {step_minutes} min.")
+
+    auto = None
+    combination = None
+    inverter_id = cfg["inverter_id"]
+    if inverter_id is None and int(cfg["max_inverters"]) > 1:
+        with span("Sélection onduleur"):
+            combination = select_inverter_combination(
+                panel,
+                n_modules,
+                cfg["grid_type"],
+                float(cfg["max_dc_ac"]),
+                cfg["fam_pref"],
+                t_min,
+                t_max,
+                max_inverters=int(cfg["max_inverters"]),
+            )
+        if combination is None:
+            raise SizingError("Aucune combinaison d'onduleurs compatible trouvée (sélection auto).")
+        inverter_id = combination["label"]
+    elif inverter_id is None:
+        with span("Sélection onduleur"):
+            auto = _auto_inverter(
+                panel["id"],
+                n_modules,
+                cfg["grid_type"],
+                float(cfg["max_dc_ac"]),
+                cfg["fam_pref"],
+                t_min,
+                t_max,
+            )
+        if auto is None:
+            raise SizingError("Aucun onduleur compatible trouvé (sélection auto).")
+        auto = dict(auto)
+        inverter_id = auto["inv_id"]
+
+    if combination is not None:
+        # Chaque onduleur a déjà son câblage (tables de la sélection)
+        wiring = combined_wiring(combination)
+        p_ac_w = combination["P_ac"]
+    else:
+        inverter = get_inverter_elec(inverter_id)
+        if inverter is None:
+            raise SizingError("Spécifications onduleur introuvables.")
+        p_ac_w = inverter["P_ac"]
+
+        # Câblage pour l'onduleur retenu (physique, ratio jusqu'à 2.0)
+        with span("Câblage"):
+            if n_modules <= WIRING_TABLE_N_MAX:
+                wiring = wiring_from_table(_wiring_table(panel["id"], inverter_id, t_min, t_max), n_modules)
+            else:
+                wiring = optimize_strings(
+                    N_tot=n_modules,
+                    panel=panel,
+                    inverter=inverter,
+                    T_min=t_min,
+                    T_max=t_max,
+                    ratio_dc_ac_min=0.8,
+                    ratio_dc_ac_max=2.0,
+                )
+    if wiring is None:
+        raise SizingError(
+            f"Aucun câblage valide trouvé pour l'onduleur {inverter_id}. "
+            "Vérifiez les températures ou le nombre de modules."
+        )
+
+    with span("Profils horaires"):
+        if cfg["mppt_orientations"]:
+            try:
+                pv_hourly = array_pv_profile(wiring, panel["Pstc"], cfg["mppt_orientations"], step_minutes)
+            except ValueError as exc:
+                raise SizingError(str(exc)) from exc
+        else:
+            pv_hourly = _pv_hourly(wiring["P_dc"] / 1000.0, step_minutes)
+        if cfg["pv_losses"]:
+            pv_hourly, temperature_loss, clipping_loss = apply_pv_losses(
+                pv_hourly, wiring["P_dc"], p_ac_w, cfg["ambient_temperature"], step_minutes
+            )
+        else:
+            temperature_loss = clipping_loss = np.zeros_like(pv_hourly)
+        if cfg["meter_file"]:
+            meter_year = cfg["meter_year"]
+            cons_hourly = meter_consumption(
+                load_meter_file(cfg["meter_file"], step_minutes=step_minutes),
+                int(meter_year) if meter_year is not None else None,
+            )
+        else:
+            cons_hourly = _cons_hourly(
+                float(cfg["annual_consumption"]),
+                cfg["consumption_profile"],
+                cfg["hourly_profile"],
+                step_minutes,
+            )
+    with span("Simulation"):
+        try:
+            flows = energy_flows(
+                pv_hourly,
+                cons_hourly,
+                float(cfg["battery_kwh"]),
+                step_minutes,
+                dispatch=cfg["dispatch"],
+                tariff=cfg["tariff"],
+                dispatch_options=cfg["dispatch_options"],
+            )
+        except ValueError as exc:
+            raise SizingError(str(exc)) from exc
+    soc, ac_direct_h, ac_batt_h, export_h, import_h = flows
+    with span("Agrégation mensuelle"):
+        summary = energy_summary(pv_hourly, cons_hourly, flows, step_minutes)
+
+    with span("Bilan financier"):
+        investment = cfg["investment_eur"]
+        if investment is None:
+            investment = installation_cost(wiring["P_dc"], float(cfg["battery_kwh"]), cfg["costs"])
+        finance = financial_summary(
+            cons_hourly,
+            import_h,
+            export_h,
+            float(investment),
+            tariff=cfg["tariff"],
+            step_minutes=step_minutes,
+        )
+
+    lifetime = None
+    if int(cfg["lifetime_years"]) > 0:
+        with span("Durée de vie"):
+            lifetime = simulate_lifetime(
+                pv_hourly,
+                cons_hourly,
+                float(cfg["battery_kwh"]),
+                years=int(cfg["lifetime_years"]),
+                step_minutes=step_minutes,
+                dispatch=cfg["dispatch"],
+                tariff=cfg["tariff"],
+                dispatch_options=cfg["dispatch_options"],
+            )
+
+    return {
+        "config": cfg,
+        "inverter_id": inverter_id,
+        "auto_inverter": auto,
+        "inverter_combination": combination,
+        "wiring": wiring,
+        "P_dc": wiring["P_dc"],
+        "ratio_dc_ac": wiring["ratio_dc_ac"],
+        "pv_hourly": pv_hourly,
+        "cons_hourly": cons_hourly,
+        "soc": soc,
+        "ac_direct": ac_direct_h,
+        "ac_batt": ac_batt_h,
+        "grid_export": export_h,
+        "grid_import": import_h,
+        "lifetime": lifetime,
+        "temperature_loss_monthly": monthly_totals(temperature_loss, step_minutes),
+        "clipping_monthly": monthly_totals(clipping_loss, step_minutes),
+        "temperature_loss_year": float(temperature_loss.sum()),
+        "clipping_year": float(clipping_loss.sum()),
+        "finance": finance,
+        **summary,
+    }
@@ -0,0 +1,113 @@
+import hashlib
+
+import numpy as np
+
+from .timegrid import steps_per_hour, time_grid
+
+
+# ----------------------------------------------------
+# PROFILS CONSOMMATION / PRODUCTION (MENSUELS / HORAIRES)
+# ----------------------------------------------------
+def monthly_pv_profile_kwh_kwp():
+    """Profil mensuel PV Belgique (kWh/an/kWc)."""
+    annual_kwh_kwp = 1034.0
+    distribution = np.array([3.8, 5.1, 8.7, 11.5, 12.1, 11.8,
+                             11.9, 10.8, 9.7, 7.0, 4.3, 3.3])
+    return annual_kwh_kwp * distribution / 100.0
+
+
+def monthly_consumption_profile(annual_kwh: float, profile: str):
+    profiles = {
+        "Standard":   [7, 7, 8, 9, 9, 9, 9, 9, 8, 8, 8, 9],
+        "Hiver fort": [10,10,10, 9, 8, 7, 6, 6, 7, 8, 9,10],
+        "Été fort":   [6, 6, 7, 8, 9,10,11,11,10, 8, 7, 7],
+    }
+    arr = np.array(profiles[profile], dtype=float)
+    arr = arr / arr.sum()
+    return annual_kwh * arr
+
+
+def hourly_profile(profile_name: str):
+    """Profil de consommation horaire (24 valeurs qui somment à 1)."""
+    if profile_name == "Uniforme":
+        return np.ones(24) / 24
+
+    if profile_name == "Classique (matin + soir)":
+        prof = np.array([
+            0.02,0.02,0.02,0.02,0.02,
+            0.04,0.06,0.08,0.06,0.03,
+            0.02,0.02,0.02,0.02,0.03,
+            0.04,0.06,0.08,0.07,0.04,
+            0.02,0.01,0.01,0.01
+        ])
+        return prof / prof.sum()
+
+    if profile_name == "Travail journée (soir fort)":
+        prof = np.array([
+            0.01,0.01,0.01,0.01,0.01,
+            0.02,0.03,0.03,0.03,0.02,
+            0.01,0.01,0.01,0.01,0.02,
+            0.04,0.07,0.09,0.10,0.10,
+            0.05,0.02,0.01,0.01
+        ])
+        return prof / prof.sum()
+
+    if profile_name == "Télétravail":
+        prof = np.array([
+            0.02,0.02,0.03,0.03,0.03,
+            0.04,0.05,0.06,0.06,0.06,
+            0.05,0.05,0.05,0.05,0.05,
+            0.05,0.05,0.06,0.06,0.06,
+            0.05,0.03,0.02,0.02
+        ])
+        return prof / prof.sum()
+
+    return np.ones(24) / 24
+
+
+# ----------------------------------------------------
+# PROFILS HORAIRES (8760 H)
+# ----------------------------------------------------
+def pv_day_profile(step_minutes: int = 60):
+    """
+    Forme journalière de la production PV (somme = 1) au pas `step_minutes`.
+    Sous l'heure, la courbe horaire est interpolée linéairement au milieu
+    de chaque pas, puis renormalisée.
+    """
+    pv_day_profile = np.array([
+        0,0,0,0,0,
+        0.01,0.04,0.09,0.14,0.18,0.20,0.18,
+        0.14,0.10,0.06,0.03,0.01,
+        0,0,0,0,0,0,0
+    ])
+    per_hour = steps_per_hour(step_minutes)
+    if per_hour > 1:
+        t = (np.arange(24 * per_hour) + 0.5) / per_hour
+        pv_day_profile = np.interp(t, np.arange(24) + 0.5, pv_day_profile)
+    return pv_day_profile / pv_day_profile.sum()
+
+
+def generate_pv_profile_hourly(pv_monthly, step_minutes: int = 60):
+    """Production PV sur l'année (8760 h, ou 8760 × pas par heure) à partir du profil mensuel."""
+    grid = time_grid(step_minutes)
+    prod_day = np.asarray(pv_monthly, dtype=float) / grid.days_per_month
+    return grid.per_day(prod_day[grid.day_month], pv_day_profile(step_minutes))
+
+
+def generate_consumption_hourly(cons_monthly, cons_frac, step_minutes: int = 60):
+    """
+    Consommation sur l'année à partir du profil mensuel + horaire. Sous
+    l'heure, l'énergie horaire est répartie uniformément sur les pas.
+    """
+    grid = time_grid(step_minutes)
+    day_shape = np.repeat(np.asarray(cons_frac, dtype=float) / grid.steps_per_hour, grid.steps_per_hour)
+    cons_day = np.asarray(cons_monthly, dtype=float) / grid.days_per_month
+    return grid.per_day(cons_day[grid.day_month], day_shape)
+
+
+def profile_hash(*arrays) -> str:
+    """Empreinte stable d'un ou plusieurs profils horaires."""
+    h = hashlib.sha1()
+    for a in arrays:
+        h.update(np.ascontiguousarray(a, dtype=float).tobytes())
+    return h.hexdigest()
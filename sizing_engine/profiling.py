@@ -0,0 +1,83 @@
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+# Enregistreur actif du contexte courant (None = instrumentation désactivée)
+_current = contextvars.ContextVar("sizing_engine_recorder", default=None)
+
+logger = logging.getLogger("sizing_engine.perf")
+
+
+class Recorder:
+    """Durées par étape (spans imbriqués) et compteurs d'un calcul."""
+
+    def __init__(self):
+        self.spans = []
+        self.counters = {}
+        self._depth = 0
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        entry = {"stage": name, "depth": self._depth, "ms": 0.0}
+        self.spans.append(entry)
+        self._depth += 1
+        try:
+            yield entry
+        finally:
+            self._depth -= 1
+            entry["ms"] = (time.perf_counter() - start) * 1e3
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1e3
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms(), 3),
+            "spans": [dict(s, ms=round(s["ms"], 3)) for s in self.spans],
+            "counters": dict(self.counters),
+        }
+
+
+def start_recording() -> Recorder:
+    """Crée un enregistreur et l'active pour le contexte courant."""
+    recorder = Recorder()
+    _current.set(recorder)
+    return recorder
+
+
+@contextlib.contextmanager
+def recording():
+    """Active un enregistreur le temps d'un bloc : with recording() as rec: ..."""
+    recorder = Recorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def span(name: str):
+    """Mesure la durée du bloc dans l'enregistreur actif (sans effet sinon)."""
+    recorder = _current.get()
+    if recorder is None:
+        return contextlib.nullcontext()
+    return recorder.span(name)
+
+
+def count(name: str, n: int = 1):
+    """Incrémente un compteur de l'enregistreur actif (sans effet sinon)."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+def log_recording(recorder: Recorder, **context):
+    """Écrit les mesures en une ligne JSON sur le logger sizing_engine.perf."""
+    logger.info(json.dumps({**context, **recorder.as_dict()}, ensure_ascii=False, default=str))
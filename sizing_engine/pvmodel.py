@@ -0,0 +1,78 @@
+import functools
+
+import numpy as np
+
+from .timegrid import time_grid
+
+# ----------------------------------------------------
+# HYPOTHÈSES THERMIQUES (BELGIQUE, UCCLE)
+# ----------------------------------------------------
+# Température ambiante moyenne (°C) et amplitude journalière (°C) par mois
+AMBIENT_MONTHLY_MEAN = np.array([3.3, 3.7, 6.8, 9.8, 13.6, 16.2,
+                                 18.4, 18.0, 14.9, 11.1, 6.8, 3.9])
+AMBIENT_DAILY_RANGE = np.array([5.0, 6.0, 8.0, 10.0, 10.0, 10.0,
+                                10.0, 10.0, 9.0, 7.0, 5.0, 4.0])
+AMBIENT_WARMEST_HOUR = 15.0
+GAMMA_P = -0.35                # coefficient de puissance (%/°C)
+NOCT = 45.0                    # température nominale de fonctionnement (°C, 800 W/m², 20 °C)
+PERFORMANCE_RATIO = 0.85       # kWh produits par kWc et par kWh/m² reçu (estimation de l'éclairement)
+
+
+@functools.lru_cache(maxsize=8)
+def ambient_temperature_profile(step_minutes: int = 60) -> np.ndarray:
+    """
+    Température ambiante type sur l'année (°C, une valeur par pas) :
+    moyenne mensuelle + sinusoïde journalière (maximum à AMBIENT_WARMEST_HOUR).
+    Lecture seule.
+    """
+    grid = time_grid(step_minutes)
+    hour = grid.hour_of_day + 0.5 / grid.steps_per_hour
+    swing = np.cos(2 * np.pi * (hour - AMBIENT_WARMEST_HOUR) / 24.0)
+    temperature = AMBIENT_MONTHLY_MEAN[grid.month] + AMBIENT_DAILY_RANGE[grid.month] / 2.0 * swing
+    temperature.setflags(write=False)
+    return temperature
+
+
+# ----------------------------------------------------
+# ÉCHAUFFEMENT DES CELLULES ET ÉCRÊTAGE ONDULEUR
+# ----------------------------------------------------
+def apply_pv_losses(
+    pv_hourly,
+    p_dc_w,
+    p_ac_w=None,
+    ambient_temperature=None,
+    step_minutes: int = 60,
+    gamma_p: float = GAMMA_P,
+    noct: float = NOCT,
+):
+    """
+    Production injectable par pas à partir de la production DC à 25 °C
+    (kWh par pas), en opérations sur toute la série :
+    - température de cellule : T_amb + (NOCT - 20) / 800 × G, l'éclairement
+      G étant estimé depuis la puissance par kWc ; perte gamma_p (%/°C)
+      au-dessus de 25 °C (gain en dessous) ;
+    - écrêtage : puissance AC plafonnée à p_ac_w (None = pas d'écrêtage).
+
+    pv_hourly peut être une pile (..., pas) avec p_dc_w / p_ac_w de forme
+    (...,). Renvoie (production, perte température, perte écrêtage), en
+    kWh par pas ; la perte température est négative si le froid fait gagner.
+    """
+    grid = time_grid(step_minutes)
+    pv = np.asarray(pv_hourly, dtype=float)
+    p_dc_kw = np.asarray(p_dc_w, dtype=float)[..., None] / 1000.0
+    ambient = ambient_temperature_profile(step_minutes) if ambient_temperature is None else np.asarray(
+        ambient_temperature, dtype=float
+    )
+
+    power_kw = pv * grid.steps_per_hour
+    with np.errstate(divide="ignore", invalid="ignore"):
+        irradiance = np.where(p_dc_kw > 0, 1000.0 * power_kw / (p_dc_kw * PERFORMANCE_RATIO), 0.0)
+    cell_temperature = ambient + (noct - 20.0) / 800.0 * irradiance
+    dc = np.maximum(pv * (1.0 + gamma_p / 100.0 * (cell_temperature - 25.0)), 0.0)
+    temperature_loss = pv - dc
+
+    if p_ac_w is None:
+        return dc, temperature_loss, np.zeros_like(dc)
+    ac_cap = np.asarray(p_ac_w, dtype=float)[..., None] / 1000.0 / grid.steps_per_hour
+    ac = np.minimum(dc, ac_cap)
+    return ac, temperature_loss, dc - ac
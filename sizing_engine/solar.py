@@ -0,0 +1,150 @@
+import functools
+
+import numpy as np
+
+from .profiles import monthly_pv_profile_kwh_kwp
+from .timegrid import time_grid
+
+# ----------------------------------------------------
+# SITE ET HYPOTHÈSES D'ENSOLEILLEMENT (BELGIQUE)
+# ----------------------------------------------------
+LATITUDE = 50.85               # degrés nord (Bruxelles)
+LONGITUDE = 4.35               # degrés est
+UTC_OFFSET_HOURS = 1.0         # heure légale d'hiver toute l'année (pas de DST)
+ALBEDO = 0.2
+# Fraction diffuse mensuelle du rayonnement global (climat belge)
+DIFFUSE_FRACTION = np.array([0.72, 0.66, 0.60, 0.54, 0.52, 0.52,
+                             0.52, 0.53, 0.56, 0.62, 0.70, 0.74])
+# Orientation de référence du profil mensuel (monthly_pv_profile_kwh_kwp)
+REFERENCE_AZIMUTH = 0.0        # 0 = sud, -90 = est, +90 = ouest
+REFERENCE_TILT = 35.0
+# Points d'échantillonnage par pas (moyenne de l'éclairement sur le pas)
+SUBSTEPS = 4
+
+
+# ----------------------------------------------------
+# GÉOMÉTRIE SOLAIRE (TOUTE L'ANNÉE EN UNE FOIS)
+# ----------------------------------------------------
+@functools.lru_cache(maxsize=8)
+def solar_geometry(step_minutes: int = 60) -> dict:
+    """
+    Termes de la position du soleil pour chaque point de l'année
+    (pas × SUBSTEPS) : sinus / cosinus de la déclinaison et de l'angle
+    horaire, cosinus de l'angle zénithal. Heure solaire à partir de
+    l'heure légale (longitude + équation du temps). Lecture seule.
+    """
+    grid = time_grid(step_minutes)
+    offsets = (np.arange(SUBSTEPS) + 0.5) / (SUBSTEPS * grid.steps_per_hour)
+    hours = (grid.hour_of_day[:, None] + offsets[None, :]).ravel()
+    day = np.repeat(grid.day_of_year + 1, SUBSTEPS)
+
+    b = 2 * np.pi * (day - 81) / 364.0
+    equation_of_time = 9.87 * np.sin(2 * b) - 7.53 * np.cos(b) - 1.5 * np.sin(b)
+    solar_time = hours + (4.0 * (LONGITUDE - 15.0 * UTC_OFFSET_HOURS) + equation_of_time) / 60.0
+    omega = np.radians(15.0 * (solar_time - 12.0))
+    delta = np.radians(23.45) * np.sin(2 * np.pi * (284 + day) / 365.0)
+    phi = np.radians(LATITUDE)
+
+    geometry = {
+        "sin_delta": np.sin(delta),
+        "cos_delta": np.cos(delta),
+        "sin_omega": np.sin(omega),
+        "cos_omega": np.cos(omega),
+        "cos_zenith": np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.cos(omega),
+        "month": np.repeat(grid.month, SUBSTEPS),
+    }
+    for value in geometry.values():
+        value.setflags(write=False)
+    return geometry
+
+
+def plane_of_array(azimuths, tilts, step_minutes: int = 60) -> np.ndarray:
+    """
+    Éclairement moyen par pas (W/m², ciel clair de Haurwitz, diffus
+    isotrope) sur des plans (azimut, inclinaison) en degrés, azimut 0 = sud,
+    négatif vers l'est. Tableau (plans, pas) calculé en une passe.
+    """
+    geo = solar_geometry(step_minutes)
+    gamma = np.radians(np.atleast_1d(np.asarray(azimuths, dtype=float)))[:, None]
+    beta = np.radians(np.atleast_1d(np.asarray(tilts, dtype=float)))[:, None]
+    phi = np.radians(LATITUDE)
+
+    sd, cd = geo["sin_delta"], geo["cos_delta"]
+    sw, cw = geo["sin_omega"], geo["cos_omega"]
+    cos_incidence = (
+        sd * np.sin(phi) * np.cos(beta)
+        - sd * np.cos(phi) * np.sin(beta) * np.cos(gamma)
+        + cd * np.cos(phi) * np.cos(beta) * cw
+        + cd * np.sin(phi) * np.sin(beta) * np.cos(gamma) * cw
+        + cd * np.sin(beta) * np.sin(gamma) * sw
+    )
+
+    cos_z = geo["cos_zenith"]
+    day = cos_z > 0
+    attenuation = np.exp(-0.057 / np.where(day, cos_z, 1.0))
+    ghi = np.where(day, 1098.0 * cos_z * attenuation, 0.0)
+    diffuse = DIFFUSE_FRACTION[geo["month"]]
+    dni = np.where(day, 1098.0 * attenuation * (1.0 - diffuse), 0.0)
+
+    poa = (
+        dni * np.maximum(cos_incidence, 0.0)
+        + diffuse * ghi * (1.0 + np.cos(beta)) / 2.0
+        + ALBEDO * ghi * (1.0 - np.cos(beta)) / 2.0
+    )
+    return poa.reshape(poa.shape[0], -1, SUBSTEPS).mean(axis=-1)
+
+
+# ----------------------------------------------------
+# PROFILS PV PAR ORIENTATION (1 kWc)
+# ----------------------------------------------------
+@functools.lru_cache(maxsize=8)
+def _monthly_scale(step_minutes):
+    """kWh/kWc par unité d'éclairement, par mois, calé sur l'orientation de référence."""
+    reference = plane_of_array(REFERENCE_AZIMUTH, REFERENCE_TILT, step_minutes)[0]
+    scale = monthly_pv_profile_kwh_kwp() / time_grid(step_minutes).monthly_totals(reference)
+    scale.setflags(write=False)
+    return scale
+
+
+@functools.lru_cache(maxsize=64)
+def orientation_profile(azimuth: float, tilt: float, step_minutes: int = 60) -> np.ndarray:
+    """
+    Production d'1 kWc orienté (azimut, inclinaison) sur l'année (kWh par
+    pas) : éclairement du plan × facteur mensuel, de sorte que l'orientation
+    de référence (sud, 35°) redonne monthly_pv_profile_kwh_kwp. Mémorisé par
+    orientation, en lecture seule : multiplier par les kWc.
+    """
+    grid = time_grid(step_minutes)
+    poa = plane_of_array(float(azimuth), float(tilt), step_minutes)[0]
+    profile = poa * _monthly_scale(step_minutes)[grid.month]
+    profile.setflags(write=False)
+    return profile
+
+
+def mppt_kwp(wiring: dict, p_stc_w: float) -> list:
+    """kWc raccordés sur chaque MPPT d'un câblage (longueur × strings parallèles)."""
+    parallel = wiring.get("parallel") or [1] * len(wiring["strings"])
+    return [L * k * p_stc_w / 1000.0 for L, k in zip(wiring["strings"], parallel)]
+
+
+def array_pv_profile(wiring: dict, p_stc_w: float, mppt_orientations, step_minutes: int = 60) -> np.ndarray:
+    """
+    Production d'un champ multi-orientations : chaque MPPT câblé reçoit
+    l'orientation (azimut, inclinaison) de même rang dans mppt_orientations
+    et contribue kWc(MPPT) × profil de son orientation.
+    Lève ValueError si un MPPT câblé n'a pas d'orientation.
+    """
+    kwp_by_orientation = {}
+    for i, kwp in enumerate(mppt_kwp(wiring, p_stc_w)):
+        if kwp <= 0:
+            continue
+        if i >= len(mppt_orientations):
+            raise ValueError(f"Orientation manquante pour le MPPT {i + 1}.")
+        azimuth, tilt = mppt_orientations[i]
+        key = (float(azimuth), float(tilt))
+        kwp_by_orientation[key] = kwp_by_orientation.get(key, 0.0) + kwp
+
+    pv = np.zeros(time_grid(step_minutes).n_steps)
+    for (azimuth, tilt), kwp in kwp_by_orientation.items():
+        pv += kwp * orientation_profile(azimuth, tilt, step_minutes)
+    return pv
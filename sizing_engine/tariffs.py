@@ -0,0 +1,185 @@
+import numpy as np
+
+from .timegrid import time_grid
+
+
+# ----------------------------------------------------
+# TARIFS PAR DÉFAUT (FLANDRE, BI-HORAIRE + TARIF CAPACITAIRE)
+# ----------------------------------------------------
+DEFAULT_TARIFF = {
+    "import_peak": 0.34,          # €/kWh, heures pleines
+    "import_offpeak": 0.27,       # €/kWh, heures creuses (nuit, week-end)
+    "peak_hours": (7, 22),        # heures pleines : [début, fin[
+    "peak_weekdays_only": True,   # week-end entièrement en heures creuses
+    "first_weekday": 0,           # jour de semaine du 1er janvier (0 = lundi)
+    "injection": 0.04,            # €/kWh injecté
+    "capacity_eur_kw_year": 53.0, # tarif capacitaire : €/kW/an sur la pointe mensuelle
+    "capacity_min_kw": 2.5,       # pointe mensuelle minimale facturée
+    "fixed_eur_year": 0.0,        # redevances fixes
+    "import_prices": None,        # tarif dynamique : €/kWh par pas (remplace pleines / creuses)
+    "export_prices": None,        # injection dynamique : €/kWh par pas
+}
+
+# Coûts d'investissement par défaut (TVAC)
+DEFAULT_COSTS = {
+    "eur_per_wp": 1.20,           # panneaux, onduleur, pose
+    "eur_per_kwh_battery": 550.0,
+    "fixed_eur": 1500.0,          # raccordement, mise en service
+    "eur_per_w_ac": 0.0,          # surcoût onduleur par W AC (0 = inclus dans eur_per_wp)
+}
+
+
+def peak_mask(step_minutes: int = 60, tariff: dict | None = None) -> np.ndarray:
+    """Pas de l'année en heures pleines (booléens, un par pas)."""
+    tariff = {**DEFAULT_TARIFF, **(tariff or {})}
+    grid = time_grid(step_minutes)
+    start, end = tariff["peak_hours"]
+    mask = (grid.hour_of_day >= start) & (grid.hour_of_day < end)
+    if tariff["peak_weekdays_only"]:
+        weekday = (grid.day_of_year + tariff["first_weekday"]) % 7
+        mask &= weekday < 5
+    return mask
+
+
+def step_prices(tariff: dict | None = None, step_minutes: int = 60):
+    """
+    Prix d'import et d'injection de chaque pas (€/kWh) : séries dynamiques
+    import_prices / export_prices si fournies, sinon heures pleines /
+    creuses et tarif d'injection fixe.
+    """
+    tariff = {**DEFAULT_TARIFF, **(tariff or {})}
+    n_steps = time_grid(step_minutes).n_steps
+    if tariff["import_prices"] is not None:
+        import_price = np.asarray(tariff["import_prices"], dtype=float)
+    else:
+        import_price = np.where(peak_mask(step_minutes, tariff), tariff["import_peak"], tariff["import_offpeak"])
+    if tariff["export_prices"] is not None:
+        export_price = np.asarray(tariff["export_prices"], dtype=float)
+    else:
+        export_price = np.full(n_steps, float(tariff["injection"]))
+    return import_price, export_price
+
+
+def monthly_peaks(power_series, step_minutes: int = 60) -> np.ndarray:
+    """
+    Pointe mensuelle (kW) d'une série d'énergie par pas (kWh) : maximum de
+    la puissance moyenne par pas, (..., 12). Au pas horaire, la pointe
+    quart-horaire est sous-estimée.
+    """
+    grid = time_grid(step_minutes)
+    power = np.asarray(power_series, dtype=float) * grid.steps_per_hour
+    return np.maximum.reduceat(power, grid.month_start[:-1], axis=-1)
+
+
+# ----------------------------------------------------
+# FACTURE ANNUELLE (SÉRIES OU PILES DE SCÉNARIOS)
+# ----------------------------------------------------
+def energy_bill(grid_import, grid_export=None, tariff: dict | None = None, step_minutes: int = 60) -> dict:
+    """
+    Facture annuelle d'électricité à partir des séries import / export par
+    pas (kWh), de forme (pas,) ou (..., pas) pour un lot de scénarios :
+    - import en heures pleines / creuses (masque calendaire), ou au prix
+      de chaque pas pour un tarif dynamique (step_prices) ;
+    - injection rémunérée au tarif d'injection (ou prix par pas) ;
+    - tarif capacitaire : pointe mensuelle d'import (au moins
+      capacity_min_kw), facturée au douzième du tarif annuel.
+
+    Montants en € (scalaires ou tableaux (...,)), pointes en kW (..., 12).
+    """
+    tariff = {**DEFAULT_TARIFF, **(tariff or {})}
+    grid_import = np.asarray(grid_import, dtype=float)
+    grid_export = np.zeros(grid_import.shape[-1]) if grid_export is None else np.asarray(grid_export, dtype=float)
+
+    peak = peak_mask(step_minutes, tariff)
+    import_peak_kwh = grid_import @ peak.astype(float)
+    import_offpeak_kwh = grid_import.sum(axis=-1) - import_peak_kwh
+    export_kwh = grid_export.sum(axis=-1)
+
+    peaks_kw = monthly_peaks(grid_import, step_minutes)
+    billed_kw = np.maximum(peaks_kw, tariff["capacity_min_kw"])
+    capacity_cost = billed_kw.sum(axis=-1) * tariff["capacity_eur_kw_year"] / 12.0
+
+    import_price, export_price = step_prices(tariff, step_minutes)
+    import_cost = grid_import @ import_price
+    export_revenue = grid_export @ export_price
+    total = import_cost + capacity_cost + tariff["fixed_eur_year"] - export_revenue
+
+    return {
+        "import_peak_kwh": import_peak_kwh,
+        "import_offpeak_kwh": import_offpeak_kwh,
+        "export_kwh": export_kwh,
+        "monthly_peak_kw": peaks_kw,
+        "import_cost": import_cost,
+        "capacity_cost": capacity_cost,
+        "export_revenue": export_revenue,
+        "fixed_cost": tariff["fixed_eur_year"],
+        "total": total,
+    }
+
+
+# ----------------------------------------------------
+# ÉCONOMIES ET TEMPS DE RETOUR
+# ----------------------------------------------------
+def installation_cost(p_dc_w, battery_kwh=0.0, costs: dict | None = None, p_ac_w=0.0):
+    """Coût d'investissement estimé (€) ; accepte des tableaux de scénarios."""
+    costs = {**DEFAULT_COSTS, **(costs or {})}
+    return (
+        np.asarray(p_dc_w, dtype=float) * costs["eur_per_wp"]
+        + np.asarray(p_ac_w, dtype=float) * costs["eur_per_w_ac"]
+        + np.asarray(battery_kwh, dtype=float) * costs["eur_per_kwh_battery"]
+        + costs["fixed_eur"]
+    )
+
+
+def payback_period(investment, annual_savings, years: int = 25, price_escalation: float = 0.0):
+    """
+    Temps de retour (années, interpolé dans l'année) : première année où
+    les économies cumulées couvrent l'investissement, les économies
+    évoluant de price_escalation par an. annual_savings a la forme de
+    investment, ou un axe de plus (économies de chaque année, ex. bilans de
+    simulate_lifetime ; `years` est alors ignoré). inf si jamais atteint.
+    """
+    investment = np.asarray(investment, dtype=float)
+    savings = np.asarray(annual_savings, dtype=float)
+    if savings.ndim <= investment.ndim:
+        savings, investment = np.broadcast_arrays(savings, investment)
+        savings = np.multiply.outer(savings, np.ones(years))
+    savings = savings * (1.0 + price_escalation) ** np.arange(savings.shape[-1])
+
+    cumulative = np.cumsum(savings, axis=-1)
+    reached = cumulative >= investment[..., None]
+    first = np.argmax(reached, axis=-1)
+    before = np.take_along_axis(cumulative, first[..., None] - 1, axis=-1)[..., 0]
+    before = np.where(first > 0, before, 0.0)
+    in_year = np.take_along_axis(savings, first[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(investment <= before, first, first + (investment - before) / in_year)
+    return np.where(reached.any(axis=-1), payback, np.inf)
+
+
+def financial_summary(
+    cons_hourly,
+    grid_import,
+    grid_export,
+    investment,
+    tariff: dict | None = None,
+    step_minutes: int = 60,
+    years: int = 25,
+    price_escalation: float = 0.0,
+) -> dict:
+    """
+    Facture sans installation (tout importé), facture avec installation,
+    économies annuelles et temps de retour. grid_import / grid_export
+    peuvent être des piles de scénarios (..., pas) pour une même conso.
+    """
+    reference = energy_bill(cons_hourly, None, tariff, step_minutes)
+    bill = energy_bill(grid_import, grid_export, tariff, step_minutes)
+    savings = reference["total"] - bill["total"]
+    investment = np.broadcast_to(np.asarray(investment, dtype=float), np.shape(savings))
+    return {
+        "bill_reference": reference,
+        "bill": bill,
+        "investment": investment,
+        "annual_savings": savings,
+        "payback_years": payback_period(investment, savings, years, price_escalation),
+    }
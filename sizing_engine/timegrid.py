@@ -0,0 +1,80 @@
+import functools
+
+import numpy as np
+
+
+# ----------------------------------------------------
+# CALENDRIER DE SIMULATION (ANNÉE TYPE DE 365 JOURS)
+# ----------------------------------------------------
+MONTH_LABELS = ["Jan", "Fév", "Mar", "Avr", "Mai", "Juin",
+                "Juil", "Août", "Sep", "Oct", "Nov", "Déc"]
+DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+HOURS_PER_MONTH = [d * 24 for d in DAYS_PER_MONTH]
+
+# Pas de temps de simulation supportés (minutes)
+TIME_STEPS_MINUTES = (60, 30, 15)
+
+
+def steps_per_hour(step_minutes: int) -> int:
+    """Nombre de pas par heure ; lève ValueError si le pas n'est pas supporté."""
+    if step_minutes not in TIME_STEPS_MINUTES:
+        raise ValueError(f"Pas de temps non supporté : {step_minutes} min (attendu : {TIME_STEPS_MINUTES}).")
+    return 60 // step_minutes
+
+
+class TimeGrid:
+    """
+    Index calendaire d'une année au pas step_minutes, calculé une fois :
+    - month_start : indice du premier pas de chaque mois (+ fin d'année) ;
+    - month, day_of_year, hour_of_day : valeur pour chaque pas ;
+    - day_month, days_per_month : mois de chaque jour, jours par mois.
+    Tous les tableaux sont en lecture seule.
+    """
+
+    def __init__(self, step_minutes: int = 60):
+        self.step_minutes = step_minutes
+        self.steps_per_hour = steps_per_hour(step_minutes)
+        self.steps_per_day = 24 * self.steps_per_hour
+        self.days_per_month = np.array(DAYS_PER_MONTH)
+        self.n_days = int(self.days_per_month.sum())
+        self.n_steps = self.n_days * self.steps_per_day
+
+        self.day_month = np.repeat(np.arange(12), self.days_per_month)
+        self.month_start_day = np.concatenate(([0], np.cumsum(self.days_per_month)))
+        self.month_start = self.month_start_day * self.steps_per_day
+
+        self.month = np.repeat(self.day_month, self.steps_per_day)
+        self.day_of_year = np.repeat(np.arange(self.n_days), self.steps_per_day)
+        self.step_of_day = np.tile(np.arange(self.steps_per_day), self.n_days)
+        self.hour_of_day = self.step_of_day / self.steps_per_hour
+
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+
+    def per_day(self, daily, day_shape):
+        """
+        Série annuelle à partir d'une valeur par jour (365) et d'une forme
+        journalière (steps_per_day) : produit extérieur aplati.
+        """
+        return (np.asarray(daily, dtype=float)[:, None] * np.asarray(day_shape, dtype=float)[None, :]).ravel()
+
+    def monthly_totals(self, series):
+        """Somme par mois (12 valeurs, ou (..., 12) pour une pile de séries)."""
+        return np.add.reduceat(np.asarray(series, dtype=float), self.month_start[:-1], axis=-1)
+
+    def typical_days(self, series):
+        """
+        Jour type de chaque mois (moyenne des jours du mois), en une fois :
+        tableau (12, steps_per_day), ou (..., 12, steps_per_day) pour une pile.
+        """
+        series = np.asarray(series, dtype=float)
+        days = series.reshape(series.shape[:-1] + (self.n_days, self.steps_per_day))
+        totals = np.add.reduceat(days, self.month_start_day[:-1], axis=-2)
+        return totals / self.days_per_month[:, None]
+
+
+@functools.lru_cache(maxsize=None)
+def time_grid(step_minutes: int = 60) -> TimeGrid:
+    """Index calendaire partagé pour un pas de temps."""
+    return TimeGrid(step_minutes)
@@ -0,0 +1,999 @@
+import functools
+import itertools
+import math
+
+import numpy as np
+
+from .catalog import CATALOG
+from .profiling import count
+
+
+# ----------------------------------------------------
+# OPTIMISATION DES STRINGS
+# ----------------------------------------------------
+def get_nominal_dc_voltage(inverter: dict) -> float:
+    """Tension DC nominale typique, issue des fiches techniques ou du type réseau."""
+    if "V_nom_dc" in inverter and inverter["V_nom_dc"] > 0:
+        return inverter["V_nom_dc"]
+
+    grid = inverter["type_reseau"]
+    if grid == "Mono":
+        return 350.0
+    if grid == "Tri 3x230":
+        return 360.0
+    if grid == "Tri 3x400":
+        return 600.0
+
+    return 0.5 * (inverter["Vmpp_min"] + inverter["Vmpp_max"])
+
+
+def _string_length_window(panel: dict, inverter: dict, T_min: float, T_max: float,
+                          max_parallel: int | None = None):
+    """
+    Contraintes électriques communes aux moteurs de câblage.
+
+    Renvoie None si aucun string n'est possible, sinon les longueurs de string
+    admissibles (triées), le nombre maximal de strings en parallèle par MPPT
+    et les grandeurs nécessaires au calcul du score.
+    """
+    Voc = panel["Voc"]
+    Vmp = panel["Vmp"]
+    Isc = panel["Isc"]
+    alpha_V = panel["alpha_V"] / 100.0
+
+    Vdc_max = inverter["Vdc_max"]
+    Vmpp_min = inverter["Vmpp_min"]
+    Vmpp_max = inverter["Vmpp_max"]
+    Impp_max = inverter["Impp_max"]
+
+    voc_factor_cold = (1 + alpha_V * (T_min - 25.0))
+    vmp_factor_hot = (1 + alpha_V * (T_max - 25.0))
+
+    if voc_factor_cold <= 0 or vmp_factor_hot <= 0:
+        return None
+
+    # Courant : k strings en parallèle sur un MPPT => courant = k * Isc
+    if Isc > Impp_max:
+        return None
+    parallel_max = math.floor(Impp_max / Isc) if Isc > 0 else 1
+    if max_parallel is not None:
+        parallel_max = min(parallel_max, max_parallel)
+    if parallel_max < 1:
+        return None
+
+    # Bornes sur le nombre de modules en série
+    N_series_max_voc = math.floor(Vdc_max / (Voc * voc_factor_cold))
+
+    if Vmp * vmp_factor_hot > 0:
+        N_series_min_vmp = math.ceil(Vmpp_min / (Vmp * vmp_factor_hot))
+        N_series_max_vmp = math.floor(Vmpp_max / (Vmp * vmp_factor_hot))
+    else:
+        N_series_min_vmp = 1
+        N_series_max_vmp = N_series_max_voc
+
+    N_series_min = max(3, N_series_min_vmp)
+    N_series_max = min(N_series_max_voc, N_series_max_vmp)
+
+    if N_series_min > N_series_max:
+        return None
+
+    lengths = [
+        L for L in range(N_series_min, N_series_max + 1)
+        if L * Voc * voc_factor_cold <= Vdc_max
+        and Vmpp_min <= L * Vmp * vmp_factor_hot <= Vmpp_max
+    ]
+    if not lengths:
+        return None
+
+    return {
+        "lengths": lengths,
+        "Vmp": Vmp,
+        "vmp_factor_hot": vmp_factor_hot,
+        "Vnom": get_nominal_dc_voltage(inverter),
+        "Pstc": panel["Pstc"],
+        "P_ac": inverter["P_ac"],
+        "P_dc_max": inverter.get("P_dc_max", 1e9),
+        "nb_mppt": inverter["nb_mppt"],
+        "max_parallel": parallel_max,
+    }
+
+
+def _score_layout(lengths, window: dict, ratio_dc_ac_target: float, parallel=None):
+    """
+    Score d'un câblage (liste des longueurs par MPPT, 0 = MPPT libre ;
+    parallel : nombre de strings par MPPT, 1 par MPPT utilisé par défaut).
+
+    Renvoie (score, best) où best est le dict renvoyé par optimize_strings.
+    """
+    if parallel is None:
+        parallel = [1 if L > 0 else 0 for L in lengths]
+    used_lengths = [L for L in lengths if L > 0]
+    n_used_mppt = len(used_lengths)
+    N_used = sum(L * k for L, k in zip(lengths, parallel) if L > 0)
+    P_dc = N_used * window["Pstc"]
+    ratio_dc_ac = P_dc / window["P_ac"]
+
+    Vmp = window["Vmp"]
+    vmp_factor_hot = window["vmp_factor_hot"]
+    Vnom = window["Vnom"]
+    vmp_mean = sum(L * Vmp * vmp_factor_hot for L in used_lengths) / n_used_mppt
+
+    score = (
+        1000 * N_used
+        + 100 * n_used_mppt
+        - 2.0 * abs(vmp_mean - Vnom)
+        - 50.0 * abs(ratio_dc_ac - ratio_dc_ac_target)
+    )
+
+    idx_best = min(
+        range(n_used_mppt),
+        key=lambda i: abs(used_lengths[i] * Vmp * vmp_factor_hot - Vnom)
+    )
+    best = {
+        "strings": list(lengths),
+        "parallel": list(parallel),
+        "N_used": N_used,
+        "N_series_main": used_lengths[idx_best],
+        "P_dc": P_dc,
+        "ratio_dc_ac": ratio_dc_ac,
+    }
+    return score, best
+
+
+def _optimize_strings_exhaustive(
+    N_tot: int,
+    window: dict,
+    ratio_dc_ac_target: float,
+    ratio_dc_ac_min: float,
+    ratio_dc_ac_max: float,
+):
+    """
+    Moteur de référence : énumération complète de toutes les combinaisons
+    (MPPT libre, ou une longueur admissible et 1 à max_parallel strings par
+    MPPT). Conservé pour la validation du moteur par programmation dynamique.
+    """
+    lengths_ok = window["lengths"]
+    nb_mppt = window["nb_mppt"]
+    max_parallel = window["max_parallel"]
+    Pstc = window["Pstc"]
+    P_ac = window["P_ac"]
+    P_dc_max = window["P_dc_max"]
+
+    best = None
+    best_score = -1e9
+    leaves = 0
+
+    def search(mppt_index, remaining_modules, lengths, parallel):
+        nonlocal best, best_score, leaves
+
+        if mppt_index == nb_mppt:
+            leaves += 1
+            N_used = sum(L * k for L, k in zip(lengths, parallel))
+            if N_used == 0:
+                return
+
+            P_dc = N_used * Pstc
+            if P_dc > P_dc_max:
+                return
+
+            ratio_dc_ac = P_dc / P_ac
+            if not (ratio_dc_ac_min <= ratio_dc_ac <= ratio_dc_ac_max):
+                return
+
+            score, candidate = _score_layout(lengths, window, ratio_dc_ac_target, parallel)
+            if score > best_score:
+                best = candidate
+                best_score = score
+
+            return
+
+        # MPPT non utilisé
+        search(mppt_index + 1, remaining_modules, lengths + [0], parallel + [0])
+
+        # MPPT avec k strings actifs de longueur L
+        for L in lengths_ok:
+            if L > remaining_modules:
+                break
+            for k in range(1, max_parallel + 1):
+                if k * L > remaining_modules:
+                    break
+                search(mppt_index + 1, remaining_modules - k * L, lengths + [L], parallel + [k])
+
+    search(0, N_tot, [], [])
+    count("optimize_strings.leaves", leaves)
+
+    return best
+
+
+def _reachable_totals(lengths, nb_mppt: int, N_max: int):
+    """reachable[k] : totaux de modules atteignables avec exactement k strings."""
+    reachable = [{0}]
+    for k in range(1, nb_mppt + 1):
+        reachable.append({
+            n + L
+            for n in reachable[k - 1]
+            for L in lengths
+            if n + L <= N_max
+        })
+    return reachable
+
+
+def _class_score(N_used: int, k: int, window: dict, ratio_dc_ac_target: float):
+    """Score d'un couple (modules utilisés, MPPT utilisés), calculé sur un câblage représentatif."""
+    lengths = window["lengths"]
+    L_max = lengths[-1]
+
+    def smallest_layout(n, slots, start):
+        """Plus petite suite croissante (ordre lexicographique) de longueurs de somme n."""
+        if slots == 0:
+            return [] if n == 0 else None
+        for i in range(start, len(lengths)):
+            L = lengths[i]
+            if L * slots > n:
+                break
+            if L + (slots - 1) * L_max < n:
+                continue
+            rest = smallest_layout(n - L, slots - 1, i)
+            if rest is not None:
+                return [L] + rest
+        return None
+
+    layout = [0] * (window["nb_mppt"] - k) + smallest_layout(N_used, k, 0)
+    score, _ = _score_layout(layout, window, ratio_dc_ac_target)
+    return score
+
+
+def _class_layout(N_used: int, k: int, window: dict, reachable, ratio_dc_ac_target: float):
+    """
+    Câblage retenu pour un couple (N_used, k), identique au moteur exhaustif.
+
+    Toutes les suites de longueurs de somme N_used ont le même score en
+    arithmétique exacte, mais le moteur exhaustif garde la première suite
+    (ordre lexicographique) de score flottant maximal. On rejoue ce parcours,
+    limité aux suites de somme N_used.
+    """
+    lengths = window["lengths"]
+    nb_mppt = window["nb_mppt"]
+    Vnom = window["Vnom"]
+    vmp_terms = [L * window["Vmp"] * window["vmp_factor_hot"] for L in lengths]
+    ratio_dc_ac = N_used * window["Pstc"] / window["P_ac"]
+
+    best_score = -1e9
+    best_seq = None
+    seq = []
+    leaves = 0
+
+    def walk(remaining, slots, vmp_sum):
+        nonlocal best_score, best_seq, leaves
+        if slots == 0:
+            leaves += 1
+            vmp_mean = vmp_sum / k
+            score = (
+                1000 * N_used
+                + 100 * k
+                - 2.0 * abs(vmp_mean - Vnom)
+                - 50.0 * abs(ratio_dc_ac - ratio_dc_ac_target)
+            )
+            if score > best_score:
+                best_score = score
+                best_seq = seq[:]
+            return
+        for L, vmp_L in zip(lengths, vmp_terms):
+            if L > remaining:
+                break
+            if remaining - L not in reachable[slots - 1]:
+                continue
+            seq.append(L)
+            walk(remaining - L, slots - 1, vmp_sum + vmp_L)
+            seq.pop()
+
+    walk(N_used, k, 0)
+    count("optimize_strings.leaves", leaves)
+
+    _, best = _score_layout([0] * (nb_mppt - k) + best_seq, window, ratio_dc_ac_target)
+    return best
+
+
+def _class_admissible(N_used: int, window: dict, ratio_dc_ac_min: float, ratio_dc_ac_max: float) -> bool:
+    P_dc = N_used * window["Pstc"]
+    if P_dc > window["P_dc_max"]:
+        return False
+    return ratio_dc_ac_min <= P_dc / window["P_ac"] <= ratio_dc_ac_max
+
+
+def _optimize_strings_dp(
+    N_tot: int,
+    window: dict,
+    ratio_dc_ac_target: float,
+    ratio_dc_ac_min: float,
+    ratio_dc_ac_max: float,
+):
+    """
+    Moteur par programmation dynamique + séparation-évaluation.
+
+    L'ordre des MPPT n'influence pas le score : un câblage est un multiensemble
+    de longueurs. La tension string étant proportionnelle à la longueur, le
+    score ne dépend que du couple (modules utilisés, MPPT utilisés). On calcule
+    donc les totaux atteignables avec k strings, puis on évalue les couples
+    (N_used, k) par borne supérieure décroissante (1000 * N_used + 100 * k,
+    les pénalités étant positives) en s'arrêtant dès que la borne ne peut plus
+    battre le meilleur score.
+
+    À score égal, on renvoie le même câblage que le moteur exhaustif
+    (MPPT libres en premier, même départage des égalités).
+
+    Avec des strings en parallèle (max_parallel > 1), voir _optimize_strings_parallel.
+    """
+    if window["max_parallel"] > 1:
+        return _optimize_strings_parallel(
+            N_tot, window, ratio_dc_ac_target, ratio_dc_ac_min, ratio_dc_ac_max
+        )
+
+    nb_mppt = window["nb_mppt"]
+    reachable = _reachable_totals(window["lengths"], nb_mppt, N_tot)
+
+    candidates = [
+        (1000 * N_used + 100 * k, N_used, k)
+        for k in range(1, nb_mppt + 1)
+        for N_used in reachable[k]
+        if _class_admissible(N_used, window, ratio_dc_ac_min, ratio_dc_ac_max)
+    ]
+    candidates.sort(reverse=True)
+
+    best_score = -1e9
+    best_class = None
+
+    for bound, N_used, k in candidates:
+        if bound < best_score:
+            break
+
+        count("optimize_strings.leaves")
+        score = _class_score(N_used, k, window, ratio_dc_ac_target)
+        if score > best_score:
+            best_score = score
+            best_class = (N_used, k)
+
+    if best_class is None:
+        return None
+
+    N_used, k = best_class
+    return _class_layout(N_used, k, window, reachable, ratio_dc_ac_target)
+
+
+# ----------------------------------------------------
+# STRINGS EN PARALLÈLE (k STRINGS DE MÊME LONGUEUR PAR MPPT)
+# ----------------------------------------------------
+def _parallel_options(window: dict):
+    """Choix d'un MPPT utilisé : (longueur, strings en parallèle), dans l'ordre du moteur exhaustif."""
+    return [(L, k) for L in window["lengths"] for k in range(1, window["max_parallel"] + 1)]
+
+
+def _parallel_reachable(window: dict, N_max: int):
+    """
+    reach[m][N, S] : vrai si N modules au total, pour une somme S des
+    longueurs de string (une par MPPT), sont atteignables avec exactement m
+    MPPT utilisés. Programmation dynamique sur (MPPT, modules, somme des
+    longueurs), en tableaux booléens décalés.
+    """
+    S_max = window["nb_mppt"] * window["lengths"][-1]
+    reach = [np.zeros((N_max + 1, S_max + 1), dtype=bool)]
+    reach[0][0, 0] = True
+    for _ in range(window["nb_mppt"]):
+        previous = reach[-1]
+        current = np.zeros_like(previous)
+        for L, k in _parallel_options(window):
+            n = k * L
+            if n > N_max:
+                continue
+            current[n:, L:] |= previous[:N_max + 1 - n, :S_max + 1 - L]
+        reach.append(current)
+    return reach
+
+
+def _parallel_class_scores(reach, window: dict, ratio_dc_ac_target: float,
+                           ratio_dc_ac_min: float, ratio_dc_ac_max: float):
+    """
+    Meilleur score de chaque couple (N_used, m) : la tension moyenne des MPPT
+    ne dépend que de la somme S des longueurs, on retient le S atteignable le
+    plus proche de la tension nominale. Renvoie (score, S) de forme
+    (m, N_used), score = -inf si le couple n'est pas admissible.
+    """
+    nb_mppt = window["nb_mppt"]
+    N_max, S_max = reach[0].shape[0] - 1, reach[0].shape[1] - 1
+    N = np.arange(N_max + 1)
+    S = np.arange(S_max + 1)
+    P_dc = N * window["Pstc"]
+    ratio = P_dc / window["P_ac"]
+    admissible = (P_dc <= window["P_dc_max"]) & (ratio >= ratio_dc_ac_min) & (ratio <= ratio_dc_ac_max)
+
+    scores = np.full((nb_mppt + 1, N_max + 1), -np.inf)
+    best_S = np.zeros((nb_mppt + 1, N_max + 1), dtype=int)
+    vmp_string = window["Vmp"] * window["vmp_factor_hot"]
+    for m in range(1, nb_mppt + 1):
+        deviation = np.where(reach[m], np.abs(S * vmp_string / m - window["Vnom"])[None, :], np.inf)
+        best_S[m] = deviation.argmin(axis=1)
+        best_dev = deviation[N, best_S[m]]
+        ok = admissible & np.isfinite(best_dev)
+        scores[m, ok] = (
+            1000 * N[ok]
+            + 100 * m
+            - 2.0 * best_dev[ok]
+            - 50.0 * np.abs(ratio[ok] - ratio_dc_ac_target)
+        )
+    return scores, best_S
+
+
+def _parallel_layout(N_used: int, m: int, S: int, window: dict, reach, ratio_dc_ac_target: float):
+    """
+    Câblage retenu pour la classe (N_used, m), identique au moteur exhaustif.
+
+    Comme pour _class_layout, les câblages de la classe dont la somme des
+    longueurs est aussi proche de la tension nominale que S ont le même
+    score en arithmétique exacte ; le moteur exhaustif garde le premier (MPPT
+    libres en premier, ordre des options) de score flottant maximal. Le score
+    flottant ne dépend que de la suite des longueurs : on calcule d'un bloc
+    celui de toutes les suites de longueurs de ces sommes (mêmes additions,
+    dans le même ordre), puis, par score décroissant, les nombres de strings
+    en parallèle donnant N_used modules.
+    """
+    lengths = np.asarray(window["lengths"])
+    Vnom = window["Vnom"]
+    vmp_terms = lengths * window["Vmp"] * window["vmp_factor_hot"]
+    ratio_dc_ac = N_used * window["Pstc"] / window["P_ac"]
+    sums = np.arange(reach[m].shape[1])
+    deviation = np.abs(sums * (window["Vmp"] * window["vmp_factor_hot"]) / m - Vnom)
+    targets = sums[reach[m][N_used] & (deviation <= deviation[S] + 1e-9)]
+
+    # Suites de longueurs (indices), somme flottante des tensions et des longueurs
+    seqs = np.zeros((1, 0), dtype=int)
+    vmp_sum = np.zeros(1)
+    length_sum = np.zeros(1, dtype=int)
+    for slots in range(m - 1, -1, -1):
+        extended = length_sum[:, None] + lengths[None, :]
+        ok = (
+            (extended[..., None] + slots * lengths[0] <= targets)
+            & (extended[..., None] + slots * lengths[-1] >= targets)
+        ).any(axis=-1)
+        prefix, index = np.nonzero(ok)
+        seqs = np.column_stack((seqs[prefix], index))
+        vmp_sum = vmp_sum[prefix] + vmp_terms[index]
+        length_sum = extended[prefix, index]
+    count("optimize_strings.leaves", len(seqs))
+    scores = (
+        1000 * N_used
+        + 100 * m
+        - 2.0 * np.abs(vmp_sum / m - Vnom)
+        - 50.0 * abs(ratio_dc_ac - ratio_dc_ac_target)
+    )
+
+    # Par score décroissant : premier couple (longueurs, strings en parallèle)
+    # de N_used modules dans l'ordre du moteur exhaustif
+    parallels = np.array(list(itertools.product(range(1, window["max_parallel"] + 1), repeat=m)))
+    for score in np.unique(scores)[::-1]:
+        group = lengths[seqs[scores == score]]
+        row, col = np.nonzero(group @ parallels.T == N_used)
+        if len(row):
+            break
+    layouts = np.empty((len(row), 2 * m), dtype=int)
+    layouts[:, 0::2] = group[row]
+    layouts[:, 1::2] = parallels[col]
+    layout = layouts[np.lexsort(layouts.T[::-1])[0]].reshape(m, 2).tolist()
+
+    free = [0] * (window["nb_mppt"] - m)
+    _, best = _score_layout(
+        free + [L for L, _ in layout], window, ratio_dc_ac_target, free + [k for _, k in layout]
+    )
+    return best
+
+
+def _best_parallel_class(scores, N_limit: int):
+    """Couple (N_used, m) de meilleur score pour N_used <= N_limit (puis N_used, m les plus grands)."""
+    sub = scores[:, :N_limit + 1]
+    if not np.isfinite(sub).any():
+        return None
+    m_idx, n_idx = np.nonzero(sub == sub.max())
+    i = np.lexsort((m_idx, n_idx))[-1]
+    return int(n_idx[i]), int(m_idx[i])
+
+
+def _optimize_strings_parallel(
+    N_tot: int,
+    window: dict,
+    ratio_dc_ac_target: float,
+    ratio_dc_ac_min: float,
+    ratio_dc_ac_max: float,
+):
+    """
+    Moteur avec strings en parallèle : un MPPT reçoit k strings de même
+    longueur L (k * Isc <= Impp_max). Le score ne dépend que de (N_used,
+    m MPPT utilisés, somme S des longueurs) : on calcule les triplets
+    atteignables (_parallel_reachable), le meilleur S de chaque (N_used, m),
+    puis le câblage de la meilleure classe retenu par le moteur exhaustif
+    (_parallel_layout).
+    """
+    reach = _parallel_reachable(window, N_tot)
+    scores, best_S = _parallel_class_scores(
+        reach, window, ratio_dc_ac_target, ratio_dc_ac_min, ratio_dc_ac_max
+    )
+    count("optimize_strings.leaves", int(np.isfinite(scores).sum()))
+    best = _best_parallel_class(scores, N_tot)
+    if best is None:
+        return None
+    N_used, m = best
+    return _parallel_layout(N_used, m, int(best_S[m, N_used]), window, reach, ratio_dc_ac_target)
+
+
+def optimize_strings(
+    N_tot: int,
+    panel: dict,
+    inverter: dict,
+    T_min: float,
+    T_max: float,
+    ratio_dc_ac_target: float = 1.35,
+    ratio_dc_ac_min: float = 0.80,
+    ratio_dc_ac_max: float = 2.00,
+    method: str = "dp",
+    max_parallel: int | None = None,
+):
+    """
+    Optimisation automatique des strings, valable pour tous les onduleurs :
+
+    - 0 ou k strings de même longueur en parallèle par MPPT, avec
+      k * Isc <= Impp_max et k <= max_parallel (None = limite de courant
+      seule). Avec les courants du catalogue, k = 1 (1 string par MPPT).
+    - Longueurs de strings éventuellement différentes sur chaque MPPT.
+    - Chaque string doit vérifier :
+        * Voc_froid <= Vdc_max
+        * Vmp_chaud dans [Vmpp_min, Vmpp_max]
+    - Le total de modules utilisés <= N_tot.
+    - Le ratio DC/AC dans [ratio_dc_ac_min, ratio_dc_ac_max].
+
+    Le résultat donne les longueurs (strings) et le nombre de strings
+    (parallel) de chaque MPPT.
+
+    method :
+    - "dp" (défaut) : programmation dynamique + séparation-évaluation.
+    - "exhaustive" : énumération complète, moteur de référence.
+    """
+    if method == "dp":
+        engine = _optimize_strings_dp
+    elif method == "exhaustive":
+        engine = _optimize_strings_exhaustive
+    else:
+        raise ValueError(f"Méthode d'optimisation inconnue : {method}")
+
+    count("optimize_strings.calls")
+    window = _string_length_window(panel, inverter, T_min, T_max, max_parallel)
+    if window is None:
+        return None
+
+    return engine(
+        N_tot,
+        window,
+        ratio_dc_ac_target,
+        ratio_dc_ac_min,
+        ratio_dc_ac_max,
+    )
+
+
+def optimize_strings_table(
+    panel: dict,
+    inverter: dict,
+    T_min: float,
+    T_max: float,
+    ratio_dc_ac_target: float = 1.35,
+    ratio_dc_ac_min: float = 0.80,
+    ratio_dc_ac_max: float = 2.00,
+    N_min: int = 3,
+    N_max: int = 100,
+    max_parallel: int | None = None,
+):
+    """
+    Câblage optimal pour chaque nombre de modules, calculé en une seule passe.
+
+    Renvoie un tableau structuré numpy indexé par N_tot (table[N_tot], de 0 à
+    N_max). Une ligne valide (valid == True) est identique au résultat de
+    optimize_strings(N_tot, ...) ; les lignes N_tot < N_min ou sans câblage
+    admissible sont marquées invalides.
+    """
+    nb_mppt = inverter["nb_mppt"]
+    table = np.zeros(N_max + 1, dtype=[
+        ("valid", np.bool_),
+        ("strings", np.int16, (nb_mppt,)),
+        ("parallel", np.int16, (nb_mppt,)),
+        ("N_used", np.int16),
+        ("N_series_main", np.int16),
+        ("P_dc", np.float64),
+        ("ratio_dc_ac", np.float64),
+    ])
+
+    window = _string_length_window(panel, inverter, T_min, T_max, max_parallel)
+    if window is None:
+        return table
+
+    if window["max_parallel"] > 1:
+        _fill_parallel_table(table, window, ratio_dc_ac_target, ratio_dc_ac_min, ratio_dc_ac_max, N_min)
+        return table
+
+    reachable = _reachable_totals(window["lengths"], nb_mppt, N_max)
+    layouts = {}
+
+    # Même règle que _optimize_strings_dp : meilleur score, puis premier couple
+    # dans l'ordre (borne, N_used, k) décroissant.
+    best_key = None
+    for N_tot in range(1, N_max + 1):
+        for k in range(1, nb_mppt + 1):
+            if N_tot not in reachable[k]:
+                continue
+            if not _class_admissible(N_tot, window, ratio_dc_ac_min, ratio_dc_ac_max):
+                continue
+            score = _class_score(N_tot, k, window, ratio_dc_ac_target)
+            key = (score, 1000 * N_tot + 100 * k, N_tot, k)
+            if best_key is None or key > best_key:
+                best_key = key
+
+        if N_tot < N_min or best_key is None:
+            continue
+
+        best_class = best_key[2:]
+        if best_class not in layouts:
+            layouts[best_class] = _class_layout(*best_class, window, reachable, ratio_dc_ac_target)
+        best = layouts[best_class]
+
+        _set_table_row(table[N_tot], best)
+
+    return table
+
+
+def _set_table_row(row, best: dict):
+    row["valid"] = True
+    row["strings"] = best["strings"]
+    row["parallel"] = best["parallel"]
+    row["N_used"] = best["N_used"]
+    row["N_series_main"] = best["N_series_main"]
+    row["P_dc"] = best["P_dc"]
+    row["ratio_dc_ac"] = best["ratio_dc_ac"]
+
+
+def _fill_parallel_table(table, window: dict, ratio_dc_ac_target: float,
+                         ratio_dc_ac_min: float, ratio_dc_ac_max: float, N_min: int):
+    """Table de câblage avec strings en parallèle : une seule DP jusqu'à N_max, puis meilleur préfixe."""
+    N_max = len(table) - 1
+    reach = _parallel_reachable(window, N_max)
+    scores, best_S = _parallel_class_scores(
+        reach, window, ratio_dc_ac_target, ratio_dc_ac_min, ratio_dc_ac_max
+    )
+    layouts = {}
+    for N_tot in range(N_min, N_max + 1):
+        best_class = _best_parallel_class(scores, N_tot)
+        if best_class is None:
+            continue
+        if best_class not in layouts:
+            N_used, m = best_class
+            layouts[best_class] = _parallel_layout(
+                N_used, m, int(best_S[m, N_used]), window, reach, ratio_dc_ac_target
+            )
+        _set_table_row(table[N_tot], layouts[best_class])
+
+
+def wiring_from_table(table, N_tot: int):
+    """Lecture O(1) d'une table de câblage : même dict que optimize_strings, ou None."""
+    if table is None or not 0 <= N_tot < len(table):
+        return None
+    row = table[N_tot]
+    if not row["valid"]:
+        return None
+    return {
+        "strings": [int(L) for L in row["strings"]],
+        "parallel": [int(k) for k in row["parallel"]],
+        "N_used": int(row["N_used"]),
+        "N_series_main": int(row["N_series_main"]),
+        "P_dc": float(row["P_dc"]),
+        "ratio_dc_ac": float(row["ratio_dc_ac"]),
+    }
+
+
+def strings_label(wiring: dict) -> str:
+    """Libellé compact d'un câblage, ex. "0-9-2x10" (k x L : k strings de L modules en parallèle)."""
+    parallel = wiring.get("parallel") or [1] * len(wiring["strings"])
+    return "-".join(f"{k}x{L}" if k > 1 else str(L) for L, k in zip(wiring["strings"], parallel))
+
+
+# ----------------------------------------------------
+# CHOIX AUTOMATIQUE DU MEILLEUR ONDULEUR
+# ----------------------------------------------------
+def inverter_p_dc_upper_bound(panel: dict, inverter: dict, n_panels: int, max_dc_ac: float,
+                              T_min: float, T_max: float) -> float:
+    """
+    Borne supérieure (peu coûteuse) de la puissance DC câblable sur un onduleur :
+    min(N_tot * Pstc, P_dc_max, max_dc_ac * P_ac, nb_mppt * max_parallel * N_series_max * Pstc).
+    Renvoie 0 si aucun string n'est possible.
+    """
+    window = _string_length_window(panel, inverter, T_min, T_max)
+    if window is None:
+        return 0.0
+
+    Pstc = panel["Pstc"]
+    return min(
+        n_panels * Pstc,
+        inverter["P_dc_max"],
+        # marge d'arrondi : le ratio est vérifié sous la forme P_dc / P_ac
+        max_dc_ac * inverter["P_ac"] * (1 + 1e-9),
+        inverter["nb_mppt"] * window["max_parallel"] * window["lengths"][-1] * Pstc,
+    )
+
+
+def evaluate_inverter(
+    panel: dict,
+    inverter: dict,
+    n_panels: int,
+    max_dc_ac: float,
+    T_min: float,
+    T_max: float,
+):
+    """
+    Meilleur câblage d'un onduleur candidat pour la sélection auto, ou None.
+    Renvoie le dict utilisé par select_best_inverter (inv_id, opt, P_dc, ratio, P_ac).
+    """
+    opt = optimize_strings(
+        N_tot=n_panels,
+        panel=panel,
+        inverter=inverter,
+        T_min=T_min,
+        T_max=T_max,
+        ratio_dc_ac_min=0.8,
+        ratio_dc_ac_max=max_dc_ac,  # borne du slider pour l'AUTO
+    )
+    if opt is None:
+        return None
+
+    p_ac = inverter["P_ac"]
+    P_dc = opt["P_dc"]
+    ratio = P_dc / p_ac
+
+    if P_dc > inverter["P_dc_max"]:
+        return None
+
+    return {
+        "inv_id": inverter["id"],
+        "opt": opt,
+        "P_dc": P_dc,
+        "ratio": ratio,
+        "P_ac": p_ac,
+    }
+
+
+def candidate_inverters(grid_type: str, fam_pref: str | None):
+    """Onduleurs du catalogue compatibles (type réseau + famille), avec leur rang catalogue."""
+    table = CATALOG.inverters
+    if fam_pref is None:
+        rows = table.select(Type_reseau=grid_type)
+    else:
+        rows = table.select(Type_reseau=grid_type, Famille=fam_pref)
+    return [(int(row), CATALOG.inverter_elec(str(table.ids[row]))) for row in rows]
+
+
+def select_best_inverter(
+    panel: dict,
+    n_panels: int,
+    grid_type: str,
+    max_dc_ac: float,
+    fam_pref: str | None,
+    T_min: float,
+    T_max: float,
+    prune: bool = True,
+):
+    """
+    Sélection auto de l'onduleur :
+    - respecte type réseau + famille
+    - P_dc <= P_DC_max
+    - ratio DC/AC <= max_dc_ac (slider utilisateur, ex. 1.35)
+    - maximise P_dc (à égalité, le premier onduleur du catalogue)
+
+    Avec prune=True, les onduleurs sont évalués par borne supérieure de P_dc
+    décroissante et la recherche s'arrête dès que la borne ne peut plus battre
+    le meilleur P_dc trouvé. Le résultat est identique à prune=False.
+    """
+    candidates = []
+    for order, inv_elec in candidate_inverters(grid_type, fam_pref):
+        if prune:
+            bound = inverter_p_dc_upper_bound(panel, inv_elec, n_panels, max_dc_ac, T_min, T_max)
+        else:
+            bound = float("inf")
+        candidates.append((bound, order, inv_elec))
+
+    if prune:
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+
+    best = None
+    best_score = -1e9
+    best_order = None
+
+    for bound, order, inv_elec in candidates:
+        if prune and best is not None:
+            if bound < best_score:
+                break
+            # À borne égale, seul un onduleur placé plus tôt dans le catalogue
+            # peut encore l'emporter (égalité de P_dc).
+            if bound == best_score and order > best_order:
+                continue
+
+        count("select_best_inverter.candidates")
+        candidate = evaluate_inverter(panel, inv_elec, n_panels, max_dc_ac, T_min, T_max)
+        if candidate is None:
+            continue
+
+        score = candidate["P_dc"]
+
+        if score > best_score or (score == best_score and order < best_order):
+            best_score = score
+            best_order = order
+            best = candidate
+
+    return best
+
+
+# ----------------------------------------------------
+# INSTALLATIONS MULTI-ONDULEURS
+# ----------------------------------------------------
+@functools.lru_cache(maxsize=512)
+def _inverter_wiring_table(panel_items: tuple, inverter_id: str, T_min: float, T_max: float,
+                           max_dc_ac: float, N_max: int):
+    """Table de câblage d'un onduleur pour la sélection auto (ratio ≤ max_dc_ac), mémorisée."""
+    table = optimize_strings_table(
+        dict(panel_items),
+        CATALOG.inverter_elec(inverter_id),
+        T_min,
+        T_max,
+        ratio_dc_ac_min=0.8,
+        ratio_dc_ac_max=max_dc_ac,
+        N_max=N_max,
+    )
+    table.setflags(write=False)
+    return table
+
+
+def _add_inverter(reach: int, sizes, mask: int) -> int:
+    """Totaux atteignables (bits d'un entier) après ajout d'un onduleur câblant l'une des tailles `sizes`."""
+    out = 0
+    for u in sizes:
+        out |= reach << u
+    return out & mask
+
+
+def select_inverter_combination(
+    panel: dict,
+    n_panels: int,
+    grid_type: str,
+    max_dc_ac: float,
+    fam_pref: str | None,
+    T_min: float,
+    T_max: float,
+    max_inverters: int = 4,
+):
+    """
+    Répartition de n_panels modules sur plusieurs onduleurs (au plus
+    max_inverters, éventuellement plusieurs exemplaires du même modèle),
+    chacun avec son propre câblage optimal.
+
+    Critères, dans l'ordre : modules câblés (P_dc) maximal, nombre
+    d'onduleurs minimal, puis onduleurs placés le plus tôt dans le catalogue.
+    Avec un seul onduleur, le résultat coïncide avec select_best_inverter.
+
+    Pour chaque modèle, les nombres de modules câblables exactement sont lus
+    dans sa table de câblage (mémorisée). Les multiensembles d'onduleurs sont
+    parcourus par séparation-évaluation : modèles par capacité décroissante,
+    totaux atteignables tenus à jour par décalages de bits, et abandon d'une
+    branche dès que sa borne (modules, puis nombre d'onduleurs) ne peut plus
+    battre la meilleure solution.
+    """
+    if n_panels <= 0 or max_inverters < 1:
+        return None
+    panel_items = tuple(sorted(panel.items()))
+
+    options = []
+    for order, inv_elec in candidate_inverters(grid_type, fam_pref):
+        bound = inverter_p_dc_upper_bound(panel, inv_elec, n_panels, max_dc_ac, T_min, T_max)
+        n_cap = min(n_panels, int(bound // panel["Pstc"]))
+        if n_cap < 1:
+            continue
+        table = _inverter_wiring_table(panel_items, inv_elec["id"], T_min, T_max, float(max_dc_ac), n_cap)
+        exact = table["valid"] & (table["N_used"] == np.arange(len(table)))
+        sizes = np.flatnonzero(exact).tolist()
+        if sizes:
+            options.append({"order": order, "inverter": inv_elec, "table": table, "sizes": sizes})
+
+    if not options:
+        return None
+    options.sort(key=lambda o: (-o["sizes"][-1], o["order"]))
+    # Plus grande taille parmi les modèles restants (borne des branches)
+    max_size_from = [max(o["sizes"][-1] for o in options[i:]) for i in range(len(options))] + [0]
+
+    mask = (1 << (n_panels + 1)) - 1
+    best = {"key": None, "chosen": None}
+
+    def better(key):
+        return best["key"] is None or key > best["key"]
+
+    def search(index, reach, chosen, states):
+        count("select_inverter_combination.nodes")
+        if chosen:
+            total = reach.bit_length() - 1
+            ranks = tuple(sorted(options[i]["order"] for i in chosen))
+            key = (total, -len(chosen), tuple(-r for r in ranks))
+            if better(key):
+                best["key"] = key
+                best["chosen"] = (list(chosen), list(states))
+        else:
+            total = 0
+
+        slots = max_inverters - len(chosen)
+        if slots == 0 or index == len(options):
+            return
+
+        size = max_size_from[index]
+        bound = min(n_panels, total + slots * size)
+        if best["key"] is not None:
+            best_total, best_count = best["key"][0], -best["key"][1]
+            if bound < best_total:
+                return
+            if bound == best_total:
+                extra = max(1, -(-(best_total - total) // size))
+                if len(chosen) + extra > best_count:
+                    return
+
+        # Un exemplaire de plus du modèle courant, puis modèles suivants
+        new_reach = _add_inverter(reach, options[index]["sizes"], mask)
+        if new_reach:
+            search(index, new_reach, chosen + [index], states + [new_reach])
+        search(index + 1, reach, chosen, states)
+
+    search(0, 1, [], [])
+    if best["chosen"] is None:
+        return None
+
+    # Reconstitution de la répartition : du dernier onduleur au premier
+    chosen, states = best["chosen"]
+    remaining = best["key"][0]
+    units = []
+    for j in range(len(chosen) - 1, -1, -1):
+        option = options[chosen[j]]
+        previous = states[j - 1] if j > 0 else 1
+        n_unit = next(u for u in reversed(option["sizes"]) if u <= remaining and (previous >> (remaining - u)) & 1)
+        remaining -= n_unit
+        opt = wiring_from_table(option["table"], n_unit)
+        units.append({
+            "inv_id": option["inverter"]["id"],
+            "opt": opt,
+            "P_dc": opt["P_dc"],
+            "ratio": opt["P_dc"] / option["inverter"]["P_ac"],
+            "P_ac": option["inverter"]["P_ac"],
+        })
+    units.sort(key=lambda u: (-u["P_ac"], -u["P_dc"]))
+
+    P_dc = sum(u["P_dc"] for u in units)
+    P_ac = sum(u["P_ac"] for u in units)
+    counts = {}
+    for u in units:
+        counts[u["inv_id"]] = counts.get(u["inv_id"], 0) + 1
+    return {
+        "units": units,
+        "label": " + ".join(f"{n}× {inv_id}" for inv_id, n in counts.items()),
+        "N_used": sum(u["opt"]["N_used"] for u in units),
+        "P_dc": P_dc,
+        "P_ac": P_ac,
+        "ratio": P_dc / P_ac,
+    }
+
+
+def combined_wiring(combination: dict) -> dict:
+    """Câblage global d'une combinaison (MPPT de tous les onduleurs à la suite), même format que optimize_strings."""
+    units = combination["units"]
+    return {
+        "strings": [L for u in units for L in u["opt"]["strings"]],
+        "parallel": [k for u in units for k in u["opt"]["parallel"]],
+        "N_used": combination["N_used"],
+        "N_series_main": units[0]["opt"]["N_series_main"],
+        "P_dc": combination["P_dc"],
+        "ratio_dc_ac": combination["ratio"],
+    }